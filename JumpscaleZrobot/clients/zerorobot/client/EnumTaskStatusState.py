@@ -0,0 +1,10 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+from enum import Enum
+
+
+class EnumTaskStatusState(Enum):
+    new = "new"
+    ok = "ok"
+    running = "running"
+    error = "error"
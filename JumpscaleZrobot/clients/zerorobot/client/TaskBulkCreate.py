@@ -0,0 +1,58 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+"""
+Auto-generated class for TaskBulkCreate
+"""
+from six import string_types
+
+from . import client_support
+
+
+class TaskBulkCreate(object):
+    """
+    auto-generated. don't touch.
+    """
+
+    @staticmethod
+    def create(**kwargs):
+        """
+        :type action_name: string_types
+        :type args: dict
+        :type service_guid: string_types
+        :type service_name: string_types
+        :type template: string_types
+        :rtype: TaskBulkCreate
+        """
+
+        return TaskBulkCreate(**kwargs)
+
+    def __init__(self, json=None, **kwargs):
+        if json is None and not kwargs:
+            raise ValueError('No data or kwargs present')
+
+        class_name = 'TaskBulkCreate'
+        data = json or kwargs
+
+        # set attributes
+        data_types = [string_types]
+        self.action_name = client_support.set_property(
+            'action_name', data, data_types, False, [], False, True, class_name)
+        data_types = [dict]
+        self.args = client_support.set_property('args', data, data_types, False, [], False, False, class_name)
+        data_types = [string_types]
+        self.service_guid = client_support.set_property(
+            'service_guid', data, data_types, False, [], False, False, class_name)
+        data_types = [string_types]
+        self.service_name = client_support.set_property(
+            'service_name', data, data_types, False, [], False, False, class_name)
+        data_types = [string_types]
+        self.template = client_support.set_property('template', data, data_types, False, [], False, False, class_name)
+
+    def __str__(self):
+        return self.as_json(indent=4)
+
+    def as_json(self, indent=0):
+        return client_support.to_json(self, indent=indent)
+
+    def as_dict(self):
+        return client_support.to_dict(self)
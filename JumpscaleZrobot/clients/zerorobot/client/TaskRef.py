@@ -0,0 +1,47 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+"""
+Auto-generated class for TaskRef
+"""
+from six import string_types
+
+from . import client_support
+
+
+class TaskRef(object):
+    """
+    auto-generated. don't touch.
+    """
+
+    @staticmethod
+    def create(**kwargs):
+        """
+        :type service_guid: string_types
+        :type task_guid: string_types
+        :rtype: TaskRef
+        """
+
+        return TaskRef(**kwargs)
+
+    def __init__(self, json=None, **kwargs):
+        if json is None and not kwargs:
+            raise ValueError('No data or kwargs present')
+
+        class_name = 'TaskRef'
+        data = json or kwargs
+
+        # set attributes
+        data_types = [string_types]
+        self.service_guid = client_support.set_property(
+            'service_guid', data, data_types, False, [], False, True, class_name)
+        data_types = [string_types]
+        self.task_guid = client_support.set_property('task_guid', data, data_types, False, [], False, True, class_name)
+
+    def __str__(self):
+        return self.as_json(indent=4)
+
+    def as_json(self, indent=0):
+        return client_support.to_json(self, indent=indent)
+
+    def as_dict(self):
+        return client_support.to_dict(self)
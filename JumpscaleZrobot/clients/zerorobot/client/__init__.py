@@ -7,6 +7,7 @@ from .Eco import Eco
 from .EnumRobotInfoType import EnumRobotInfoType
 from .EnumServiceStateState import EnumServiceStateState
 from .EnumTaskState import EnumTaskState
+from .EnumTaskStatusState import EnumTaskStatusState
 from .EnumWebHookKind import EnumWebHookKind
 from .Error import Error
 from .Logs import Logs
@@ -22,7 +23,10 @@ from .ServiceCreated import ServiceCreated
 from .ServiceFilter import ServiceFilter
 from .ServiceState import ServiceState
 from .Task import Task
+from .TaskBulkCreate import TaskBulkCreate
 from .TaskCreate import TaskCreate
+from .TaskRef import TaskRef
+from .TaskStatus import TaskStatus
 from .Template import Template
 from .TemplateRepository import TemplateRepository
 from .WebHook import WebHook
@@ -30,6 +34,7 @@ from .WebHook import WebHook
 from .blueprints_service import BlueprintsService
 from .robot_service import RobotService
 from .services_service import ServicesService
+from .tasks_service import TasksService
 from .templates_service import TemplatesService
 
 from .passthrough_client_admin import PassThroughClientAdmin
@@ -45,6 +50,7 @@ class Client:
         self.blueprints = BlueprintsService(http_client)
         self.robot = RobotService(http_client)
         self.services = ServicesService(http_client)
+        self.tasks = TasksService(http_client)
         self.templates = TemplatesService(http_client)
         self.close = http_client.close
 
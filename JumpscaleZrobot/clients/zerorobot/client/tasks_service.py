@@ -0,0 +1,67 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+from .Error import Error
+from .Task import Task
+from .TaskStatus import TaskStatus
+from .unhandled_api_error import UnhandledAPIError
+from .unmarshall_error import UnmarshallError
+
+
+class TasksService:
+    def __init__(self, client):
+        self.client = client
+
+    def ScheduleActions(self, data, headers=None, query_params=None, content_type="application/json"):
+        """
+        Schedule actions on many services at once.
+        All the entries are validated before any task is created, so either all the actions are scheduled or none.
+        It is method for POST /tasks
+        """
+        if query_params is None:
+            query_params = {}
+
+        uri = self.client.base_url + "/tasks"
+        resp = self.client.post(uri, data, headers, query_params, content_type)
+        try:
+            if resp.status_code == 201:
+                resps = []
+                for elem in resp.json():
+                    resps.append(Task(elem))
+                return resps, resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
+
+    def GetTasksStatus(self, data, headers=None, query_params=None, content_type="application/json"):
+        """
+        Retrieve the detail of many tasks, of any service, at once.
+        Used to follow the execution of many tasks without a request per task
+        It is method for POST /tasks/status
+        """
+        if query_params is None:
+            query_params = {}
+
+        uri = self.client.base_url + "/tasks/status"
+        resp = self.client.post(uri, data, headers, query_params, content_type)
+        try:
+            if resp.status_code == 200:
+                resps = []
+                for elem in resp.json():
+                    resps.append(TaskStatus(elem))
+                return resps, resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
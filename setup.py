@@ -64,6 +64,7 @@ setup(
         'prometheus_client>=0.1.1',
         'netifaces>=0.10.6',
         'msgpack-python>=0.4.8',
+        'redis>=2.10.6',
     ],
     scripts=['cmd/zrobot'],
     cmdclass={
@@ -0,0 +1,54 @@
+import gevent
+
+from zerorobot.template.base import TemplateBase
+from zerorobot.template.decorator import concurrent, timeout
+
+
+class Concurrent(TemplateBase):
+
+    version = '0.0.1'
+    template_name = "concurrent"
+    max_concurrent_actions = 2
+
+    # actions started by all the services of this template, in order
+    started = []
+    # number of actions running for all the services of this template, and its maximum
+    active = 0
+    max_active = 0
+
+    def __init__(self, name, guid=None, data=None):
+        super().__init__(name=name, guid=guid, data=data)
+        self.running = set()
+        # set of actions running at the same time, recorded each time an action starts
+        self.overlaps = []
+
+    def _track(self, name, duration=0.2):
+        cls = type(self)
+        cls.started.append((self.name, name))
+        cls.active += 1
+        cls.max_active = max(cls.max_active, cls.active)
+        self.running.add(name)
+        self.overlaps.append(set(self.running))
+        try:
+            gevent.sleep(duration)
+        finally:
+            self.running.discard(name)
+            cls.active -= 1
+
+    @concurrent
+    def monitor(self, i):
+        self._track('monitor%d' % i)
+
+    @timeout(10)
+    @concurrent
+    def info(self):
+        self._track('info')
+
+    def install(self):
+        self._track('install')
+
+    def step(self, i):
+        self._track('step%d' % i, duration=0.01)
+
+    def remove(self):
+        self.delete()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from zerorobot import config
+from zerorobot import service_collection as scol
+from zerorobot import storage
+from zerorobot import template_collection as tcol
+from zerorobot.task.utils import wait_all
+from zerorobot.template import executor
+
+
+class TestConcurrentActions(unittest.TestCase):
+
+    def setUp(self):
+        config.data_repo = config.DataRepo(tempfile.mkdtemp(prefix='0robottest'))
+        storage.init(config)
+        scol.drop_all()
+        # let the services process their task list
+        config.SERVICE_LOADED.set()
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        self.template = tcol._load_template("https://github.com/threefoldtech/0-robot",
+                                            os.path.join(dir_path, 'fixtures', 'templates', 'concurrent'))
+
+    def tearDown(self):
+        # wait for the tasks in progress, so they don't save their service in the data directory of the next test
+        for service in scol.list_services():
+            executor.pool.stop(service)
+        scol.drop_all()
+        config.SERVICE_LOADED.clear()
+        if os.path.exists(config.data_repo.path):
+            shutil.rmtree(config.data_repo.path)
+
+    def test_concurrent_limit(self):
+        srv = tcol.instantiate_service(self.template, 'concurrent')
+        start = time.time()
+        tasks = [srv.schedule_action('monitor', args={'i': i}) for i in range(6)]
+        wait_all(tasks, timeout=5, die=True)
+        duration = time.time() - start
+
+        self.assertEqual(max(len(r) for r in srv.overlaps), 2, "service should not execute more then 2 actions at once")
+        self.assertLess(duration, 1, "concurrent actions should be executed in parallel")
+        self.assertEqual(srv.task_list.running, [])
+
+    def test_serialized_actions(self):
+        srv = tcol.instantiate_service(self.template, 'concurrent')
+        tasks = [
+            srv.schedule_action('monitor', args={'i': 0}),
+            srv.schedule_action('info'),
+            srv.schedule_action('install'),
+            srv.schedule_action('monitor', args={'i': 1}),
+        ]
+        wait_all(tasks, timeout=5, die=True)
+
+        self.assertIn({'monitor0', 'info'}, srv.overlaps, "decorated actions should run in parallel")
+        for running in srv.overlaps:
+            if 'install' in running:
+                self.assertEqual(running, {'install'}, "install should never run with another action")
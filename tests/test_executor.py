@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import gevent
+
+from zerorobot import config
+from zerorobot import service_collection as scol
+from zerorobot import storage
+from zerorobot import template_collection as tcol
+from zerorobot.task.utils import wait_all
+from zerorobot.template import executor
+
+
+class TestExecutorPool(unittest.TestCase):
+
+    def setUp(self):
+        config.data_repo = config.DataRepo(tempfile.mkdtemp(prefix='0robottest'))
+        storage.init(config)
+        scol.drop_all()
+        config.SERVICE_LOADED.set()
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        self.template = tcol._load_template("https://github.com/threefoldtech/0-robot",
+                                            os.path.join(dir_path, 'fixtures', 'templates', 'concurrent'))
+        self.size = executor.pool.size
+
+    def tearDown(self):
+        # wait for the tasks in progress, so they don't save their service in the data directory of the next test
+        for service in scol.list_services():
+            executor.pool.stop(service)
+        scol.drop_all()
+        executor.pool.resize(self.size)
+        config.SERVICE_LOADED.clear()
+        if os.path.exists(config.data_repo.path):
+            shutil.rmtree(config.data_repo.path)
+
+    def test_fairness(self):
+        executor.pool.resize(1)
+        s1 = tcol.instantiate_service(self.template, 's1')
+        s2 = tcol.instantiate_service(self.template, 's2')
+        tasks = [s1.schedule_action('step', args={'i': i}) for i in range(5)]
+        tasks.append(s2.schedule_action('step', args={'i': 0}))
+        wait_all(tasks, timeout=5, die=True)
+
+        started = self.template.started
+        self.assertEqual([action for name, action in started if name == 's1'], ['step%d' % i for i in range(5)],
+                         "tasks of a service should be executed in order")
+        self.assertLess(started.index(('s2', 'step0')), 3, "s2 should not wait for all the tasks of s1")
+
+    def test_unbounded_default(self):
+        self.assertIsNone(executor.ExecutorPool().size, "the number of tasks executed at the same time should not be limited by default")
+        pool = executor.ExecutorPool(2)
+        pool.resize(0)
+        self.assertIsNone(pool.size)
+
+    def test_concurrency_limit(self):
+        executor.pool.resize(2)
+        self.template.max_active = 0
+        services = [tcol.instantiate_service(self.template, 's%d' % i) for i in range(4)]
+        tasks = [s.schedule_action('install') for s in services]
+        wait_all(tasks, timeout=5, die=True)
+        self.assertEqual(self.template.max_active, 2, "robot should not execute more then 2 tasks at once")
+
+    def test_stop_start(self):
+        srv = tcol.instantiate_service(self.template, 's1')
+        executor.pool.stop(srv)
+        self.assertFalse(executor.pool.is_running(srv))
+        task = srv.schedule_action('step', args={'i': 0})
+        gevent.sleep(0.1)
+        self.assertEqual(task.state, 'new', "stopped service should not execute its tasks")
+
+        executor.pool.start(srv)
+        task.wait(timeout=5)
+        self.assertEqual(task.state, 'ok')
+
+    def test_stop_from_action(self):
+        srv = tcol.instantiate_service(self.template, 's1')
+        task = srv.schedule_action('remove')
+        task.wait(timeout=5)
+        self.assertEqual(task.state, 'ok', "a service should be able to delete itself from one of its actions")
+        self.assertLess(task.duration, 1, "stop should not wait for the action that called it")
+
+    def test_dispatch_error(self):
+        s1 = tcol.instantiate_service(self.template, 's1')
+        s2 = tcol.instantiate_service(self.template, 's2')
+
+        def fail(timeout=None):
+            del s1.task_list.get
+            raise RuntimeError("dispatch failed")
+        s1.task_list.get = fail
+        t1 = s1.schedule_action('step', args={'i': 0})
+        t2 = s2.schedule_action('step', args={'i': 0})
+        t2.wait(timeout=5)
+        self.assertEqual(t2.state, 'ok', "an error with a service should not stop the execution of the others")
+
+        s1.schedule_action('step', args={'i': 1}).wait(timeout=5)
+        self.assertEqual(t1.state, 'ok')
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import gevent
+
+from zerorobot import config
+from zerorobot import service_collection as scol
+from zerorobot import storage
+from zerorobot import template_collection as tcol
+from zerorobot.robot import loader
+from zerorobot.template_collection import _load_template
+
+
+class TestLoader(unittest.TestCase):
+
+    def setUp(self):
+        config.data_repo = config.DataRepo(tempfile.mkdtemp(prefix='0robottest'))
+        storage.init(config)
+        scol.drop_all()
+        tcol.clear()
+
+    def tearDown(self):
+        scol.drop_all()
+        if os.path.exists(config.data_repo.path):
+            shutil.rmtree(config.data_repo.path)
+
+    def load_template(self, name):
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        return _load_template("https://github.com/threefoldtech/0-robot",
+                              os.path.join(dir_path, 'fixtures', 'templates', name))
+
+    def test_load_services(self):
+        Node = self.load_template('node')
+        Validate = self.load_template('validate')
+
+        services = [Node(name='node%d' % i) for i in range(20)]
+        services.append(Validate(name='valid', data={'required': True}))
+        invalid = Validate(name='invalid', data={})
+        services.append(invalid)
+        for service in services:
+            storage.save(service)
+        expected = {s.guid for s in services}
+        scol.drop_all()
+
+        with mock.patch.object(loader, '_try_load_service') as try_load:
+            loader.load_services(config, fetch_concurrency=4, validate_concurrency=4)
+            # let the retry greenlet start
+            gevent.sleep(0)
+
+        self.assertEqual({s.guid for s in scol.list_services()}, expected, "all the services should be loaded")
+        failed = try_load.call_args[0][0]
+        self.assertEqual([s.guid for s in failed], [invalid.guid], "services failing validation should be retried later")
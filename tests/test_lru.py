@@ -0,0 +1,41 @@
+import unittest
+
+from zerorobot.lru import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_create(self):
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+        cache = LRUCache(2)
+        self.assertEqual(len(cache), 0)
+
+    def test_get_set(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('b', 2), 2)
+        self.assertIn('a', cache)
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # mark a as recently used, so b is evicted first
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache, "least recently used entry should be evicted")
+        self.assertIn('c', cache)
+
+    def test_pop_clear(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertIsNone(cache.pop('a'))
+        cache.set('b', 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
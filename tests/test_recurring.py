@@ -0,0 +1,87 @@
+import time
+import unittest
+
+import gevent
+
+from zerorobot.task import PRIORITY_NORMAL, TASK_STATE_OK, Task
+from zerorobot.template.recurring import RecurringScheduler
+
+
+class FakeService:
+
+    def __init__(self, guid):
+        self.guid = guid
+        self.task_list = self
+        self.runs = 0
+        # task of the monitor action waiting in the task list
+        self.waiting = None
+
+    def monitor(self):
+        self.runs += 1
+
+    def waiting_task(self, action_name):
+        return self.waiting
+
+    def _schedule_action(self, action, priority):
+        task = Task(getattr(self, action), None)
+        gevent.spawn(task.execute)
+        return task
+
+
+class TestRecurringScheduler(unittest.TestCase):
+
+    def test_period(self):
+        scheduler = RecurringScheduler()
+        service = FakeService('s1')
+        scheduler.add(service, 'monitor', 1, PRIORITY_NORMAL, jitter=0)
+        gevent.sleep(0.1)
+        self.assertEqual(service.runs, 1, "action should be scheduled right away")
+
+        gevent.sleep(2)
+        self.assertIn(service.runs, (2, 3), "action should not be scheduled more often than every period")
+
+        scheduler.cancel(service)
+        self.assertFalse(scheduler.is_scheduled(service, 'monitor'))
+        runs = service.runs
+        gevent.sleep(1.2)
+        self.assertEqual(service.runs, runs, "cancelled action should not be scheduled anymore")
+
+    def test_waiting_task(self):
+        scheduler = RecurringScheduler()
+        service = FakeService('s1')
+        service.waiting = Task(service.monitor, None)
+        # the task waiting in the task list was created more then a period ago
+        service.waiting._created = time.time() - 2
+        scheduler.add(service, 'monitor', 1, PRIORITY_NORMAL, jitter=0)
+        gevent.sleep(0.1)
+        self.assertEqual(service.runs, 0, "action already in the task list should not be scheduled again")
+
+        service.waiting.state = TASK_STATE_OK
+        service.waiting = None
+        gevent.sleep(0.1)
+        self.assertEqual(service.runs, 1)
+
+    def test_jitter(self):
+        scheduler = RecurringScheduler()
+        services = [FakeService('s%d' % i) for i in range(50)]
+        start = time.time()
+        for service in services:
+            scheduler.add(service, 'monitor', 10, PRIORITY_NORMAL, jitter=0.1)
+        due = sorted(due for due, _, _ in scheduler._heap)
+        self.assertTrue(all(start <= d <= start + 1.1 for d in due), "first run should be within period * jitter")
+        self.assertGreater(due[-1] - due[0], 0.1, "first runs should be spread")
+        for service in services:
+            scheduler.cancel(service)
+
+    def test_replace(self):
+        scheduler = RecurringScheduler()
+        old = FakeService('s1')
+        new = FakeService('s1')
+        scheduler.add(old, 'monitor', 10, PRIORITY_NORMAL, jitter=0)
+        scheduler.add(new, 'monitor', 10, PRIORITY_NORMAL, jitter=0)
+        scheduler.cancel(old)
+        self.assertTrue(scheduler.is_scheduled(new, 'monitor'), "cancelling a replaced service should not cancel the new one")
+        gevent.sleep(0.1)
+        self.assertEqual(old.runs, 0)
+        self.assertEqual(new.runs, 1)
+        scheduler.cancel(new)
@@ -0,0 +1,118 @@
+import unittest
+
+import gevent
+
+from zerorobot.storage.scheduler import SaveScheduler
+
+
+class FakeService:
+
+    def __init__(self, guid, fail=0, duration=0):
+        self.guid = guid
+        self.saved = 0
+        self.fail = fail
+        self.duration = duration
+
+    def save(self):
+        gevent.sleep(self.duration)
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("save failed")
+        self.saved += 1
+
+
+class TestSaveScheduler(unittest.TestCase):
+
+    def test_coalesce(self):
+        scheduler = SaveScheduler(window=0.1)
+        s1 = FakeService('s1')
+        s2 = FakeService('s2')
+        for _ in range(10):
+            scheduler.mark(s1)
+        scheduler.mark(s2)
+        self.assertEqual(scheduler.pending, 2)
+        self.assertEqual(s1.saved, 0, "services should not be written before the window elapsed")
+
+        gevent.sleep(0.3)
+        self.assertEqual(s1.saved, 1, "all the marks within the window should be written once")
+        self.assertEqual(s2.saved, 1)
+        self.assertEqual(scheduler.pending, 0)
+
+        scheduler.mark(s1)
+        gevent.sleep(0.3)
+        self.assertEqual(s1.saved, 2, "a service marked after being written should be written again")
+
+    def test_flush(self):
+        scheduler = SaveScheduler(window=60)
+        services = [FakeService('s%d' % i) for i in range(10)]
+        for service in services:
+            scheduler.mark(service)
+
+        scheduler.flush()
+        self.assertEqual([s.saved for s in services], [1] * 10)
+        self.assertEqual(scheduler.pending, 0)
+
+    def test_flush_while_running(self):
+        scheduler = SaveScheduler(window=0.01, concurrency=2)
+        services = [FakeService('s%d' % i, duration=0.01) for i in range(10)]
+        for service in services:
+            scheduler.mark(service)
+
+        # let the background writer start writing and block on the full pool
+        gevent.sleep(0.02)
+        scheduler.flush()
+        gevent.sleep(0.1)
+        self.assertEqual([s.saved for s in services], [1] * 10)
+        self.assertEqual(scheduler.pending, 0)
+
+    def test_discard(self):
+        scheduler = SaveScheduler(window=0.1)
+        service = FakeService('s1')
+        scheduler.mark(service)
+        scheduler.discard(service)
+        gevent.sleep(0.3)
+        self.assertEqual(service.saved, 0, "discarded service should not be written")
+
+        # discard waits for the write in progress
+        service.duration = 0.2
+        scheduler.mark(service)
+        gevent.sleep(0.15)
+        scheduler.discard(service)
+        self.assertEqual(service.saved, 1)
+
+    def test_retry(self):
+        scheduler = SaveScheduler(window=0.05)
+        service = FakeService('s1', fail=1)
+        scheduler.mark(service)
+        gevent.sleep(0.3)
+        self.assertEqual(service.saved, 1, "failed save should be retried")
+        self.assertEqual(scheduler.failing, 0)
+
+    def test_retry_backoff(self):
+        scheduler = SaveScheduler(window=0.05)
+        service = FakeService('s1', fail=3)
+        scheduler.mark(service)
+        gevent.sleep(0.1)
+        self.assertEqual(service.fail, 2)
+        self.assertEqual(scheduler.failing, 1)
+        self.assertEqual(scheduler.pending, 0, "failed save should wait before being retried")
+
+        # waits 0.1s, 0.2s then 0.4s before the retries, plus the window
+        gevent.sleep(0.2)
+        self.assertEqual(service.fail, 1)
+        gevent.sleep(0.4)
+        self.assertEqual(service.fail, 0)
+        self.assertEqual(service.saved, 0)
+        gevent.sleep(0.5)
+        self.assertEqual(service.saved, 1)
+        self.assertEqual(scheduler.failing, 0)
+
+    def test_discard_retry(self):
+        scheduler = SaveScheduler(window=0.05)
+        service = FakeService('s1', fail=1)
+        scheduler.mark(service)
+        gevent.sleep(0.1)
+        scheduler.discard(service)
+        self.assertEqual(scheduler.failing, 0)
+        gevent.sleep(0.3)
+        self.assertEqual(service.saved, 0, "discarded service should not be retried")
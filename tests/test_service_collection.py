@@ -83,3 +83,51 @@ class TestServiceCollection(unittest.TestCase):
         assert scol.is_service_public(s1.guid) is False
         scol.set_service_public(s1.guid)
         assert scol.is_service_public(s1.guid)
+
+    def test_public_guids(self):
+        s1 = FakeService('111', 's1')
+        s2 = FakeService('222', 's2')
+        s2._public = True
+        scol.add(s1)
+        scol.add(s2)
+        self.assertEqual(scol.public_guids(), {'222'}, "public service should be indexed when added")
+
+        scol.set_service_public(s1.guid)
+        self.assertEqual(scol.public_guids(), {'111', '222'})
+
+        scol.delete(s2)
+        self.assertEqual(scol.public_guids(), {'111'}, "deleted service should be removed from the index")
+        with self.assertRaises(scol.ServiceNotFoundError):
+            scol.is_service_public(s2.guid)
+
+    def test_search_multiple_columns(self):
+        s1 = FakeService('1111', 's1')
+        s2 = FakeService('2222', 's2')
+        s3 = FakeService2('3333', 's1')
+        scol.add(s1)
+        scol.add(s2)
+        scol.add(s3)
+
+        self.assertEqual(scol.find(name='s1'), [s1, s3], "results should be in the order services have been added")
+        self.assertEqual(scol.find(name='s1', template_name='other'), [s3])
+        self.assertEqual(scol.find(template_host='github.com', template_account='threefoldtech',
+                                   template_repo='0-robot', template_version='0.0.1'), [s1, s2, s3])
+        self.assertEqual(scol.find(name='s2', template_name='other'), [])
+        self.assertEqual(scol.find(name='nan'), [])
+        self.assertEqual(scol.find(), [s1, s2, s3])
+
+        with self.assertRaises(ValueError):
+            scol.find(unknown='s1')
+
+    def test_search_after_delete(self):
+        s1 = FakeService('1111', 's1')
+        s2 = FakeService('2222', 's1')
+        scol.add(s1)
+        scol.add(s2)
+
+        # the template of a service is changed before it is removed during an upgrade
+        s1.template_uid = TemplateUID.parse('github.com/threefoldtech/0-robot/fakeservice/0.0.2')
+        scol.delete(s1)
+        self.assertEqual(scol.find(name='s1'), [s2])
+        self.assertEqual(scol.find(template_uid='github.com/threefoldtech/0-robot/fakeservice/0.0.1'), [s2])
+        self.assertEqual(scol.find(template_version='0.0.2'), [])
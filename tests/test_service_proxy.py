@@ -10,7 +10,8 @@ from zerorobot import service_collection as scol
 from zerorobot import template_collection as tcol
 from zerorobot.dsl.ZeroRobotManager import ZeroRobotManager
 from zerorobot.robot import Robot
-from zerorobot.service_proxy import ServiceProxy
+from zerorobot.service_proxy import ServiceProxy, TaskProxy, wait_all
+from zerorobot.task import TaskNotFoundError
 from zerorobot.task.task import TASK_STATE_ERROR, TASK_STATE_OK
 
 
@@ -109,6 +110,51 @@ class TestServiceProxy(unittest.TestCase):
         with self.assertRaises(RuntimeError, message='task.wait should raise if state is error and die is True'):
             proxy_task.wait(die=True)
 
+    def test_schedule_many(self):
+        proxy, service = self._create_proxy()
+
+        tasks = self.cl.services.schedule_many([
+            (proxy, 'start', None),
+            (proxy.guid, 'test_return', {'return_val': 'foo'}),
+            ({'service_name': proxy.name}, 'stop', None),
+        ])
+        self.assertEqual([t.action_name for t in tasks], ['start', 'test_return', 'stop'],
+                         "tasks should be returned in the order of the actions")
+        for task in tasks:
+            self.assertEqual(task.service.guid, service.guid)
+            task.wait()
+        self.assertEqual(tasks[1].result, 'foo')
+
+        with self.assertRaises(RuntimeError, msg='no action should be scheduled if one of them is not valid'):
+            self.cl.services.schedule_many([(proxy, 'start', None), (proxy, 'nope', None)])
+        self.assertEqual(len(service.task_list.list_tasks()), 0)
+
+    def test_wait_all(self):
+        proxy, service = self._create_proxy()
+
+        tasks = [proxy.schedule_action('test_return', args={'return_val': i}) for i in range(5)]
+        tasks.append(proxy.schedule_action('error'))
+        results = wait_all(tasks, timeout=10)
+        self.assertEqual(results[:5], list(range(5)), "results should be in the order of the tasks")
+        self.assertEqual([t.state for t in tasks], [TASK_STATE_OK] * 5 + [TASK_STATE_ERROR])
+
+        with self.assertRaises(RuntimeError):
+            wait_all(tasks, die=True)
+
+        task = proxy.schedule_action('long')
+        self.assertEqual(wait_all([task], timeout=1), [], "task not executed within timeout should be skipped")
+        self.assertEqual(task.state, TASK_STATE_ERROR, "task not executed within timeout should be cancelled")
+
+    def test_wait_all_missing(self):
+        proxy, service = self._create_proxy()
+
+        task = proxy.schedule_action('test_return', args={'return_val': 'foo'})
+        missing = TaskProxy('nope', proxy, 'test_return', {}, 0)
+        with self.assertRaises(TaskNotFoundError):
+            wait_all([task, missing], timeout=10)
+        self.assertEqual(task.state, TASK_STATE_OK, "the existing tasks should still be waited for")
+        self.assertEqual(task.result, 'foo')
+
     def test_delete(self):
         proxy, service = self._create_proxy()
         proxy.delete()
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from zerorobot import config
+from zerorobot import service_collection as scol
+from zerorobot.storage.filesystem import (FORMAT_MSGPACK, FORMAT_YAML,
+                                          FileSystemServiceStorage)
+from zerorobot.template_collection import _load_template
+
+
+class TestFileSystemServiceStorage(unittest.TestCase):
+
+    def setUp(self):
+        config.data_repo = config.DataRepo(tempfile.mkdtemp(prefix='0robottest'))
+        self.root = os.path.join(config.data_repo.path, 'services')
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        self.tmpl = _load_template("https://github.com/threefoldtech/0-robot",
+                                   os.path.join(dir_path, 'fixtures', 'templates', 'node'))
+
+    def tearDown(self):
+        scol.drop_all()
+        shutil.rmtree(config.data_repo.path)
+
+    def _service(self, name='test'):
+        service = self.tmpl(name=name, data={'foo': 'bar', 'nested': {'list': [1, 2]}})
+        service.state.set('actions', 'install', 'ok')
+        return service
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            FileSystemServiceStorage(self.root, format='json')
+
+    def test_save_load(self):
+        for format in [FORMAT_YAML, FORMAT_MSGPACK]:
+            with self.subTest(format):
+                store = FileSystemServiceStorage(os.path.join(self.root, format), format=format)
+                service = self._service()
+                store.save(service)
+
+                keys = list(store.list_keys())
+                self.assertEqual(len(keys), 1)
+                expected = ['service.msgpack'] if format == FORMAT_MSGPACK else \
+                    ['data.yaml', 'service.yaml', 'state.yaml', 'tasks.yaml']
+                self.assertEqual(sorted(os.listdir(keys[0])), expected)
+
+                loaded = store.load(keys[0])
+                self.assertEqual(loaded['service']['guid'], service.guid)
+                self.assertEqual(loaded['data'], dict(service.data))
+                self.assertEqual(loaded['data']['nested'], {'list': [1, 2]})
+                self.assertEqual(loaded['states'], {'actions': {'install': 'ok'}})
+                self.assertEqual(loaded['tasks'], [])
+
+    def test_migrate(self):
+        service = self._service()
+        FileSystemServiceStorage(self.root, format=FORMAT_YAML).save(service)
+
+        store = FileSystemServiceStorage(self.root, format=FORMAT_MSGPACK)
+        key = list(store.list_keys())[0]
+        self.assertEqual(store.read(key)[1], FORMAT_YAML, "read should not convert the service")
+        self.assertTrue(os.path.exists(os.path.join(key, 'service.yaml')))
+
+        loaded = store.load(key)
+        self.assertEqual(loaded['service']['guid'], service.guid)
+        self.assertEqual(os.listdir(key), ['service.msgpack'], "load should convert the service to the configured format")
+        self.assertEqual(store.load(key), loaded)
+
+        # and back to yaml
+        store = FileSystemServiceStorage(self.root, format=FORMAT_YAML)
+        self.assertEqual(store.load(key), loaded)
+        self.assertNotIn('service.msgpack', os.listdir(key))
+
+    def test_save_unchanged(self):
+        store = FileSystemServiceStorage(self.root)
+        service = self._service()
+        self.assertTrue(store.save(service))
+        self.assertFalse(store.save(service), "service didn't change, it should not be written again")
+
+        service.data['foo'] = 'baz'
+        self.assertTrue(store.save(service))
+        service.state.set('actions', 'start', 'ok')
+        self.assertTrue(store.save(service))
+        service.schedule_action('start')
+        self.assertTrue(store.save(service), "a new task in the task list should be saved")
+        self.assertFalse(store.save(service))
+
+        store.delete(service)
+        self.assertEqual(list(store.list_keys()), [])
+        self.assertTrue(store.save(service), "a deleted service should be written again")
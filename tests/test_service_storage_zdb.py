@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import redis
+
+from zerorobot import config
+from zerorobot import service_collection as scol
+from zerorobot.storage.zdb import ZDBServiceStorage
+from zerorobot.template_collection import _load_template
+
+
+class _FakePipeline:
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.commands = []
+
+    def execute_command(self, *args):
+        self.commands.append(args)
+
+    def execute(self, raise_on_error=True):
+        return self.replies[:len(self.commands)]
+
+
+class _FakeRedis:
+
+    def __init__(self):
+        self.replies = []
+        self.pipelines = []
+
+    def pipeline(self, transaction=True):
+        pipe = _FakePipeline(self.replies)
+        self.pipelines.append(pipe)
+        return pipe
+
+
+class TestZDBServiceStorage(unittest.TestCase):
+
+    def setUp(self):
+        config.data_repo = config.DataRepo(tempfile.mkdtemp(prefix='0robottest'))
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        self.tmpl = _load_template("https://github.com/threefoldtech/0-robot",
+                                   os.path.join(dir_path, 'fixtures', 'templates', 'node'))
+        # don't connect to a 0-db
+        self.store = ZDBServiceStorage.__new__(ZDBServiceStorage)
+        self.store._saved = {}
+        self.store._legacy = set()
+        self.store._redis = _FakeRedis()
+
+    def tearDown(self):
+        scol.drop_all()
+        shutil.rmtree(config.data_repo.path)
+
+    def test_save_error(self):
+        service = self.tmpl(name='test')
+        self.store._redis.replies = [redis.ResponseError("namespace is full")]
+        with self.assertRaises(redis.ResponseError):
+            self.store.save(service)
+
+        self.store._redis.replies = [b'zrobot_service_' + service.guid.encode()]
+        assert self.store.save(service) is True, "a failed write should be retried at the next save"
+        assert self.store.save(service) is False
+
+    def test_save_legacy(self):
+        service = self.tmpl(name='test')
+        self.store._legacy.add(service.guid)
+        self.store._redis.replies = [None, redis.ResponseError("Key not found"), redis.ResponseError("busy"), None, None]
+        self.store.save(service)
+        assert service.guid in self.store._legacy, "legacy keys should be deleted again at the next save"
+
+        service.data['foo'] = 'bar'
+        self.store._redis.replies = [None, redis.ResponseError("Key not found"), None, None, None]
+        self.store.save(service)
+        assert service.guid not in self.store._legacy
+
+    def test_delete_error(self):
+        service = self.tmpl(name='test')
+        self.store._redis.replies = [redis.ResponseError("busy")] + [None] * 4
+        with self.assertRaises(redis.ResponseError):
+            self.store.delete(service)
+
+        self.store._redis.replies = [redis.ResponseError("Key not found")] * 5
+        self.store.delete(service)
@@ -12,6 +12,7 @@ from zerorobot import storage
 from zerorobot import template_collection as tcol
 from zerorobot.service_collection import BadTemplateError
 from zerorobot.storage.filesystem import _serialize_service
+from zerorobot.template import recurring
 from zerorobot.template.base import (ActionNotFoundError,
                                      BadActionArgumentError, TemplateBase)
 from zerorobot.template_collection import ValidationError, _load_template
@@ -196,8 +197,7 @@ class TestServiceTemplate(unittest.TestCase):
     def test_recurring(self):
         tmpl = self.load_template('recurring')
         srv = tmpl('foo')
-        gl = srv.gl_mgr.get('recurring_monitor')
-        self.assertTrue(gl.started)
+        self.assertTrue(recurring.scheduler.is_scheduled(srv, 'monitor'))
 
     def test_cleanup_actions(self):
         Tmpl = self.load_template('cleanup')
@@ -3,7 +3,8 @@ import unittest
 
 import gevent
 from zerorobot.task.task import (TASK_STATE_ERROR, TASK_STATE_NEW,
-                                 TASK_STATE_OK, TASK_STATE_RUNNING, Task)
+                                 TASK_STATE_OK, TASK_STATE_RUNNING, Task,
+                                 TaskRecord)
 from zerorobot.template.decorator import timeout
 
 
@@ -85,3 +86,41 @@ class TestTask(unittest.TestCase):
         assert t.result is None
         assert t.created > 0
         assert t.eco is not None
+
+    def test_wait_notified(self):
+        t = Task(noop, {})
+        waiters = [gevent.spawn(t.wait) for _ in range(10)]
+        gevent.sleep(0.1)  # let the waiters block on the task
+
+        started = time.time()
+        t.execute()
+        gevent.joinall(waiters, timeout=1)
+
+        assert all(w.successful() for w in waiters), "all waiters should have returned"
+        assert time.time() - started < 0.5, "waiters should be notified as soon as the task is done"
+        assert t.wait(timeout=1) == t, "waiting on a finished task should return immediately"
+
+    def test_wait_change(self):
+        t = Task(noop, {})
+        assert t.wait_change(timeout=0.1) == TASK_STATE_NEW, "should return after timeout if state doesn't change"
+
+        gevent.spawn_later(0.1, setattr, t, 'state', TASK_STATE_RUNNING)
+        assert t.wait_change(timeout=1) == TASK_STATE_RUNNING
+
+        gevent.spawn_later(0.1, setattr, t, 'state', TASK_STATE_OK)
+        assert t.wait_change(timeout=1) == TASK_STATE_OK
+
+        started = time.time()
+        assert t.wait_change(timeout=1) == TASK_STATE_OK
+        assert time.time() - started < 0.5, "should return immediately if the task has been executed"
+
+    def test_record_wait(self):
+        record = TaskRecord(None, 'guid', 'noop', TASK_STATE_OK, int(time.time()), 0.1, b'', decode=lambda _: {})
+        started = time.time()
+        assert record.wait_change(timeout=1) == TASK_STATE_OK
+        assert time.time() - started < 0.5, "a record should never wait for a change of state"
+
+        done = []
+        record.on_done(done.append)
+        gevent.sleep(0)
+        assert done == [record], "callback should be called right away for a record"
@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+
+from zerorobot.server.auth import auth
+from zerorobot.server.handlers.sse import task_events_response
+from zerorobot.task import TASK_STATE_OK, TASK_STATE_RUNNING, Task, events
+
+
+class FakeService:
+
+    def __init__(self, guid):
+        self.guid = guid
+
+    def foo(self):
+        pass
+
+
+class TestTaskEvents(unittest.TestCase):
+
+    def tearDown(self):
+        events._subscribers.clear()
+
+    def _task(self, service):
+        t = Task(service.foo, {})
+        t.service = service
+        return t
+
+    def test_subscribe_service(self):
+        s1, s2 = FakeService('s1'), FakeService('s2')
+        sub = events.subscribe('s1')
+        t1, t2 = self._task(s1), self._task(s2)
+
+        t2.state = TASK_STATE_RUNNING
+        t1.state = TASK_STATE_RUNNING
+        t1.state = TASK_STATE_OK
+
+        self.assertEqual(sub.get(timeout=0), (t1, TASK_STATE_RUNNING), "only the tasks of s1 should be received")
+        self.assertEqual(sub.get(timeout=0), (t1, TASK_STATE_OK))
+        self.assertIsNone(sub.get(timeout=0))
+
+        sub.close()
+        t1.state = TASK_STATE_RUNNING
+        self.assertIsNone(sub.get(timeout=0), "closed subscriber should not receive events")
+
+    def test_subscribe_all(self):
+        s1, s2 = FakeService('s1'), FakeService('s2')
+        sub = events.subscribe()
+        t1, t2 = self._task(s1), self._task(s2)
+        t1.state = TASK_STATE_RUNNING
+        t2.state = TASK_STATE_RUNNING
+        self.assertEqual([sub.get(timeout=0), sub.get(timeout=0)], [(t1, TASK_STATE_RUNNING), (t2, TASK_STATE_RUNNING)])
+
+    def test_overflow(self):
+        s1 = FakeService('s1')
+        sub = events.Subscriber(size=2)
+        events._subscribers.add(sub)
+
+        tasks = [self._task(s1) for _ in range(3)]
+        for t in tasks:
+            t.state = TASK_STATE_RUNNING
+
+        self.assertTrue(sub.overflow)
+        self.assertNotIn(sub, events._subscribers, "subscriber should be dropped when its queue is full")
+        self.assertEqual([sub.get(timeout=0), sub.get(timeout=0)], [(t, TASK_STATE_RUNNING) for t in tasks[:2]])
+        self.assertIsNone(sub.get(timeout=10), "overflowed subscriber should return right away once drained")
+
+    def test_stream_deleted_service(self):
+        s1, s2 = FakeService('s1'), FakeService('s2')
+        sub = events.subscribe()
+        t1, t2 = self._task(s1), self._task(s2)
+        t2.state = TASK_STATE_RUNNING
+        t1.state = TASK_STATE_RUNNING
+
+        # s1 is public, s2 has been deleted since the event was published
+        def is_public(guid):
+            if guid != 's1':
+                raise auth.scol.ServiceNotFoundError(guid)
+            return True
+
+        with mock.patch.object(auth.god_jwt, 'check_god_token', return_value=False), \
+                mock.patch.object(auth.user_jwt, 'extract_service_guid', return_value=[]), \
+                mock.patch.object(auth.scol, 'is_service_public', side_effect=is_public), \
+                mock.patch('zerorobot.server.handlers.sse.task_view', side_effect=lambda t, s: {'guid': s.guid}):
+            has_access = auth.service_access(None)
+            self.assertFalse(has_access('s2'))
+            stream = task_events_response(sub, has_access=has_access).response
+            self.assertEqual(next(stream), ': connected\n\n')
+            chunk = next(stream)
+            stream.close()
+
+        self.assertTrue(chunk.startswith('event: task'), "the event of the deleted service should be skipped")
+        self.assertIn('"guid": "s1"', chunk)
@@ -1,13 +1,20 @@
 import os
+import sqlite3
 import time
 import unittest
+from unittest import mock
 
+import gevent
 import pytest
 from jumpscale import j
+from zerorobot import config
 from zerorobot.task.storage.base import TaskConflictError
+from zerorobot.task.storage import shared, sqlite
 from zerorobot.task.storage.file import TaskStorageFile
+from zerorobot.task.storage.shared import TaskStorageShared
 from zerorobot.task.storage.sqlite import TaskStorageSqlite
-from zerorobot.task.task import Task
+from zerorobot.task import TASK_STATE_ERROR
+from zerorobot.task.task import Task, TaskRecord
 from zerorobot.task.task_list import TaskList, TaskNotFoundError
 
 
@@ -41,7 +48,12 @@ class TestTaskStorageBase(unittest.TestCase):
             task_list._done = storage
             return storage
 
-        self.storages = map(load, [TaskStorageSqlite, TaskStorageFile])
+        shared_db = shared.db_path(j.sal.fs.getTmpDirPath())
+
+        def shared_storage(task_list):
+            return TaskStorageShared(task_list, shared_db)
+
+        self.storages = map(load, [TaskStorageSqlite, TaskStorageFile, shared_storage])
 
     def tearDown(self):
         map(lambda storage: storage.drop(), self.storages)
@@ -111,6 +123,36 @@ class TestTaskStorageBase(unittest.TestCase):
 
         list(map(test, self.storages))
 
+    def test_list_filter(self):
+        def test(storage):
+            service = _FakeService()
+            for action in ['install', 'start', 'stop', 'start']:
+                task = Task(getattr(service, action), None)
+                task.state = 'ok' if action == 'start' else 'error'
+                storage.add(task)
+
+            assert [t.action_name for t in storage.list(action_name='start')] == ['start', 'start']
+            assert [t.action_name for t in storage.list(state='error')] == ['install', 'stop']
+            assert len(storage.list(state='ok', action_name='install')) == 0
+
+        list(map(test, self.storages))
+
+    def test_list_paginate(self):
+        def test(storage):
+            tasks = [add_task(storage) for _ in range(5)]
+
+            page1 = storage.list(limit=2)
+            page2 = storage.list(limit=2, cursor=page1[-1].guid)
+            page3 = storage.list(limit=2, cursor=page2[-1].guid)
+            guids = [t.guid for t in page1 + page2 + page3]
+            assert guids == [t.guid for t in tasks], "pages should return the tasks in the order they have been stored"
+            assert storage.list(cursor=tasks[-1].guid) == []
+
+            with pytest.raises(TaskNotFoundError):
+                storage.list(cursor='no_exist')
+
+        list(map(test, self.storages))
+
     def test_drop(self):
         def test(storage):
             tasks = []
@@ -126,6 +168,263 @@ class TestTaskStorageBase(unittest.TestCase):
         list(map(test, self.storages))
 
 
+class TestTaskStorageSqliteWriteBehind(unittest.TestCase):
+
+    def setUp(self):
+        self.service = _FakeService()
+        task_list = TaskList(self.service)
+        task_list._done.close()
+        self.storage = TaskStorageSqlite(task_list, write_behind=True, flush_size=5, flush_interval=3600)
+
+    def tearDown(self):
+        self.storage.drop()
+        self.storage.close()
+
+    def _db_count(self):
+        return self.storage.conn.execute("SELECT count(*) FROM tasks").fetchone()[0]
+
+    def test_buffered_read(self):
+        task = add_task(self.storage)
+        assert self._db_count() == 0, "task should be buffered, not written yet"
+        assert self.storage.get(task.guid) == task, "buffered task should be readable"
+
+        with pytest.raises(TaskConflictError):
+            self.storage.add(task)
+
+        assert self.storage.count() == 1, "count should flush the buffered tasks"
+        assert self._db_count() == 1
+        assert [t.guid for t in self.storage.list()] == [task.guid]
+
+        with pytest.raises(TaskConflictError):
+            self.storage.add(task)
+
+    def test_flush_size(self):
+        tasks = [add_task(self.storage) for _ in range(4)]
+        assert self._db_count() == 0
+        tasks.append(add_task(self.storage))
+        assert self._db_count() == 5, "reaching flush_size should write all buffered tasks"
+        assert len(self.storage._buffer) == 0
+
+    def test_flush_error(self):
+        tasks = [add_task(self.storage) for _ in range(2)]
+        insert_stmt = self.storage._insert_stmt
+        self.storage._insert_stmt = lambda or_ignore=False: "INSERT INTO nope VALUES (?)"
+        with pytest.raises(sqlite3.OperationalError):
+            self.storage.flush()
+        assert list(self.storage._buffer) == [t.guid for t in tasks], "tasks should be kept when the write fails"
+
+        self.storage._insert_stmt = insert_stmt
+        tasks.append(add_task(self.storage))
+        self.storage.flush()
+        assert [t.guid for t in self.storage.list()] == [t.guid for t in tasks]
+
+    def test_durability_config(self):
+        for durability, write_behind in [('sync', False), ('delayed', True)]:
+            with mock.patch.object(config, 'task_durability', durability):
+                task_list = TaskList(self.service)
+                try:
+                    assert task_list._done.write_behind is write_behind
+                finally:
+                    task_list._done.close()
+
+    def test_close_flush(self):
+        task = add_task(self.storage)
+        self.storage.close()
+
+        task_list = TaskList(self.service)
+        try:
+            assert task_list._done.get(task.guid).guid == task.guid, "close should flush the buffered tasks"
+        finally:
+            task_list._done.close()
+        self.storage = TaskStorageSqlite(task_list)
+
+
+class TestTaskRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = TaskStorageSqlite(TaskList(_FakeService()))
+
+    def tearDown(self):
+        self.storage.close()
+
+    def test_lazy_decode(self):
+        service = _FakeService()
+        task = Task(service.install, {'foo': 'bar'})
+        task.state = TASK_STATE_ERROR
+        task._result = {'status': 'failed'}
+        task._duration = 1.5
+        self.storage.add(task)
+
+        record = self.storage.get(task.guid)
+        assert isinstance(record, TaskRecord)
+        assert (record.guid, record.action_name, record.state, record.created, record.duration) == \
+            (task.guid, 'install', TASK_STATE_ERROR, task.created, 1.5)
+        assert record._fields is None, "payload should not be decoded to read the columns"
+
+        assert record.result == {'status': 'failed'}
+        assert record._args == {'foo': 'bar'}
+        assert record.eco is None
+        assert record.wait() is record, "wait should not block on an executed task"
+
+        records = self.storage.list(state=TASK_STATE_ERROR)
+        assert [r.guid for r in records] == [task.guid]
+        assert records[0]._fields is None
+
+
+class TestTaskStorageSqliteUpgrade(unittest.TestCase):
+
+    def test_upgrade_schema(self):
+        service = _FakeService()
+        storage = TaskStorageSqlite(TaskList(service))
+        task = add_task(storage)
+        storage.close()
+
+        # recreate the table as it was before the state and action_name columns were added
+        conn = sqlite3.connect(os.path.join(service._path, 'tasks.db'))
+        with conn:
+            conn.execute("CREATE TABLE old_tasks (guid TEXT PRIMARY KEY UNIQUE, created INTEGER, payload BLOB)")
+            conn.execute("INSERT INTO old_tasks SELECT guid, created, payload FROM tasks")
+            conn.execute("DROP TABLE tasks")
+            conn.execute("ALTER TABLE old_tasks RENAME TO tasks")
+        conn.close()
+
+        storage = TaskStorageSqlite(TaskList(service))
+        try:
+            assert [t.guid for t in storage.list(state='new', action_name='install')] == [task.guid]
+        finally:
+            storage.close()
+
+
+class TestTaskStorageShared(unittest.TestCase):
+
+    def setUp(self):
+        self.db_path = shared.db_path(j.sal.fs.getTmpDirPath())
+
+    def tearDown(self):
+        shared.get_db(self.db_path).close()
+
+    def _storage(self, service):
+        return TaskStorageShared(TaskList(service), self.db_path)
+
+    def test_scope(self):
+        s1 = self._storage(_FakeService())
+        s2 = self._storage(_FakeService())
+        t1 = add_task(s1)
+        t2 = add_task(s2)
+        add_task(s2)
+
+        assert s1.conn is s2.conn, "all services should share the same database"
+        assert s1.count() == 1
+        assert s2.count() == 2
+        assert [t.guid for t in s1.list()] == [t1.guid]
+        with pytest.raises(TaskNotFoundError):
+            s1.get(t2.guid)
+
+        s2.drop()
+        assert s2.count() == 0
+        assert s1.count() == 1, "drop should only delete the tasks of the service"
+
+    def test_migrate(self):
+        service = _FakeService()
+        old = TaskStorageSqlite(TaskList(service))
+        tasks = [add_task(old) for _ in range(3)]
+        old.close()
+        old_path = os.path.join(service._path, 'tasks.db')
+        assert os.path.exists(old_path)
+
+        storage = self._storage(service)
+        assert storage.count() == 3, "tasks of the service database should be imported"
+        assert storage.get(tasks[0].guid).guid == tasks[0].guid
+        assert not os.path.exists(old_path), "service database should be removed after migration"
+        assert len(storage.list(action_name='install')) == 3
+
+    def test_trim(self):
+        s1 = self._storage(_FakeService())
+        s2 = self._storage(_FakeService())
+        for _ in range(5):
+            add_task(s1)
+        add_task(s2)
+        before = int(time.time()) + 1
+
+        assert s1.trim(before, keep=3) == 2
+        assert s1.count() == 3, "the 3 most recent tasks should be kept"
+        assert s2.count() == 1, "trim should only delete the tasks of the service"
+        assert shared.get_db(self.db_path).reclaim() >= 0
+
+    def test_trim_all(self):
+        s1 = self._storage(_FakeService())
+        s2 = self._storage(_FakeService())
+        s3 = self._storage(_FakeService())
+        tasks1 = [add_task(s1) for _ in range(5)]
+        tasks2 = [add_task(s2) for _ in range(2)]
+        add_task(s3)
+        before = int(time.time()) + 1
+
+        db = shared.get_db(self.db_path)
+        assert db.trim(before, keep=2, batch_size=1, pause=0) == 3
+        assert [t.guid for t in s1.list()] == [t.guid for t in tasks1[3:]]
+        assert [t.guid for t in s2.list()] == [t.guid for t in tasks2]
+        assert s3.count() == 1
+        assert db.trim(before, keep=2) == 0
+        assert db.trim(before) == 5
+
+
+class TestTaskStorageSqliteTrim(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = TaskStorageSqlite(TaskList(_FakeService()))
+
+    def tearDown(self):
+        self.storage.close()
+
+    def _add_tasks(self, nr, created):
+        service = _FakeService()
+        tasks = []
+        for _ in range(nr):
+            task = Task(service.install, None)
+            task._created = created
+            task._result = 'x' * 1024
+            self.storage.add(task)
+            tasks.append(task)
+        return tasks
+
+    def test_trim_age(self):
+        now = int(time.time())
+        self._add_tasks(10, now - 3600)
+        recent = self._add_tasks(5, now)
+
+        assert self.storage.trim(now - 60, batch_size=3, pause=0) == 10
+        assert [t.guid for t in self.storage.list()] == [t.guid for t in recent]
+
+    def test_trim_keep(self):
+        now = int(time.time())
+        tasks = self._add_tasks(10, now - 3600)
+
+        assert self.storage.trim(now, keep=4) == 6
+        assert [t.guid for t in self.storage.list()] == [t.guid for t in tasks[6:]]
+        assert self.storage.trim(now, keep=4) == 0
+        assert self.storage.trim(now, keep=20) == 0
+
+    def test_reclaim(self):
+        now = int(time.time())
+        self._add_tasks(200, now - 3600)
+        self.storage.trim(now)
+        assert self.storage.reclaim() > 0, "pages freed by the deleted tasks should be reclaimed"
+
+    def test_reclaim_convert(self):
+        # database created before incremental vacuum was enabled
+        self.storage.conn.execute("PRAGMA auto_vacuum=NONE")
+        self.storage.conn.execute("VACUUM")
+        assert self.storage.reclaim() == 0
+        assert self.storage.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0, \
+            "reclaim should never run a full vacuum"
+
+        converter = sqlite._VacuumConverter(interval=0)
+        converter.schedule(self.storage)
+        gevent.sleep(0.1)
+        assert self.storage.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
 def add_task(storage):
     service = _FakeService()
     task = Task(service.install, None)
@@ -5,8 +5,8 @@ import unittest
 
 from zerorobot import service_collection as scol
 from zerorobot import config
-from zerorobot.task import (PRIORITY_NORMAL, PRIORITY_SYSTEM, Task, TaskList,
-                            TaskNotFoundError)
+from zerorobot.task import (PRIORITY_NORMAL, PRIORITY_SYSTEM, TASK_STATE_OK,
+                            Task, TaskList, TaskNotFoundError)
 from zerorobot.template_collection import _load_template
 
 
@@ -101,6 +101,26 @@ class TestTaskList(unittest.TestCase):
         with self.assertRaises(TaskNotFoundError):
             self.tl.get_task_by_guid('1111')
 
+    def test_get_by_guid_done(self):
+        tasks = self._get_tasks(3)
+        for t in tasks:
+            self.tl.put(t)
+
+        t1 = self.tl.get()
+        self.assertEqual(self.tl.get_task_by_guid(t1.guid), t1, "current task should be found")
+        self.tl.done(t1)
+        self.assertNotIn(t1.guid, self.tl._waiting, "executed task should be removed from the waiting index")
+        self.assertEqual(self.tl.get_task_by_guid(t1.guid), t1, "recently executed task should be served from memory")
+
+        # evict the task from memory, it should be loaded from the storage
+        self.tl._recent.clear()
+        self.assertEqual(self.tl.get_task_by_guid(t1.guid).guid, t1.guid)
+
+        self.tl.clear()
+        self.assertEqual(self.tl._waiting, {}, "clear should empty the waiting index")
+        with self.assertRaises(TaskNotFoundError):
+            self.tl.get_task_by_guid(tasks[1].guid)
+
     def test_list(self):
         tasks = self._get_tasks(2)
         for t in tasks:
@@ -117,6 +137,34 @@ class TestTaskList(unittest.TestCase):
         all_tasks = [t.guid for t in self.tl.list_tasks(all=True)]
         self.assertEqual(all_tasks, [t.guid for t in reversed(tasks)], "listing of all tasks should return all enqueued tasks and all done tasks")
 
+    def test_list_paginate(self):
+        tasks = self._get_tasks(5)
+        for t in tasks:
+            self.tl.put(t)
+        for _ in range(2):
+            task = self.tl.get()
+            task.state = TASK_STATE_OK
+            self.tl.done(task)
+        # 3 tasks waiting, followed by 2 done tasks
+        expected = [t.guid for t in tasks[2:] + tasks[:2]]
+
+        guids = []
+        cursor = None
+        while True:
+            page = self.tl.list_tasks(all=True, limit=2, cursor=cursor)
+            if not page:
+                break
+            guids.extend(t.guid for t in page)
+            cursor = page[-1].guid
+        self.assertEqual(guids, expected, "pages should cover the waiting and the done tasks")
+
+        self.assertEqual(self.tl.list_tasks(cursor=tasks[2].guid), tasks[3:])
+        with self.assertRaises(TaskNotFoundError):
+            self.tl.list_tasks(cursor=tasks[0].guid)
+
+        ok = [t.guid for t in self.tl.list_tasks(all=True, state=TASK_STATE_OK)]
+        self.assertEqual(ok, [t.guid for t in tasks[:2]], "only the done tasks should be in state ok")
+
     def test_priority(self):
 
         s1 = FakeService("s1")
@@ -136,3 +184,71 @@ class TestTaskList(unittest.TestCase):
             tasks.append(self.tl.get())
 
         self.assertEqual(tasks, [t3, t1, t2], "task with higher priority should be extracted first")
+
+    def test_waiting_task(self):
+        s = FakeService('s1')
+        foo1 = Task(s.foo, {})
+        foo2 = Task(s.foo, {})
+        bar = Task(s.bar, {})
+        for t in [foo1, foo2, bar]:
+            self.tl.put(t)
+
+        self.assertEqual(self.tl.waiting_task('foo'), foo1)
+        self.assertEqual(self.tl.waiting_task('bar'), bar)
+        self.assertIsNone(self.tl.waiting_task('nope'))
+
+        t = self.tl.get()
+        self.assertEqual(t, foo1)
+        self.assertEqual(self.tl.waiting_task('foo'), foo2)
+        foo1.state = 'running'
+        self.assertEqual(self.tl.waiting_task('foo'), foo1, "running task should be returned first")
+
+        self.tl.clear()
+        self.assertIsNone(self.tl.waiting_task('bar'))
+
+    def test_find_duplicate(self):
+        s = FakeService('s1')
+        foo1 = Task(s.foo, {'a': 1, 'b': [1, 2]})
+        foo2 = Task(s.foo, {'a': 2})
+        self.tl.put(foo1)
+        self.tl.put(foo2)
+        self.assertEqual(self.tl._call_keys, {}, "tasks should only be serialized when coalescing")
+
+        self.assertEqual(self.tl.find_duplicate('foo', {'b': [1, 2], 'a': 1}), foo1,
+                         "order of the arguments should not matter")
+        self.assertEqual(self.tl.find_duplicate('foo', {'a': 2}), foo2)
+        self.assertIsNone(self.tl.find_duplicate('foo', {'a': 3}))
+        self.assertIsNone(self.tl.find_duplicate('bar', {'a': 1}))
+        self.assertIsNone(self.tl.find_duplicate('foo', {'a': 1, 'b': [1, 2]}, priority=PRIORITY_SYSTEM),
+                          "task with a lower priority should not be returned")
+        self.assertIsNone(self.tl.find_duplicate('foo', {'a': object()}))
+
+        self.assertEqual(self.tl.get(), foo1)
+        self.assertIsNone(self.tl.find_duplicate('foo', {'a': 1, 'b': [1, 2]}), "running task should not be returned")
+        self.tl.clear()
+        self.assertIsNone(self.tl.find_duplicate('foo', {'a': 2}))
+        self.assertEqual(self.tl._waiting_calls, {})
+        self.assertEqual(self.tl._call_keys, {})
+
+        # tasks added after the action has been coalesced once are indexed when they are added
+        foo3 = Task(s.foo, {'a': 3})
+        self.tl.put(foo3)
+        self.assertEqual(list(self.tl._waiting_calls.values()), [{foo3.guid: foo3}])
+        self.assertEqual(self.tl.find_duplicate('foo', {'a': 3}), foo3)
+        def baz(a):
+            pass
+        task = Task(baz, {'a': 3})
+        self.tl.put(task)
+        self.assertNotIn(task.guid, self.tl._call_keys, "actions never coalesced should not be indexed")
+
+    def test_schedule_action_coalesce(self):
+        service = self.tl.service
+        t1 = service.schedule_action('foo', args={'bar': 1})
+        t2 = service.schedule_action('foo', args={'bar': 1}, coalesce=True)
+        t3 = service.schedule_action('foo', args={'bar': 1})
+        t4 = service.schedule_action('foo', args={'bar': 2}, coalesce=True)
+
+        self.assertEqual(t1, t2, "identical waiting task should be returned")
+        self.assertNotEqual(t1, t3, "tasks should only be coalesced when asked")
+        self.assertNotEqual(t1, t4, "tasks with different arguments should not be coalesced")
+        self.assertEqual(len(service.task_list.list_tasks()), 3)
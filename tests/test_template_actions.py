@@ -0,0 +1,81 @@
+import unittest
+
+from zerorobot.template import actions
+from zerorobot.template.base import TemplateBase
+from zerorobot.template.decorator import concurrent, timeout
+from zerorobot.template.exceptions import BadActionArgumentError
+
+
+class Template(TemplateBase):
+
+    version = '0.0.1'
+
+    def install(self, name, size=10):
+        pass
+
+    @timeout(10)
+    def start(self, name):
+        pass
+
+    def configure(self, name, **kwargs):
+        pass
+
+    @staticmethod
+    def ping(host):
+        pass
+
+    @timeout(10)
+    @concurrent
+    def status(self):
+        pass
+
+    @concurrent
+    def update_data(self, data):
+        pass
+
+    @property
+    def info(self):
+        raise RuntimeError("properties should not be evaluated")
+
+    def _private(self, value):
+        pass
+
+
+class TestTemplateActions(unittest.TestCase):
+
+    def test_get_actions(self):
+        result = actions.get_actions(Template)
+        self.assertIs(result, actions.get_actions(Template), "actions should be inspected only once")
+
+        self.assertEqual(result['install'].mandatory, ('name',))
+        self.assertEqual(result['install'].params, {'name', 'size'})
+        self.assertFalse(result['install'].kwargs)
+        self.assertEqual(result['start'].mandatory, ('name',), "signature of decorated actions should be the one of the action")
+        self.assertTrue(result['configure'].kwargs)
+        self.assertEqual(result['configure'].mandatory, ('name',))
+        self.assertEqual(result['ping'].mandatory, ('host',))
+        self.assertTrue(result['status'].concurrent, "marker of @concurrent should be kept by the other decorators")
+        self.assertFalse(result['install'].concurrent)
+        self.assertFalse(result['update_data'].concurrent, "update_data should never be concurrent")
+        self.assertIn('_private', result)
+        self.assertNotIn('info', result)
+
+        self.assertNotIn('install', actions.get_actions(TemplateBase), "actions of a subclass should not leak into its parent")
+
+    def test_list_actions(self):
+        names = actions.list_actions(Template)
+        for name in ['install', 'start', 'configure', 'ping', 'info', 'delete', 'update_data']:
+            self.assertIn(name, names)
+        for name in ['_private', 'save', 'schedule_action', 'validate']:
+            self.assertNotIn(name, names)
+
+    def test_check_args(self):
+        result = actions.get_actions(Template)
+        actions.check_args(result['install'], {'name': 'foo'})
+        actions.check_args(result['configure'], {'name': 'foo', 'other': 'bar'})
+
+        with self.assertRaises(BadActionArgumentError):
+            actions.check_args(result['install'], None)
+        with self.assertRaises(BadActionArgumentError) as err:
+            actions.check_args(result['install'], {'name': 'foo', 'wrong_arg': 'bar'})
+        self.assertEqual(err.exception.args[0], 'arguments "wrong_arg" are not present in the signature of the action')
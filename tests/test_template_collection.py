@@ -1,4 +1,6 @@
+import copy
 import os
+import pickle
 import unittest
 
 from zerorobot import template_collection as tcol
@@ -10,7 +12,7 @@ from zerorobot.template_uid import TemplateUID
 class TestTemplateCollection(unittest.TestCase):
 
     def setUp(self):
-        tcol._templates = {}
+        tcol.clear()
 
     def test_load_template(self):
         # valid template
@@ -150,6 +152,24 @@ class TestTemplateCollection(unittest.TestCase):
         with self.assertRaises(ValueError, msg="should not compare 2 different template"):
             uid1 > uid5
 
+    def test_template_uid_immutable(self):
+        uid = TemplateUID.parse('github.com/account/repository/name/1.0.0')
+        self.assertIs(uid, TemplateUID.parse('github.com/account/repository/name/1.0.0'),
+                      "parsing the same uid should return the same object")
+        with self.assertRaises(AttributeError):
+            uid.version = '1.0.1'
+        with self.assertRaises(AttributeError):
+            uid.other = 'value'
+
+        other = TemplateUID('github.com', 'account', 'repository', 'name', '1.0.0')
+        self.assertIsNot(uid, other)
+        self.assertEqual(uid, other)
+        self.assertEqual(hash(uid), hash(other))
+        self.assertEqual(uid, 'github.com/account/repository/name/1.0.0')
+        self.assertEqual(str(uid), 'github.com/account/repository/name/1.0.0')
+        self.assertEqual(pickle.loads(pickle.dumps(uid)), uid)
+        self.assertEqual(copy.deepcopy(uid), uid)
+
     def test_parse_git_url(self):
         tb = [
             {
@@ -218,3 +238,28 @@ class TestTemplateCollection(unittest.TestCase):
         found = tcol.find(host='github.com', account='threefoldtech', repo='0-robot', name='node', version='0.0.1')
         assert len(found) == 1
         assert str(found[0].template_uid) == 'github.com/threefoldtech/0-robot/node/0.0.1'
+
+    def test_find_indexes(self):
+        fixtures = os.path.join(os.path.dirname(__file__), 'fixtures')
+        node = tcol._load_template("https://github.com/threefoldtech/0-robot", os.path.join(fixtures, 'templates/node'))
+        node2 = tcol._load_template("https://github.com/threefoldtech/0-robot", os.path.join(fixtures, 'templates_2/node'))
+        vm = tcol._load_template("https://github.com/threefoldtech/0-templates", os.path.join(fixtures, 'templates/vm'))
+
+        self.assertEqual(tcol.find(name='node'), [node, node2])
+        self.assertEqual(tcol.find(host='github.com', account='threefoldtech', repo='0-robot', name='node'), [node, node2])
+        self.assertEqual(tcol.find(host='github.com', account='threefoldtech', repo='0-robot', name='vm'), [])
+        self.assertEqual(tcol.find(name='node', version='0.1.0'), [node2])
+        self.assertEqual(tcol.find(version='0.0.1'), [node, vm])
+        self.assertEqual(tcol.find(repo='0-templates'), [vm])
+        self.assertEqual(tcol.get('vm'), vm)
+
+        # reloading a template replaces it in the indexes
+        vm_reloaded = tcol._load_template("https://github.com/threefoldtech/0-templates", os.path.join(fixtures, 'templates/vm'))
+        self.assertIsNot(vm_reloaded, vm)
+        self.assertEqual(tcol.find(name='vm'), [vm_reloaded])
+
+        # indexes follow when the collection is cleared
+        tcol.clear()
+        self.assertEqual(tcol.find(name='node'), [])
+        with self.assertRaises(TemplateNotFoundError):
+            tcol.get('vm')
@@ -0,0 +1,69 @@
+import time
+import unittest
+
+from jose import jwt
+from jose.exceptions import JWTError
+from zerorobot.prometheus.robot import jwt_cache
+from zerorobot.server.auth import token_cache
+
+
+def _count(result):
+    return jwt_cache.labels(result=result)._value.get()
+
+
+class TestTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.key = 'secret-key'
+
+    def test_decode_cached(self):
+        token = jwt.encode({'service_guid': '1234'}, self.key, algorithm='HS256')
+        hits, misses = _count('hit'), _count('miss')
+
+        self.assertEqual(token_cache.decode(token, self.key, algorithms='HS256'), {'service_guid': '1234'})
+        self.assertEqual(token_cache.decode(token, self.key, algorithms='HS256'), {'service_guid': '1234'})
+        self.assertEqual(_count('miss') - misses, 1, "token should be verified only once")
+        self.assertEqual(_count('hit') - hits, 1)
+
+        claims = token_cache.decode(token, self.key, algorithms='HS256')
+        claims['service_guid'] = 'changed'
+        self.assertEqual(token_cache.decode(token, self.key, algorithms='HS256'), {'service_guid': '1234'},
+                         "modifying the returned claims should not modify the cache")
+
+        with self.assertRaises(JWTError, msg="token should not be valid with another key"):
+            token_cache.decode(token, 'other-key', algorithms='HS256')
+
+    def test_invalid_cached(self):
+        token = jwt.encode({'service_guid': '1234'}, 'other-key', algorithm='HS256')
+        misses = _count('miss')
+        for _ in range(3):
+            with self.assertRaises(JWTError):
+                token_cache.decode(token, self.key, algorithms='HS256')
+        self.assertEqual(_count('miss') - misses, 1, "invalid token should be verified only once")
+
+    def test_expired(self):
+        token = jwt.encode({'service_guid': '1234', 'exp': int(time.time()) + 1}, self.key, algorithm='HS256')
+        self.assertEqual(token_cache.decode(token, self.key, algorithms='HS256')['service_guid'], '1234')
+        # jose compares exp to the current time truncated to the second
+        time.sleep(2.1)
+        with self.assertRaises(JWTError, msg="expired token should not be returned from the cache"):
+            token_cache.decode(token, self.key, algorithms='HS256')
+
+    def test_unhashable_options(self):
+        token = jwt.encode({'service_guid': '1234', 'aud': 'robot'}, self.key, algorithm='HS256')
+        misses = _count('miss')
+        for _ in range(2):
+            claims = token_cache.decode(token, self.key, algorithms=['HS256'], audience='robot',
+                                        options={'verify_exp': True})
+            self.assertEqual(claims['service_guid'], '1234')
+        self.assertEqual(_count('miss') - misses, 1, "options passed as list or dict should be cached too")
+
+        # options that can't be serialized are not cached
+        claims = token_cache.decode(token, self.key, algorithms=['HS256'], audience='robot', options={'x': object()})
+        self.assertEqual(claims['service_guid'], '1234')
+
+    def test_size(self):
+        for i in range(token_cache.TOKEN_CACHE_SIZE + 10):
+            token_cache.decode(jwt.encode({'i': i}, self.key, algorithm='HS256'), self.key, algorithms='HS256')
+        self.assertEqual(len(token_cache._tokens), token_cache.TOKEN_CACHE_SIZE)
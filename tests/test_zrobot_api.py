@@ -66,7 +66,7 @@ class TestZRobotAPI(unittest.TestCase):
         # make sure we don't have any service loaded
         scol.drop_all()
         # make sure we don't have any template loaded
-        tcol._templates = {}
+        tcol.clear()
 
     def tearDown(self):
         for p in self.ps:
@@ -80,7 +80,7 @@ class TestZRobotAPI(unittest.TestCase):
         # make sure we don't have any service loaded
         scol.drop_all()
         # make sure we don't have any template loaded
-        tcol._templates = {}
+        tcol.clear()
 
         # restore zrobot config
         for instance, cl in self.previous_zrobot_cfgs.items():
@@ -94,7 +94,7 @@ class TestZRobotAPI(unittest.TestCase):
 
     def test_service_create_uid(self):
         # make sure we don't have any template loaded in the current process
-        tcol._templates = {}
+        tcol.clear()
         with self.assertRaises(TemplateNotFoundError, msg='trying to create a service from non handled template should raise '):
             self.api.services.create("github.com/threefoldtech/0-robot/node/0.0.1", 'node1')
 
@@ -124,7 +124,7 @@ class TestZRobotAPI(unittest.TestCase):
 
     def test_service_create_name(self):
         # make sure we don't have any template loaded in the current process
-        tcol._templates = {}
+        tcol.clear()
         with self.assertRaises(TemplateNotFoundError, msg='trying to create a service from non handled template should raise '):
             self.api.services.create("node", 'node1')
 
@@ -154,7 +154,7 @@ class TestZRobotAPI(unittest.TestCase):
 
     def test_service_create_validate_fail(self):
         # make sure we don't have any template loaded in the current process
-        tcol._templates = {}
+        tcol.clear()
         with self.assertRaises(TemplateNotFoundError, msg='trying to create a service from non handled template should raise '):
             self.api.services.create("validate", 'service1')
 
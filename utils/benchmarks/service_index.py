@@ -0,0 +1,119 @@
+"""
+Benchmark of the index used to search the services of the robot
+
+Add a set of services to the index, then run the searches done by the robot
+(by name, by template uid, by the detail of the template uid like blueprints do)
+with the in memory sqlite database used previously and with the current ServiceIndex.
+
+usage: python3 utils/benchmarks/service_index.py [--services 50000] [--searches 10000]
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+
+from zerorobot.service_index import ServiceIndex
+from zerorobot.template_uid import TemplateUID
+
+NR_TEMPLATES = 20
+
+
+class SqliteIndex:
+    """
+    previous implementation: services stored in a table of an in memory sqlite database
+    """
+
+    def __init__(self):
+        self._cursor = sqlite3.connect(":memory:").cursor()
+        self._cursor.execute("""CREATE TABLE services (
+            guid TEXT PRIMARY KEY UNIQUE, name TEXT, template_uid TEXT, template_host TEXT, template_account TEXT,
+            template_repo TEXT, template_name TEXT, template_version TEXT)""")
+        self._cursor.execute("CREATE INDEX service_name ON services (name)")
+        self._cursor.execute("CREATE INDEX service_template ON services (template_uid)")
+        self._cursor.execute("CREATE INDEX service_template_detail ON services "
+                             "(template_host, template_account, template_repo, template_name, template_version)")
+
+    def add_service(self, service):
+        uid = service.template_uid
+        self._cursor.execute("INSERT INTO services VALUES (?,?,?,?,?,?,?,?)",
+                             (service.guid, service.name, str(uid), uid.host, uid.account, uid.repo, uid.name, uid.version))
+        self._cursor.connection.commit()
+
+    def delete_service(self, service):
+        self._cursor.execute("DELETE FROM services WHERE guid=?", (service.guid,))
+        self._cursor.connection.commit()
+
+    def find(self, **kwargs):
+        stmt = "SELECT guid FROM services"
+        if kwargs:
+            stmt += " WHERE " + ' AND '.join('%s=?' % col for col in kwargs)
+        self._cursor.execute(stmt, tuple(kwargs.values()))
+        return [x[0] for x in self._cursor.fetchall()]
+
+
+class FakeService:
+
+    def __init__(self, guid, name, template_uid):
+        self.guid = guid
+        self.name = name
+        self.template_uid = template_uid
+
+
+def searches(services, nr_searches):
+    rnd = random.Random(0)
+    result = []
+    for _ in range(nr_searches):
+        service = rnd.choice(services)
+        uid = service.template_uid
+        result.append(rnd.choice([
+            {'name': service.name},
+            {'template_uid': str(uid)},
+            {'name': service.name, 'template_host': uid.host, 'template_account': uid.account,
+             'template_repo': uid.repo, 'template_name': uid.name, 'template_version': uid.version},
+        ]))
+    return result
+
+
+def bench(index, services, queries):
+    start = time.perf_counter()
+    for service in services:
+        index.add_service(service)
+    add = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [index.find(**kwargs) for kwargs in queries]
+    find = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for service in services:
+        index.delete_service(service)
+    delete = time.perf_counter() - start
+    return add, find, delete, results
+
+
+def main(nr_services, nr_searches):
+    uids = [TemplateUID.parse('github.com/threefoldtech/0-templates/template%d/0.0.1' % i) for i in range(NR_TEMPLATES)]
+    services = [FakeService('guid%d' % i, 'service%d' % (i % (nr_services // 2 or 1)), uids[i % NR_TEMPLATES])
+                for i in range(nr_services)]
+    queries = searches(services, nr_searches)
+
+    print("services: %d, searches: %d" % (nr_services, nr_searches))
+    expected = None
+    for name, index in [('sqlite', SqliteIndex()), ('dict', ServiceIndex())]:
+        add, find, delete, results = bench(index, services, queries)
+        # sqlite doesn't guarantee any order, only compare the guids found
+        results = [sorted(r) for r in results]
+        if expected is None:
+            expected = results
+        assert results == expected
+        print("%-6s add: %6.3fs (%6.2fus/service)  find: %6.3fs (%7.2fus/search)  delete: %6.3fs" % (
+            name, add, add / nr_services * 1e6, find, find / nr_searches * 1e6, delete))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--services', type=int, default=50000, help='number of services in the index')
+    parser.add_argument('--searches', type=int, default=10000, help='number of searches')
+    args = parser.parse_args()
+    main(args.services, args.searches)
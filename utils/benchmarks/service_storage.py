@@ -0,0 +1,76 @@
+"""
+Benchmark of the filesystem service storage
+
+Save and load a set of services with each of the formats supported by FileSystemServiceStorage.
+
+usage: python3 utils/benchmarks/service_storage.py [--services 2000] [--tasks 20]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from zerorobot.storage.filesystem import FORMATS, FileSystemServiceStorage
+
+
+def serialized_service(i, nr_tasks):
+    return {
+        'service': {
+            'template': 'github.com/threefoldtech/0-robot/benchmark/0.0.1',
+            'version': '0.0.1',
+            'name': 'service%d' % i,
+            'guid': 'guid%d' % i,
+            'public': False,
+        },
+        'states': {'actions': {'install': 'ok', 'start': 'ok'}, 'status': {'running': 'ok'}},
+        'data': {'hostname': 'node%d' % i, 'ports': list(range(10)), 'config': {'key%d' % k: 'value' * 10 for k in range(20)}},
+        'tasks': [{
+            'guid': 'task%d' % t,
+            'action_name': 'monitor',
+            'args': {'timeout': 10},
+            'state': 'new',
+            'eco': None,
+            'created': 1500000000 + t,
+        } for t in range(nr_tasks)],
+    }
+
+
+def bench(format, nr_services, nr_tasks):
+    root = tempfile.mkdtemp(prefix='zrobot_bench')
+    try:
+        store = FileSystemServiceStorage(root, format=format)
+        services = [serialized_service(i, nr_tasks) for i in range(nr_services)]
+
+        start = time.perf_counter()
+        for details in services:
+            # same layout as FileSystemServiceStorage._service_path
+            path = os.path.join(root, 'benchmark', details['service']['name'], details['service']['guid'])
+            os.makedirs(path, exist_ok=True)
+            store._write(path, details)
+        save = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = list(store.list())
+        load = time.perf_counter() - start
+        assert len(loaded) == nr_services
+        return save, load
+    finally:
+        shutil.rmtree(root)
+
+
+def main(nr_services, nr_tasks):
+    print("services: %d, tasks per service: %d" % (nr_services, nr_tasks))
+    for format in FORMATS:
+        save, load = bench(format, nr_services, nr_tasks)
+        print("%-8s save: %6.2fs (%5.2fms/service)  load: %6.2fs (%5.2fms/service)" % (
+            format, save, save / nr_services * 1000, load, load / nr_services * 1000))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--services', type=int, default=2000, help='number of services')
+    parser.add_argument('--tasks', type=int, default=20, help='number of waiting tasks per service')
+    args = parser.parse_args()
+    main(args.services, args.tasks)
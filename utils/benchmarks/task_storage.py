@@ -0,0 +1,70 @@
+"""
+Benchmark of the sqlite task storage
+
+Measure how many executed tasks per second can be added to the task storage
+of a service, with synchronous commits and in write-behind mode.
+
+usage: python3 utils/benchmarks/task_storage.py [--tasks 5000]
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+from zerorobot.task import TASK_STATE_OK, Task
+from zerorobot.task.storage.sqlite import TaskStorageSqlite
+
+
+class FakeService:
+
+    def __init__(self, path):
+        self.guid = 'benchmark'
+        self._path = path
+
+    def monitor(self):
+        pass
+
+
+class FakeTaskList:
+
+    def __init__(self, service):
+        self.service = service
+
+
+def bench(nr_tasks, write_behind):
+    path = tempfile.mkdtemp(prefix='zrobot_bench')
+    try:
+        service = FakeService(path)
+        storage = TaskStorageSqlite(FakeTaskList(service), write_behind=write_behind)
+        tasks = []
+        for _ in range(nr_tasks):
+            task = Task(service.monitor, None)
+            task.state = TASK_STATE_OK
+            task._result = {'status': 'ok'}
+            task._duration = 0.1
+            tasks.append(task)
+
+        start = time.perf_counter()
+        for task in tasks:
+            storage.add(task)
+        storage.close()
+        elapsed = time.perf_counter() - start
+        return nr_tasks / elapsed
+    finally:
+        shutil.rmtree(path)
+
+
+def main(nr_tasks):
+    sync = bench(nr_tasks, write_behind=False)
+    batched = bench(nr_tasks, write_behind=True)
+    print("tasks:          %d" % nr_tasks)
+    print("synchronous:    %.0f tasks/s" % sync)
+    print("write-behind:   %.0f tasks/s (x%.1f)" % (batched, batched / sync))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=5000, help='number of tasks to store')
+    args = parser.parse_args()
+    main(args.tasks)
@@ -0,0 +1,73 @@
+"""
+Micro-benchmark of Task.wait
+
+Spawn one waiting greenlet per task, let them wait idle for a while, then complete all the tasks.
+Report the CPU burnt by the waiters while idle and the latency between the state transition
+of a task and the moment its waiter wakes up.
+
+usage: python3 utils/benchmarks/task_wait.py [--tasks 10000] [--idle 5] [--polling]
+
+--polling uses the previous implementation of Task.wait (sleep loop on the task state) for comparison
+"""
+
+import argparse
+import time
+
+import gevent
+from zerorobot.task import TASK_STATE_NEW, TASK_STATE_OK, TASK_STATE_RUNNING, Task
+
+
+def noop():
+    pass
+
+
+def polling_wait(task):
+    while task.state == TASK_STATE_NEW:
+        gevent.sleep(task._sleep_period * 2)
+    while task.state in (TASK_STATE_NEW, TASK_STATE_RUNNING):
+        gevent.sleep(task._sleep_period)
+    return task
+
+
+def main(nr_tasks, idle, polling):
+    tasks = [Task(noop, None) for _ in range(nr_tasks)]
+    woken = {}
+
+    def waiter(task):
+        if polling:
+            polling_wait(task)
+        else:
+            task.wait()
+        woken[task.guid] = time.perf_counter()
+
+    gls = [gevent.spawn(waiter, t) for t in tasks]
+    gevent.sleep(0)  # let all the waiters block
+
+    cpu_start = time.process_time()
+    for t in tasks:
+        t.state = TASK_STATE_RUNNING
+    gevent.sleep(idle)
+    cpu_idle = time.process_time() - cpu_start
+
+    completed = {}
+    for t in tasks:
+        completed[t.guid] = time.perf_counter()
+        t.state = TASK_STATE_OK
+    gevent.joinall(gls)
+
+    latencies = sorted(woken[guid] - completed[guid] for guid in completed)
+    print("mode:              %s" % ("polling" if polling else "event"))
+    print("waiting tasks:     %d" % nr_tasks)
+    print("cpu while idle:    %.3fs over %ds" % (cpu_idle, idle))
+    print("wake latency avg:  %.2fms" % (sum(latencies) / len(latencies) * 1000))
+    print("wake latency p99:  %.2fms" % (latencies[int(len(latencies) * 0.99) - 1] * 1000))
+    print("wake latency max:  %.2fms" % (latencies[-1] * 1000))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=10000, help='number of concurrently waiting tasks')
+    parser.add_argument('--idle', type=int, default=5, help='number of seconds the waiters stay blocked')
+    parser.add_argument('--polling', action='store_true', help='use the previous polling implementation of wait')
+    args = parser.parse_args()
+    main(args.tasks, args.idle, args.polling)
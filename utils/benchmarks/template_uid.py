@@ -0,0 +1,113 @@
+"""
+Benchmark of the template uids on the load path of the services
+
+For each service, do what the robot does with the template uid when it loads the services:
+parse the uid stored with the service, look up its template, check the version of the service
+against the one of the template and index the service by template uid.
+This is done with the previous TemplateUID, which parsed every string and rebuilt its tuple
+on every comparison, and with the current one.
+
+usage: python3 utils/benchmarks/template_uid.py [--services 50000] [--templates 20]
+"""
+
+import argparse
+import time
+from urllib.parse import urlparse
+
+from zerorobot import template_uid
+
+
+class PreviousTemplateUID:
+    """
+    previous implementation of TemplateUID
+    """
+
+    def __init__(self, host, account, repo, name, version):
+        self.host = host
+        self.account = account
+        self.repo = repo
+        self.name = name
+        self.version = version
+
+    @classmethod
+    def parse(cls, uid):
+        host, account, repo, name, version = None, None, None, None, None
+        parsed = urlparse(uid)
+        if parsed.netloc:
+            host = parsed.netloc
+        ss = uid.rstrip('/').lstrip('/').split('/')
+        if len(ss) == 5:
+            host, account, repo, name, version = ss
+        elif len(ss) == 4:
+            host, account, repo, name = ss
+        else:
+            raise ValueError("format of the template uid (%s) not valid" % uid)
+        if not template_uid._name_regex.match(name):
+            raise ValueError("format of the template uid (%s) not valid" % uid)
+        if version and not template_uid._version_regex.match(version):
+            raise ValueError("format of the template uid (%s) not valid" % uid)
+        return cls(host, account, repo, name, version)
+
+    def tuple(self):
+        l = [self.host, self.account, self.repo, self.name, self.version]
+        return tuple(x for x in l if x)
+
+    def __repr__(self):
+        return '/'.join(self.tuple())
+
+    def __str__(self):
+        return repr(self)
+
+    def __comp(self, other):
+        if self.tuple()[:-1] != other.tuple()[:-1]:
+            raise ValueError("other is not the same template, can't compare version")
+        if self.version < other.version:
+            return -1
+        elif self.version > other.version:
+            return 1
+        else:
+            return 0
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            other = PreviousTemplateUID.parse(other)
+        return self.tuple() == other.tuple()
+
+    def __gt__(self, other):
+        return self.__comp(other) == 1
+
+    def __hash__(self):
+        return hash(self.tuple())
+
+
+def bench(cls, uids):
+    templates = {cls.parse(uid): uid for uid in set(uids)}
+    index = {}
+
+    start = time.perf_counter()
+    for uid in uids:
+        # loader: find the template of the service
+        template = templates[cls.parse(uid)]
+        # service_collection.load: check the version of the service against the template
+        service_uid = cls.parse(uid)
+        if service_uid > cls.parse(template):
+            raise RuntimeError("service requires a newer template")
+        # service index: index the service by template uid
+        index.setdefault(str(service_uid), []).append(service_uid)
+    return time.perf_counter() - start
+
+
+def main(nr_services, nr_templates):
+    uids = ['github.com/threefoldtech/0-templates/template%d/0.0.1' % (i % nr_templates) for i in range(nr_services)]
+    print("services: %d, templates: %d" % (nr_services, nr_templates))
+    for name, cls in [('previous', PreviousTemplateUID), ('current', template_uid.TemplateUID)]:
+        duration = bench(cls, uids)
+        print("%-8s %6.3fs (%5.2fus/service)" % (name, duration, duration / nr_services * 1e6))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--services', type=int, default=50000, help='number of services loaded')
+    parser.add_argument('--templates', type=int, default=20, help='number of different templates used by the services')
+    args = parser.parse_args()
+    main(args.services, args.templates)
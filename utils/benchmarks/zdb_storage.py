@@ -0,0 +1,220 @@
+"""
+Benchmark of the 0-db service storage
+
+Save then load a set of services with the previous layout of the 0-db storage
+(one key per part of the service, one round trip per command on a single connection)
+and with the current one (one record per service, pipelined commands, pool of connections,
+services loaded concurrently like the robot loader does).
+
+By default the benchmark runs against a local stand-in server that speaks the subset of
+the redis protocol used by the storage and adds --latency milliseconds to every round trip.
+Use --addr to run it against a real 0-db or redis instead.
+
+usage: python3 utils/benchmarks/zdb_storage.py [--services 1000] [--latency 1] [--addr host:port]
+"""
+
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import time
+
+import gevent
+import msgpack
+from gevent.pool import Pool
+from gevent.server import StreamServer
+
+from zerorobot.storage import zdb
+from zerorobot.storage.base import ServiceStorageBase
+
+NAMESPACE = 'zrobot_bench'
+
+
+class StandInServer:
+    """
+    in memory key value server that speaks the commands of 0-db used by the storage
+    every round trip is delayed by latency seconds
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.data = {}
+        self._server = StreamServer(('127.0.0.1', 0), self._handle)
+
+    @property
+    def address(self):
+        return self._server.address
+
+    def start(self):
+        self._server.start()
+
+    def stop(self):
+        self._server.stop()
+
+    def _handle(self, sock, address):
+        buf = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return
+            buf += chunk
+            # all the commands received together are answered in one round trip
+            gevent.sleep(self.latency)
+            replies = []
+            while True:
+                command, buf = _parse(buf)
+                if command is None:
+                    break
+                replies.append(self._execute(command))
+            sock.sendall(b''.join(replies))
+
+    def _execute(self, command):
+        name = command[0].upper()
+        if name == b'SET':
+            self.data[command[1]] = command[2]
+            return _bulk(command[1])
+        if name == b'GET':
+            return _bulk(self.data.get(command[1]))
+        if name == b'DEL':
+            if self.data.pop(command[1], None) is None:
+                return b'-Key not found\r\n'
+            return b':1\r\n'
+        if name in (b'SELECT', b'PING'):
+            return b'+OK\r\n'
+        return b'-unsupported command\r\n'
+
+
+def _parse(buf):
+    """
+    parse one command from buf, return the command and the rest of the buffer
+    """
+    if not buf.startswith(b'*'):
+        return None, buf
+    end = buf.find(b'\r\n')
+    if end < 0:
+        return None, buf
+    count = int(buf[1:end])
+    pos = end + 2
+    args = []
+    for _ in range(count):
+        end = buf.find(b'\r\n', pos)
+        if end < 0:
+            return None, buf
+        size = int(buf[pos + 1:end])
+        start = end + 2
+        if len(buf) < start + size + 2:
+            return None, buf
+        args.append(buf[start:start + size])
+        pos = start + size + 2
+    return args, buf[pos:]
+
+
+def _bulk(value):
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class BenchStorage(zdb.ZDBServiceStorage):
+    """
+    ZDBServiceStorage without the jumpscale client used to create the namespace
+    """
+
+    def __init__(self, addr, port, pool_size=zdb.POOL_SIZE):
+        ServiceStorageBase.__init__(self)
+        self._redis = zdb.connect(addr, port, NAMESPACE, pool_size=pool_size)
+        self._legacy = set()
+
+
+class LegacyStorage:
+    """
+    previous implementation: one key per part of the service, one round trip per command
+    """
+
+    def __init__(self, addr, port):
+        self._redis = zdb.connect(addr, port, NAMESPACE, pool_size=1)
+
+    def save(self, guid, serialized_service):
+        for part, prefix in zdb._legacy_prefixes.items():
+            self._redis.execute_command('SET', prefix + guid, msgpack.dumps(serialized_service[part]))
+
+    def load(self, guid):
+        return {part: msgpack.loads(self._redis.execute_command('GET', prefix + guid), raw=False)
+                for part, prefix in zdb._legacy_prefixes.items()}
+
+
+def serialized_service(i):
+    return {
+        'service': {'template': 'github.com/threefoldtech/0-robot/benchmark/0.0.1', 'version': '0.0.1',
+                    'name': 'service%d' % i, 'guid': 'guid%d' % i, 'public': False},
+        'states': {'actions': {'install': 'ok'}},
+        'data': {'hostname': 'node%d' % i, 'config': {'key%d' % k: 'value' for k in range(20)}},
+        'tasks': [],
+    }
+
+
+def bench_legacy(addr, port, services):
+    storage = LegacyStorage(addr, port)
+    start = time.perf_counter()
+    for details in services:
+        storage.save(details['service']['guid'], details)
+    save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for details in services:
+        storage.load(details['service']['guid'])
+    load = time.perf_counter() - start
+    return save, load
+
+
+def bench_current(addr, port, services, concurrency):
+    storage = BenchStorage(addr, port, pool_size=concurrency)
+    start = time.perf_counter()
+    for details in services:
+        storage._write_service(_FakeService(details['service']['guid']), details)
+    save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pool = Pool(concurrency)
+    loaded = list(pool.imap(storage.load, [details['service']['guid'] for details in services]))
+    load = time.perf_counter() - start
+    assert loaded == services
+    return save, load
+
+
+class _FakeService:
+
+    def __init__(self, guid):
+        self.guid = guid
+
+
+def main(nr_services, latency, addr, concurrency):
+    server = None
+    if addr:
+        host, port = addr.split(':')
+        port = int(port)
+    else:
+        server = StandInServer(latency / 1000)
+        server.start()
+        host, port = server.address
+
+    services = [serialized_service(i) for i in range(nr_services)]
+    try:
+        print("services: %d, target: %s" % (nr_services, addr or "stand-in server with %.1fms latency" % latency))
+        for name, (save, load) in [('4 keys', bench_legacy(host, port, services)),
+                                   ('record', bench_current(host, port, services, concurrency))]:
+            print("%-7s save: %6.2fs (%5.2fms/service)  load: %6.2fs (%5.2fms/service)" % (
+                name, save, save / nr_services * 1000, load, load / nr_services * 1000))
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--services', type=int, default=1000, help='number of services')
+    parser.add_argument('--latency', type=float, default=1, help='round trip time of the stand-in server in milliseconds')
+    parser.add_argument('--concurrency', type=int, default=zdb.POOL_SIZE, help='number of connections used to load the services')
+    parser.add_argument('--addr', help='address of a real 0-db or redis to use instead of the stand-in server')
+    args = parser.parse_args()
+    main(args.services, args.latency, args.addr, args.concurrency)
@@ -9,7 +9,9 @@ import click
 import logging
 from Jumpscale.logging.Handlers import TelegramHandler
 from Jumpscale.logging.Handlers import TelegramFormatter
+from zerorobot import config
 from zerorobot.robot import Robot
+from zerorobot.storage.filesystem import FileSystemServiceStorage
 
 
 telegram_logger = logging.getLogger('telegram_logger')
@@ -72,10 +74,24 @@ def get_db_config_key():
 @click.option('--user-organization', help='if specified, use this organization to protect the user API endpoint.', required=False)
 @click.option('--mode', help='mode of 0-robot', type=click.Choice(['node']), required=False)
 @click.option('--god', help='enable god mode (use ONLY for development !!)', required=False, default=False, is_flag=True)
+@click.option('--task-storage', help='store the executed tasks in one database per service or in a single database for the whole robot',
+              type=click.Choice(['service', 'robot']), required=False, default='service')
+@click.option('--task-durability', help='write each executed task right away (sync) or in batches (delayed)',
+              type=click.Choice(['sync', 'delayed']), required=False, default='delayed')
+@click.option('--data-format', help='format of the service files when the data repository is on the local filesystem',
+              type=click.Choice(['yaml', 'msgpack']), required=False, default='yaml')
+@click.option('--save-durability', help='save the services after each action (sync) or in the background, grouping the saves of a service (delayed)',
+              type=click.Choice(['sync', 'delayed']), required=False, default='sync')
+@click.option('--executor-concurrency', help='maximum number of tasks executed at the same time by all the services, 0 for no limit',
+              type=int, required=False, default=0)
+@click.option('--task-retention-age', help='number of seconds the executed tasks are kept', type=int, required=False, default=7200)
+@click.option('--task-retention-count', help='number of most recent executed tasks always kept per service, whatever their age',
+              type=int, required=False, default=50)
 def start(listen, data_repo, template_repo, config_repo, config_key, debug,
           telegram_bot_token, telegram_chat_id,
           auto_push, auto_push_interval,
-          admin_organization, user_organization, mode, god):
+          admin_organization, user_organization, mode, god, task_storage, task_durability, data_format,
+          save_durability, executor_concurrency, task_retention_age, task_retention_count):
     """
     start the 0-robot daemon.
     this will start the REST API on address and port specified by --listen and block
@@ -124,4 +140,34 @@ def start(listen, data_repo, template_repo, config_repo, config_key, debug,
                 admin_organization=admin_organization,
                 user_organization=user_organization,
                 mode=mode,
-                god=god)
+                god=god,
+                task_storage=task_storage,
+                task_durability=task_durability,
+                data_format=data_format,
+                save_durability=save_durability,
+                executor_concurrency=executor_concurrency,
+                task_retention_age=task_retention_age,
+                task_retention_count=task_retention_count)
+
+
+@server.command()
+@click.option('--data-repo', '-D', required=True, help='URL of the git repository or absolute path where the data of the zero robot are saved')
+@click.option('--output', '-o', required=False, help='path of the file where to write the export, default to the standard output')
+def export(data_repo, output):
+    """
+    export the services of a data repository into a human readable yaml document.
+    works whatever the format used to store the services.
+    """
+    data_repo = config.DataRepo(data_repo)
+    if data_repo.type != 'fs':
+        raise click.BadParameter("only data repositories on the local filesystem can be exported", param_hint='--data-repo')
+
+    # read doesn't convert the services, so the data repository is left untouched
+    store = FileSystemServiceStorage(data_repo.path)
+    services = [store.read(key)[0] for key in store.list_keys()]
+    document = j.data.serializer.yaml.dumps(services)
+    if output:
+        with open(output, 'w') as f:
+            f.write(document)
+    else:
+        click.echo(document)
@@ -15,4 +15,35 @@ config_repo = None
 mode = None
 god = False
 
+# format of the files of the services when the data repository is on the local filesystem
+# 'yaml': one yaml file per part of the service (info, states, data, tasks)
+# 'msgpack': a single msgpack file per service
+data_format = 'yaml'
+
+# durability of the services saves done after each action
+# 'sync': the service is written before its next action is executed
+# 'delayed': the service is written in the background, saves of the same service
+#            done within save_window seconds are written at once
+save_durability = 'sync'
+save_window = 1
+
+# maximum number of tasks executed at the same time by all the services of the robot, 0 for no limit
+executor_concurrency = 0
+
+# where the executed tasks are stored
+# 'service': one database per service
+# 'robot': one database shared by all the services of the robot
+task_storage = 'service'
+
+# durability of the executed tasks
+# 'sync': each task is written as soon as it is executed
+# 'delayed': tasks are buffered and written in batches, a crash can lose the last seconds of task history
+task_durability = 'delayed'
+
+# retention of the executed tasks
+# tasks older then task_retention_age seconds are deleted,
+# but the task_retention_count most recent tasks of each service are always kept
+task_retention_age = 7200
+task_retention_count = 50
+
 webhooks = None
@@ -8,7 +8,7 @@ from jumpscale import j
 from zerorobot.git.repo import RepoCheckoutError
 from zerorobot.service_collection import (ServiceConflictError,
                                           ServiceNotFoundError, TooManyResults)
-from zerorobot.service_proxy import ServiceProxy
+from zerorobot.service_proxy import ServiceProxy, _task_proxy_from_api
 from zerorobot.template_collection import (TemplateConflictError,
                                            TemplateNotFoundError)
 from zerorobot.template_uid import TemplateUID
@@ -205,6 +205,51 @@ class ServicesMgr:
         except ServiceNotFoundError:
             return self.create(template_uid=template_uid, service_name=service_name, data=data, public=public)
 
+    def schedule_many(self, actions, coalesce=False):
+        """
+        Schedule actions on many services in a single request
+
+        :param actions: list of (service, action, args) tuples.
+                        service is either a ServiceProxy, the guid of a service or a dict with the keys
+                        service_name and/or template to schedule the action on all the matching services.
+                        args is a dictionnary of the arguments to pass to the action, it can be None
+        :type actions: list
+        :param coalesce: if True and the same action with the same arguments is already waiting in the task list
+                         of a service, the waiting task is returned instead of adding a new one, defaults to False
+        :type coalesce: bool, optional
+        :raises RuntimeError: raised when an action is not valid, in this case no action is scheduled
+        :return: the tasks created, in the order of actions
+        :rtype: list of TaskProxy
+        """
+        req = []
+        for service, action, args in actions:
+            item = {"action_name": action}
+            if isinstance(service, ServiceProxy):
+                item["service_guid"] = service.guid
+            elif isinstance(service, dict):
+                item.update(service)
+            else:
+                item["service_guid"] = service
+            if args:
+                item["args"] = args
+            req.append(item)
+
+        query_params = {'coalesce': True} if coalesce else None
+        try:
+            tasks, _ = self._client.api.tasks.ScheduleActions(req, query_params=query_params)
+        except HTTPError as err:
+            if err.response.status_code == 400:
+                raise RuntimeError(err.response.json()['message'])
+            raise err
+
+        services = {}
+        results = []
+        for task in tasks:
+            if task.service_guid not in services:
+                services[task.service_guid] = ServiceProxy(task.service_name, task.service_guid, self._client)
+            results.append(_task_proxy_from_api(task, services[task.service_guid]))
+        return results
+
 
 class TemplatesMgr:
 
@@ -0,0 +1,51 @@
+"""
+This module implements a small bounded cache that evicts the least recently used entries.
+It is used to keep hot objects in memory in front of slower lookups
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Mapping with a maximum size.
+    When the cache is full, the least recently used entry is evicted to make room for the new one
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater then 0")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        """
+        return the value of key and mark it as recently used
+        if key is not in the cache, return default
+        """
+        try:
+            self._data.move_to_end(key)
+            return self._data[key]
+        except KeyError:
+            return default
+
+    def set(self, key, value):
+        """
+        add or update an entry, evict the least recently used entry if the cache is full
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
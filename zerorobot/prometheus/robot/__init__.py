@@ -1,4 +1,4 @@
-from prometheus_client import Gauge, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 from zerorobot import service_collection as scol
 import psutil
 import os
@@ -7,6 +7,19 @@ import os
 nr_task_waiting = Gauge("robot_tasks_waiting_total", "Number of task waiting per service", ['service_guid'])
 task_latency = Histogram('robot_tasks_latency_ms', 'Task latency',
                          ['action_name', 'template_uid'])
+# services
+service_saves = Counter("robot_service_saves_total",
+                        "Number of service saves, skipped when the service didn't change since it was last written",
+                        ['result'])
+# authentication
+jwt_cache = Counter("robot_jwt_cache_total",
+                    "Number of lookups in the cache of decoded JWTs, a miss means the signature had to be verified",
+                    ['result'])
+# retention of executed tasks
+task_trimmed = Counter("robot_tasks_trimmed_total", "Number of executed tasks deleted by the task retention")
+task_trim_reclaimed = Counter("robot_tasks_trim_reclaimed_bytes_total",
+                              "Disk space given back by the task databases after deleting old tasks")
+task_trim_sweep = Gauge("robot_tasks_trim_sweep_seconds", "Duration of the last sweep of the task retention")
 
 
 process = psutil.Process(os.getpid())
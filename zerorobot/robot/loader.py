@@ -1,56 +1,104 @@
 import os
+import time
 
 import gevent
+from gevent.pool import Pool
 
 from jumpscale import j
 from zerorobot import service_collection as scol
 from zerorobot import template_collection as tcol
 from zerorobot import storage
+from zerorobot.template import executor
 from zerorobot.template_uid import TemplateUID
 
+# number of services fetched and decoded from the storage concurrently
+FETCH_CONCURRENCY = 16
+# number of services validated concurrently
+VALIDATE_CONCURRENCY = 16
 
 
-def load_services(config):
+def load_services(config, fetch_concurrency=FETCH_CONCURRENCY, validate_concurrency=VALIDATE_CONCURRENCY):
+    """
+    load all the services from the storage
 
-    for service_details in storage.list():
-        tmpl_uid = TemplateUID.parse(service_details['service']['template'])
+    the services are fetched and decoded by a pool of greenlets
+    while the ones already fetched are instantiated,
+    then all the services are validated concurrently
+    """
+    logger = j.logger.get('zerorobot')
+    timings = {'fetch': 0, 'instantiate': 0}
 
-        try:
-            tmplClass = tcol.get(str(tmpl_uid))
-        except tcol.TemplateNotFoundError:
-            # template of the service not found, could be we have the template but not the same version
-            # try to get the template without specifiying version
-            tmplClasses = tcol.find(host=tmpl_uid.host, account=tmpl_uid.account, repo=tmpl_uid.repo, name=tmpl_uid.name)
-            size = len(tmplClasses)
-            if size > 1:
-                raise RuntimeError("more then one template version found, this should never happens")
-            elif size < 1:
-                # if the template is not found, try to add the repo using the info of the service template uid
-                url = "http://%s/%s/%s" % (tmpl_uid.host, tmpl_uid.account, tmpl_uid.repo)
-                tcol.add_repo(url)
-                tmplClass = tcol.get(service_details['service']['template'])
-            else:
-                # template of another version found, use newer version to load the service
-                tmplClass = tmplClasses[0]
+    def fetch(key):
+        started = time.time()
+        service_details = storage.load(key)
+        timings['fetch'] += time.time() - started
+        return service_details
 
+    started = time.time()
+    # imap keeps the order of the storage
+    pool = Pool(fetch_concurrency)
+    for service_details in pool.imap(fetch, storage.list_keys()):
+        instantiate_started = time.time()
+        tmplClass = _get_template(service_details)
         scol.load(tmplClass, service_details)
+        timings['instantiate'] += time.time() - instantiate_started
+    load_elapsed = time.time() - started
 
-    loading_failed = []
-    logger = j.logger.get('zerorobot')
-    for service in scol.list_services():
-        try:
-            service.validate()
-        except Exception as err:
-            logger.error("fail to load %s: %s" % (service.guid, str(err)))
-            # the service is not going to process its task list until it can
-            # execute validate() without problem
-            service.gl_mgr.stop('executor')
-            loading_failed.append(service)
+    started = time.time()
+    services = scol.list_services()
+    pool = Pool(validate_concurrency)
+    loading_failed = [service for service in pool.imap(_validate, services) if service is not None]
+    validate_elapsed = time.time() - started
+
+    # fetch and instantiate are cumulated over all the services, they overlap in time
+    logger.info("%d services loaded in %.2fs (fetch: %.2fs, instantiate: %.2fs), validated in %.2fs",
+                len(services), load_elapsed, timings['fetch'], timings['instantiate'], validate_elapsed)
 
     if len(loading_failed) > 0:
         gevent.spawn(_try_load_service, loading_failed)
 
 
+def _get_template(service_details):
+    """
+    return the template class to use to load a service
+    """
+    tmpl_uid = TemplateUID.parse(service_details['service']['template'])
+
+    try:
+        return tcol.get(str(tmpl_uid))
+    except tcol.TemplateNotFoundError:
+        # template of the service not found, could be we have the template but not the same version
+        # try to get the template without specifiying version
+        tmplClasses = tcol.find(host=tmpl_uid.host, account=tmpl_uid.account, repo=tmpl_uid.repo, name=tmpl_uid.name)
+        size = len(tmplClasses)
+        if size > 1:
+            raise RuntimeError("more then one template version found, this should never happens")
+        elif size < 1:
+            # if the template is not found, try to add the repo using the info of the service template uid
+            url = "http://%s/%s/%s" % (tmpl_uid.host, tmpl_uid.account, tmpl_uid.repo)
+            tcol.add_repo(url)
+            return tcol.get(service_details['service']['template'])
+        else:
+            # template of another version found, use newer version to load the service
+            return tmplClasses[0]
+
+
+def _validate(service):
+    """
+    execute validate on the service
+    if it fails, stop the service and return it
+    """
+    try:
+        service.validate()
+    except Exception as err:
+        logger = j.logger.get('zerorobot')
+        logger.error("fail to load %s: %s" % (service.guid, str(err)))
+        # the service is not going to process its task list until it can
+        # execute validate() without problem
+        executor.pool.stop(service, timeout=executor.STOP_TIMEOUT)
+        return service
+
+
 def _try_load_service(services):
     """
     this method tries to execute `validate` method on the services that failed to load
@@ -66,7 +114,7 @@ def _try_load_service(services):
                 service.validate()
                 logger.debug("loading succeeded for %s" % service.guid)
                 # validate passed, service is healthy again
-                service.gl_mgr.add('executor', gevent.Greenlet(service._run))
+                executor.pool.start(service)
                 services.remove(service)
             except:
                 logger.debug("loading failed again for %s" % service.guid)
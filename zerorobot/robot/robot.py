@@ -16,9 +16,12 @@ from zerorobot import template_collection as tcol
 from zerorobot import config, webhooks
 from zerorobot.git import url as giturl
 from zerorobot.prometheus.flask import monitor
+from zerorobot.prometheus.robot import task_trim_reclaimed, task_trim_sweep, task_trimmed
 from zerorobot.server import auth
 from zerorobot.server.app import app
 from zerorobot import storage
+from zerorobot.task.storage import shared as shared_task_storage
+from zerorobot.template import executor, recurring
 
 from . import loader
 
@@ -89,6 +92,13 @@ class Robot:
               user_organization=None,
               mode=None,
               god=False,
+              task_storage='service',
+              task_durability='delayed',
+              data_format='yaml',
+              save_durability='sync',
+              executor_concurrency=0,
+              task_retention_age=7200,
+              task_retention_count=50,
               **kwargs):
         """
         start the rest web server
@@ -98,6 +108,13 @@ class Robot:
 
         config.mode = mode
         config.god = god  # when true, this allow to get data and logs from services using the REST API
+        config.task_storage = task_storage  # one task database per service or for the whole robot
+        config.task_durability = task_durability  # write each executed task right away or in batches
+        config.data_format = data_format  # format of the service files on the filesystem
+        config.save_durability = save_durability  # save services after each action or in the background
+        config.executor_concurrency = executor_concurrency  # maximum number of tasks executed at the same time
+        config.task_retention_age = task_retention_age  # executed tasks older then this are deleted
+        config.task_retention_count = task_retention_count  # except the most recent ones of each service
         if config.data_repo is None:
             raise RuntimeError("Not data repository set. Robot doesn't know where to save data.")
         if not j.tools.configmanager.path:
@@ -105,6 +122,8 @@ class Robot:
 
         # configure storage
         storage.init(config)
+        # configure the executor of the task lists
+        executor.pool.resize(config.executor_concurrency)
         # instantiate webhooks manager and load the configured webhooks
         config.webhooks = webhooks.get(config)
 
@@ -143,8 +162,8 @@ class Robot:
         if mode == 'node':
             _create_node_service()
 
-        # only keep executed tasks for 2 hours
-        gevent.spawn(_trim_tasks, 7200)
+        # delete the old executed tasks periodically
+        gevent.spawn(_trim_tasks)
 
         # using a pool allow to kill the request when stopping the server
         pool = Pool(None)
@@ -205,10 +224,16 @@ class Robot:
         """
         serialize all the services on disk
         """
+        # write the services scheduled to be saved in the background
+        storage.flush()
         for service in scol.list_services():
             # stop all the greenlets attached to the services
+            recurring.scheduler.cancel(service)
+            executor.pool.stop(service, timeout=executor.STOP_TIMEOUT)
             service.gl_mgr.stop_all()
             service.save()
+            # write the executed tasks still buffered in memory
+            service.task_list._done.flush()
 
 
 def _create_node_service():
@@ -235,28 +260,17 @@ def _create_node_service():
     node.schedule_action('_register')
 
 
-def _trim_tasks(period=7200):  # default 2 hours ago
+def _trim_tasks(interval=20*60):  # runs every 20 minutes
     """
-    this greenlet delete the task of all services that are older
-    then 'period'
+    this greenlet delete the executed tasks of all services that are older
+    then config.task_retention_age, keeping the config.task_retention_count most recent tasks of each service
     This is to limit the amount of storage used to keep track of the tasks
     """
     logger = j.logger.get('zerorobot')
     while True:
         try:
-            time.sleep(20*60)  # runs every 20 minutes
-            ago = int(time.time()) - period
-
-            for service in scol.list_services():
-                if not hasattr(service.task_list._done, 'delete_until'):
-                    continue
-
-                # don't need to trim old task if we have 50 or less tasks
-                if service.task_list._done.count() <= 50:
-                    continue
-                # delete all task that have been created before ago
-                service.task_list._done.delete_until(ago)
-
+            gevent.sleep(interval)
+            _trim_sweep(config.task_retention_age, config.task_retention_count)
         except gevent.GreenletExit:
             # exit properly
             return
@@ -265,6 +279,50 @@ def _trim_tasks(period=7200):  # default 2 hours ago
             continue
 
 
+def _trim_sweep(age, keep):
+    """
+    delete the old tasks of all the services then give the freed space back to the filesystem
+
+    storages delete their tasks in small batches and the loop yields between services,
+    so the sweep doesn't block the other greenlets
+    when all the tasks are in the robot wide database, they are trimmed for all the services in one pass
+    """
+    logger = j.logger.get('zerorobot')
+    started = time.time()
+    ago = int(started) - age
+    deleted = 0
+    reclaimed = 0
+
+    if config.task_storage == 'robot':
+        # write the buffered tasks first, so they are trimmed like the others
+        for service in scol.list_services():
+            try:
+                service.task_list._done.flush()
+            except:
+                logger.exception("error writing tasks of service %s", service.guid)
+        db = shared_task_storage.get_db(shared_task_storage.db_path(config.data_repo.path))
+        deleted += db.trim(ago, keep=keep)
+        reclaimed += db.reclaim()
+    else:
+        for service in scol.list_services():
+            task_storage = service.task_list._done
+            if not hasattr(task_storage, 'trim'):
+                continue
+            try:
+                deleted += task_storage.trim(ago, keep=keep)
+                reclaimed += task_storage.reclaim()
+            except:
+                logger.exception("error deleting old tasks of service %s", service.guid)
+            gevent.sleep(0)
+
+    elapsed = time.time() - started
+    task_trimmed.inc(deleted)
+    task_trim_reclaimed.inc(reclaimed)
+    task_trim_sweep.set(elapsed)
+    logger.info("task retention: %d tasks deleted, %d bytes reclaimed in %.2fs", deleted, reclaimed, elapsed)
+    return deleted, reclaimed
+
+
 def _split_hostport(hostport):
     """
     convert a listen addres of the form
@@ -7,6 +7,7 @@ from jumpscale import j
 from zerorobot.errors import eco_get
 from .blueprints_api import blueprints_api
 from .services_api import services_api
+from .tasks_api import tasks_api
 from .templates_api import templates_api
 from .robot_api import robot_api
 
@@ -16,6 +17,7 @@ app = Flask(__name__)
 
 app.register_blueprint(blueprints_api)
 app.register_blueprint(services_api)
+app.register_blueprint(tasks_api)
 app.register_blueprint(templates_api)
 app.register_blueprint(robot_api)
 
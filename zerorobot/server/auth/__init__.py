@@ -1 +1 @@
-from .auth import admin, user, service, admin_user, user_service, all
+from .auth import admin, user, service, admin_user, user_service, all, service_access
@@ -1,11 +1,10 @@
 from functools import wraps
 
 from flask import jsonify, request
-from jose import jwt
 from jumpscale import j
 from zerorobot import service_collection as scol
 from zerorobot import config
-from . import user_jwt, god_jwt
+from . import user_jwt, god_jwt, token_cache
 from .flask_httpauth import HTTPTokenAuth, MultiAuth
 
 logger = j.logger.get('zrobot')
@@ -40,7 +39,7 @@ def _verify_token(token, organization):
         return True
 
     try:
-        scope = jwt.decode(token, _oauth2_server_pub_key, audience=None)["scope"]
+        scope = token_cache.decode(token, _oauth2_server_pub_key, audience=None)["scope"]
     except Exception as err:
         logger.debug('error decoding JWT: %s', str(err))
         return False
@@ -80,3 +79,24 @@ def _verify_secret_token(tokens):
         return False
 
     return False
+
+
+def service_access(request):
+    """
+    return a function telling if the request has the right to use a service, given its guid.
+    it has the right if it carries the god token or the secret of the service, or if the service is public.
+    a service that doesn't exist anymore is not accessible
+    """
+    if god_jwt.check_god_token(request):
+        return lambda guid: True
+
+    allowed = set(user_jwt.extract_service_guid(request))
+
+    def has_access(guid):
+        if guid in allowed:
+            return True
+        try:
+            return scol.is_service_public(guid)
+        except scol.ServiceNotFoundError:
+            return False
+    return has_access
@@ -0,0 +1,108 @@
+"""
+cache of the decoded JWTs
+
+Clients send all their secrets with every request and verifying the signature of a JWT is expensive,
+so the claims of the tokens already decoded are kept in a bounded LRU cache, keyed by the key used to verify them.
+The tokens that fail to decode are cached too, so a client sending stale secrets doesn't cost a verification per request.
+The signing key of the robot is read from disk once instead of on every decode.
+"""
+
+import json
+import os
+import time
+
+from jose import jwt
+from jose.exceptions import JWTClaimsError, JWTError
+from jumpscale import j
+from zerorobot.lru import LRUCache
+from zerorobot.prometheus.robot import jwt_cache
+
+# maximum number of decoded tokens kept in memory
+TOKEN_CACHE_SIZE = 4096
+
+_tokens = LRUCache(TOKEN_CACHE_SIZE)
+# content of the signing keys, by key name
+_keys = {}
+
+
+class _Invalid:
+    """
+    cached result of a token that failed to decode
+    """
+    __slots__ = ('message',)
+
+    def __init__(self, message):
+        self.message = message
+
+
+def decode(token, key, **kwargs):
+    """
+    same as jose.jwt.decode, but return the claims from the cache if the token has already been decoded with this key
+
+    :raises JWTError: if the token is not valid
+    """
+    cache_key = _cache_key(token, key, kwargs)
+    if cache_key is None:
+        jwt_cache.labels(result='miss').inc()
+        return jwt.decode(token, key, **kwargs)
+
+    entry = _tokens.get(cache_key)
+    if entry is not None:
+        if isinstance(entry, _Invalid):
+            jwt_cache.labels(result='hit').inc()
+            raise JWTError(entry.message)
+        exp = entry.get('exp')
+        if exp is None or exp > time.time():
+            jwt_cache.labels(result='hit').inc()
+            return dict(entry)
+        # the token expired since it has been cached, let jose report it
+        _tokens.pop(cache_key)
+
+    jwt_cache.labels(result='miss').inc()
+    try:
+        claims = jwt.decode(token, key, **kwargs)
+    except JWTClaimsError:
+        # claims like nbf can become valid later, don't cache the failure
+        raise
+    except JWTError as err:
+        _tokens.set(cache_key, _Invalid(str(err)))
+        raise
+    _tokens.set(cache_key, claims)
+    return dict(claims)
+
+
+def _cache_key(token, key, kwargs):
+    """
+    return a hashable key identifying the decoding of token with key and the options of jose in kwargs
+    the options and the key can be lists or dicts, e.g. audience or a JWK, so they are serialized
+    return None if they can't be serialized, such tokens are not cached
+    """
+    try:
+        if not isinstance(key, (str, bytes)):
+            key = json.dumps(key, sort_keys=True)
+        return (key, token, json.dumps(kwargs, sort_keys=True))
+    except (TypeError, ValueError):
+        return None
+
+
+def signing_key(keyname):
+    """
+    return the content of the ssh key keyname, used to sign the JWTs of the robot
+    return None if the key doesn't exist
+    """
+    key = _keys.get(keyname)
+    if key is None:
+        key_path = os.path.expanduser(os.path.join('~/.ssh', keyname))
+        if not os.path.exists(key_path):
+            return None
+        key = j.sal.fs.fileGetContents(key_path)
+        _keys[keyname] = key
+    return key
+
+
+def clear():
+    """
+    forget all the decoded tokens and signing keys, e.g. after the signing key changed
+    """
+    _tokens.clear()
+    _keys.clear()
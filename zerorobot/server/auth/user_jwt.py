@@ -1,9 +1,10 @@
 from functools import wraps
-import os
 
 from jose import jwt
 from jumpscale import j
 
+from . import token_cache
+
 _token_prefix = "Bearer "
 
 logger = j.logger.get('zrobot')
@@ -21,7 +22,7 @@ def create(claims):
 
 def decode(token):
     key = _get_key()
-    return jwt.decode(token, key, algorithms='HS256')
+    return token_cache.decode(token, key, algorithms='HS256')
 
 
 def verify(service_guid, token):
@@ -78,11 +79,11 @@ def _get_key():
     if j.tools.configmanager.keyname is None or j.tools.configmanager.keyname == '':
         raise SigningKeyNotFoundError('no key configured')
 
-    key_path = os.path.expanduser(os.path.join('~/.ssh', j.tools.configmanager.keyname))
-    if not os.path.exists(key_path):
+    key = token_cache.signing_key(j.tools.configmanager.keyname)
+    if key is None:
         raise SigningKeyNotFoundError('key not found')
 
-    return j.sal.fs.fileGetContents(key_path)
+    return key
 
 
 class SigningKeyNotFoundError(Exception):
@@ -6,6 +6,7 @@ import os
 import jsonschema
 from flask import jsonify, request
 from jsonschema import Draft4Validator
+from jumpscale import j
 
 from zerorobot import service_collection as scol
 from zerorobot.server.handlers.views import task_view
@@ -37,8 +38,11 @@ def AddTaskToListHandler(service_guid):
         return jsonify(code=404, message="service with guid '%s' not found" % service_guid), 404
 
     args = inputs.get("args", None)
+    # return the task already waiting in the task list for the same action and arguments, if any
+    coalesce = request.args.get('coalesce')
+    coalesce = j.data.types.bool.fromString(coalesce) if coalesce is not None else False
     try:
-        task = service.schedule_action(action=inputs["action_name"], args=args)
+        task = service.schedule_action(action=inputs["action_name"], args=args, coalesce=coalesce)
     except ActionNotFoundError:
         return jsonify(code=400, message="action '%s' not found" % inputs["action_name"]), 400
     except BadActionArgumentError as err:
@@ -47,8 +47,9 @@ def ExecuteBlueprintHandler():
         return jsonify(code=err_code, message=err_msg), err_code
 
     services_2b_schedules = _find_services_to_be_scheduled(actions)
-    allowed_services = auth.user_jwt.extract_service_guid(request) + [s["guid"] for s in services_created]
-    not_allowed = set(services_2b_schedules) - set(allowed_services)
+    allowed_services = set(auth.user_jwt.extract_service_guid(request))
+    allowed_services.update(s["guid"] for s in services_created)
+    not_allowed = services_2b_schedules - allowed_services
     if not_allowed:
         error_msg = "you are trying to schedule action on some services on which you don't have rights."
         return jsonify(code=401, message=error_msg), 401
@@ -129,7 +130,7 @@ def _instantiate_service(service_descr):
 
 
 def _find_services_to_be_scheduled(actions):
-    services_guids = []
+    services_guids = set()
 
     for action_item in actions:
         template_uid = None
@@ -160,7 +161,7 @@ def _find_services_to_be_scheduled(actions):
         else:
             candidates = scol.list_services()
 
-        services_guids.extend([s.guid for s in candidates])
+        services_guids.update(s.guid for s in candidates)
     return services_guids
 
 
@@ -8,6 +8,9 @@ from zerorobot.task import TaskNotFoundError
 
 from zerorobot.server import auth
 
+# maximum number of seconds a request can wait for the state of a task to change
+MAX_WAIT = 60
+
 
 @auth.service.login_required
 def GetTaskHandler(task_guid, service_guid):
@@ -25,4 +28,11 @@ def GetTaskHandler(task_guid, service_guid):
     except TaskNotFoundError:
         return jsonify(code=404, message="task with guid '%s' not found" % task_guid), 404
 
+    # long polling: wait for the state of the task to change before answering
+    wait = request.args.get('wait', type=float)
+    if 'wait' in request.args and (wait is None or wait < 0):
+        return jsonify(code=400, message="wait must be a positive number"), 400
+    if wait:
+        task.wait_change(timeout=min(wait, MAX_WAIT))
+
     return jsonify(task_view(task, service)), 200
@@ -0,0 +1,65 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+import json
+import os
+
+import jsonschema
+from flask import jsonify, request
+from jsonschema import Draft4Validator
+
+from zerorobot import service_collection as scol
+from zerorobot.server import auth
+from zerorobot.server.handlers.views import task_view
+from zerorobot.task import TaskNotFoundError
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+TaskRef_schema = json.load(open(dir_path + "/schema/TaskRef_schema.json"))
+TaskRef_list_schema = {"type": "array", "items": TaskRef_schema}
+TaskRef_schema_resolver = jsonschema.RefResolver("file://" + dir_path + "/schema/", TaskRef_schema)
+TaskRef_schema_validator = Draft4Validator(TaskRef_list_schema, resolver=TaskRef_schema_resolver)
+
+
+@auth.admin_user.login_required
+def GetTasksStatusHandler():
+    """
+    Retrieve the detail of many tasks, of any service, at once
+    A task or a service that doesn't exist gets an entry with a null state and an error
+    It is handler for POST /tasks/status
+    """
+    inputs = request.get_json()
+    try:
+        TaskRef_schema_validator.validate(inputs)
+    except jsonschema.ValidationError as err:
+        return jsonify(code=400, message=str(err)), 400
+
+    has_access = auth.service_access(request)
+
+    tasks = []
+    for ref in inputs:
+        service_guid, task_guid = ref["service_guid"], ref["task_guid"]
+        try:
+            service = scol.get_by_guid(service_guid)
+        except scol.ServiceNotFoundError:
+            tasks.append(_not_found(service_guid, task_guid))
+            continue
+
+        if not has_access(service_guid):
+            error_msg = "you are trying to get tasks of some services on which you don't have rights."
+            return jsonify(code=401, message=error_msg), 401
+
+        try:
+            task = service.task_list.get_task_by_guid(task_guid)
+        except TaskNotFoundError:
+            tasks.append(_not_found(service_guid, task_guid))
+            continue
+
+        tasks.append(task_view(task, service))
+
+    return jsonify(tasks), 200
+
+
+def _not_found(service_guid, task_guid):
+    """
+    entry of the response for a task that doesn't exist, so one missing task doesn't fail the whole request
+    """
+    return {'service_guid': service_guid, 'guid': task_guid, 'state': None, 'error': 'not found'}
@@ -5,6 +5,7 @@ import json
 from zerorobot import service_collection as scol
 
 from zerorobot.server import auth
+from zerorobot.template import actions
 
 
 @auth.service.login_required
@@ -29,16 +30,4 @@ def get_actions_list(obj):
     extract the method name that the service has that are not the
     method comming from the template base
     """
-    skip = ['load', 'save', 'schedule_action', 'recurring_action', 'validate', 'add_delete_callback']
-    actions = []
-    for name in dir(obj):
-        if name in skip or name.startswith('_'):
-            continue
-        # test if the attribute is a property, we use this so we don't actually
-        # call the property, but just detect it
-        if isinstance(getattr(type(obj), name, None), property):
-            actions.append({'name': name})
-        elif callable(getattr(obj, name)):
-            actions.append({'name': name})
-
-    return actions
+    return [{'name': name} for name in actions.list_actions(type(obj))]
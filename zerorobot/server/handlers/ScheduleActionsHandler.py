@@ -0,0 +1,104 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+import json
+import os
+
+import jsonschema
+from flask import jsonify, request
+from jsonschema import Draft4Validator
+
+from jumpscale import j
+from zerorobot import service_collection as scol
+from zerorobot.server import auth
+from zerorobot.server.handlers.views import task_view
+from zerorobot.template.exceptions import ActionNotFoundError, BadActionArgumentError
+from zerorobot.template_uid import TemplateUID
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+TaskBulkCreate_schema = json.load(open(dir_path + "/schema/TaskBulkCreate_schema.json"))
+TaskBulkCreate_list_schema = {"type": "array", "items": TaskBulkCreate_schema}
+TaskBulkCreate_schema_resolver = jsonschema.RefResolver("file://" + dir_path + "/schema/", TaskBulkCreate_schema)
+TaskBulkCreate_schema_validator = Draft4Validator(TaskBulkCreate_list_schema, resolver=TaskBulkCreate_schema_resolver)
+
+
+@auth.admin_user.login_required
+def ScheduleActionsHandler():
+    """
+    Schedule actions on many services at once
+    It is handler for POST /tasks
+
+    All the entries are validated before any task is created,
+    so either all the actions are scheduled or none
+    """
+    inputs = request.get_json()
+    try:
+        TaskBulkCreate_schema_validator.validate(inputs)
+    except jsonschema.ValidationError as err:
+        return jsonify(code=400, message=str(err)), 400
+
+    # return the task already waiting in the task list for the same action and arguments, if any
+    coalesce = request.args.get('coalesce')
+    coalesce = j.data.types.bool.fromString(coalesce) if coalesce is not None else False
+
+    has_access = auth.service_access(request)
+
+    to_schedule = []
+    for i, item in enumerate(inputs):
+        try:
+            services = _find_services(item)
+        except (ValueError, scol.ServiceNotFoundError) as err:
+            return jsonify(code=400, message="entry %d: %s" % (i, err.args[0])), 400
+
+        for service in services:
+            if not has_access(service.guid):
+                error_msg = "you are trying to schedule action on some services on which you don't have rights."
+                return jsonify(code=401, message=error_msg), 401
+
+            try:
+                # only validate, nothing is scheduled until all the entries are valid
+                service._check_action(item["action_name"], item.get("args"))
+            except ActionNotFoundError:
+                err_msg = "entry %d: action '%s' not found" % (i, item["action_name"])
+                return jsonify(code=400, message=err_msg), 400
+            except BadActionArgumentError as err:
+                return jsonify(code=400, message="entry %d: %s" % (i, str(err))), 400
+            to_schedule.append((service, item["action_name"], item.get("args")))
+
+    tasks = []
+    for service, action_name, args in to_schedule:
+        # go through schedule_action like POST /services/<guid>/task_list, templates can override it
+        task = service.schedule_action(action=action_name, args=args, coalesce=coalesce)
+        tasks.append(task_view(task, service))
+
+    return jsonify(tasks), 201
+
+
+def _find_services(item):
+    """
+    return the services targeted by an entry of the request,
+    either the service with service_guid or all the services matching service_name and template
+    """
+    guid = item.get("service_guid")
+    if guid:
+        return [scol.get_by_guid(guid)]
+
+    kwargs = {}
+    if item.get("service_name"):
+        kwargs["name"] = item["service_name"]
+    if item.get("template") and '/' not in item["template"]:
+        # allow to use just the name of the template instead of the full uid
+        kwargs["template_name"] = item["template"]
+    elif item.get("template"):
+        template_uid = TemplateUID.parse(item["template"])
+        kwargs.update({
+            "template_host": template_uid.host,
+            "template_account": template_uid.account,
+            "template_repo": template_uid.repo,
+            "template_name": template_uid.name,
+            "template_version": template_uid.version,
+        })
+    # filter out None value
+    kwargs = {k: v for k, v in kwargs.items() if v is not None}
+    if not kwargs:
+        raise ValueError("service_guid, service_name or template must be specified")
+    return scol.find(**kwargs)
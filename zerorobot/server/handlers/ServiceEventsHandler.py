@@ -0,0 +1,23 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+from flask import jsonify
+
+from zerorobot import service_collection as scol
+from zerorobot.server import auth
+from zerorobot.task import events
+
+from .sse import task_events_response
+
+
+@auth.service.login_required
+def ServiceEventsHandler(service_guid):
+    '''
+    Stream the changes of state of the tasks of a service as server-sent events
+    It is handler for GET /services/<service_guid>/events
+    '''
+    try:
+        scol.get_by_guid(service_guid)
+    except scol.ServiceNotFoundError:
+        return jsonify(code=404, message="service with guid '%s' not found" % service_guid), 404
+
+    return task_events_response(events.subscribe(service_guid))
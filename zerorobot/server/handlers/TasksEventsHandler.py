@@ -0,0 +1,19 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+from flask import request
+
+from zerorobot.server import auth
+from zerorobot.task import events
+
+from .sse import task_events_response
+
+
+@auth.admin_user.login_required
+def TasksEventsHandler():
+    '''
+    Stream the changes of state of the tasks of all the services as server-sent events
+    only the tasks of the services the client has the right to use are sent
+    It is handler for GET /tasks/events
+    '''
+    has_access = auth.service_access(request)
+    return task_events_response(events.subscribe(), has_access=has_access)
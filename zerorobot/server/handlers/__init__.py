@@ -15,8 +15,12 @@ from .getTaskListHandler import getTaskListHandler
 from .AddTaskToListHandler import AddTaskToListHandler
 from .GetTaskHandler import GetTaskHandler
 from .CancelTaskHandler import CancelTaskHandler
+from .ScheduleActionsHandler import ScheduleActionsHandler
+from .GetTasksStatusHandler import GetTasksStatusHandler
+from .TasksEventsHandler import TasksEventsHandler
 from .GetLogsHandler import GetLogsHandler
 from .ListActionsHandler import ListActionsHandler
+from .ServiceEventsHandler import ServiceEventsHandler
 from .ListTemplatesHandler import ListTemplatesHandler
 from .AddTemplateRepoHandler import AddTemplateRepoHandler
 from .CheckoutVersionTemplateRepoHandler import CheckoutVersionTemplateRepoHandler
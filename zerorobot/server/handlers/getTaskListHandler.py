@@ -5,6 +5,7 @@ from jumpscale import j
 from zerorobot import service_collection as scol
 from zerorobot.server import auth
 from zerorobot.server.handlers.views import task_view
+from zerorobot.task.storage.base import TaskNotFoundError
 
 
 @auth.service.login_required
@@ -22,6 +23,32 @@ def getTaskListHandler(service_guid):
     if all_task is not None:
         all_task = j.data.types.bool.fromString(all_task)
 
-    tasks = [task_view(t, service) for t in service.task_list.list_tasks(all=all_task)]
+    # optional filters and pagination
+    # request.args.get returns None when the conversion fails
+    since = request.args.get('since', type=_positive_int)
+    limit = request.args.get('limit', type=_positive_int)
+    for name, value in [('since', since), ('limit', limit)]:
+        if name in request.args and value is None:
+            return jsonify(code=400, message="%s must be a positive integer" % name), 400
+
+    try:
+        tasks = service.task_list.list_tasks(
+            all=all_task,
+            state=request.args.get('state'),
+            action_name=request.args.get('action_name'),
+            since=since,
+            limit=limit,
+            cursor=request.args.get('cursor'))
+    except TaskNotFoundError:
+        return jsonify(code=400, message="cursor '%s' doesn't match any task" % request.args.get('cursor')), 400
+
+    tasks = [task_view(t, service) for t in tasks]
 
     return jsonify(tasks), 200
+
+
+def _positive_int(value):
+    value = int(value)
+    if value < 0:
+        raise ValueError()
+    return value
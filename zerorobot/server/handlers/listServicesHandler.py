@@ -21,12 +21,18 @@ def listServicesHandler():
         if val:
             kwargs[x] = val
 
-    if auth.god_jwt.check_god_token(request):
-        # god token passed, we list all the services
-        services = [service_view(s) for s in scol.find(**kwargs)]
-    else:
-        # normal flow, only return service for which the user has the secret
-        allowed_services = auth.user_jwt.extract_service_guid(request)
-        services = [service_view(s) for s in scol.find(**kwargs) if s.guid in allowed_services or scol.is_service_public(s.guid) is True]
+    # only render the fields asked for, rendering the state of all the services is expensive
+    fields = request.args.get('fields')
+    if fields:
+        fields = {f.strip() for f in fields.split(',')}
+
+    services = scol.find(**kwargs)
+    if not auth.god_jwt.check_god_token(request):
+        # normal flow, only return service for which the user has the secret or that are public
+        allowed_services = set(auth.user_jwt.extract_service_guid(request))
+        public_services = scol.public_guids()
+        services = [s for s in services if s.guid in allowed_services or s.guid in public_services]
+
+    services = [service_view(s, fields=fields) for s in services]
 
     return json.dumps(services), 200, {"Content-type": 'application/json'}
@@ -0,0 +1,47 @@
+"""
+helpers to stream the changes of state of the tasks as server-sent events
+"""
+
+import json
+
+from flask import Response
+
+from .views import task_view
+
+# seconds between two keep alive comments on an idle stream,
+# writing on the connection is the only way to notice that the client went away
+KEEPALIVE = 15
+
+
+def task_events_response(subscriber, has_access=None):
+    """
+    return a response streaming the events received by subscriber
+    if has_access is given, only the tasks of the services for which has_access(guid) is True are sent
+
+    each change of state is sent as a 'task' event with the task as data, in the same format as GetTask.
+    if the client doesn't consume the events fast enough, an 'overflow' event is sent and the stream is closed
+    """
+    def stream():
+        try:
+            # send something right away so the client knows the stream is open
+            yield ': connected\n\n'
+            while True:
+                event = subscriber.get(timeout=KEEPALIVE)
+                if event is None:
+                    if subscriber.overflow:
+                        yield 'event: overflow\ndata: {}\n\n'
+                        return
+                    yield ': keepalive\n\n'
+                    continue
+
+                task, state = event
+                if has_access is not None and not has_access(task.service.guid):
+                    continue
+                view = task_view(task, task.service)
+                # the task could have changed again since the event was published
+                view['state'] = state
+                yield 'event: task\ndata: %s\n\n' % json.dumps(view)
+        finally:
+            subscriber.close()
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
@@ -6,18 +6,24 @@ from zerorobot import service_collection as scol
 from zerorobot import config
 
 
-def service_view(service):
+def service_view(service, fields=None):
+    """
+    @param fields: names of the fields to render, all the fields if None
+    """
     s = {
         "template": str(service.template_uid),
         "version": service.version,
         "name": service.name,
         "guid": service.guid,
-        "state": state_view(service.state),
         "actions": [],
         "public": scol.is_service_public(service.guid)
     }
-    if config.god:
+    if not fields or 'state' in fields:
+        s['state'] = state_view(service.state)
+    if config.god and (not fields or 'data' in fields):
         s['data'] = service.data
+    if fields:
+        s = {k: v for k, v in s.items() if k in fields}
     return s
 
 
@@ -95,3 +95,12 @@ def ListActions(service_guid):
     It is handler for GET /services/<service_guid>/actions
     """
     return handlers.ListActionsHandler(service_guid)
+
+
+@services_api.route('/services/<service_guid>/events', methods=['GET'])
+def ServiceEvents(service_guid):
+    """
+    Stream the changes of state of the tasks of a service as server-sent events
+    It is handler for GET /services/<service_guid>/events
+    """
+    return handlers.ServiceEventsHandler(service_guid)
@@ -0,0 +1,34 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+from flask import Blueprint
+from . import handlers
+
+
+tasks_api = Blueprint('tasks_api', __name__)
+
+
+@tasks_api.route('/tasks', methods=['POST'])
+def ScheduleActions():
+    """
+    Schedule actions on many services at once
+    It is handler for POST /tasks
+    """
+    return handlers.ScheduleActionsHandler()
+
+
+@tasks_api.route('/tasks/status', methods=['POST'])
+def GetTasksStatus():
+    """
+    Retrieve the detail of many tasks, of any service, at once
+    It is handler for POST /tasks/status
+    """
+    return handlers.GetTasksStatusHandler()
+
+
+@tasks_api.route('/tasks/events', methods=['GET'])
+def TasksEvents():
+    """
+    Stream the changes of state of the tasks of all the services as server-sent events
+    It is handler for GET /tasks/events
+    """
+    return handlers.TasksEventsHandler()
@@ -5,11 +5,14 @@ other services and class need to use this module method to create, access, list
 import os
 
 from jumpscale import j
-from zerorobot.sqlite import SqliteIndex
+from zerorobot.service_index import ServiceIndex
+from zerorobot.template import executor, recurring
 from zerorobot.template_uid import TemplateUID
 
-_sqlite_index = SqliteIndex()
+_index = ServiceIndex()
 _guid_index = {}
+# guids of the public services
+_public_guids = set()
 
 
 def add(service):
@@ -18,14 +21,16 @@ def add(service):
             message="a service with guid=%s already exist" % service.guid,
             service=_guid_index[service.guid])
     _guid_index[service.guid] = service
-    _sqlite_index.add_service(service)
+    _index.add_service(service)
+    if getattr(service, '_public', False) is True:
+        _public_guids.add(service.guid)
 
     logger = j.logger.get('zerorobot')
     logger.debug("add service %s to collection" % service)
 
 
 def find(**kwargs):
-    guids = _sqlite_index.find(**kwargs)
+    guids = _index.find(**kwargs)
     services = [_guid_index[guid] for guid in guids]
     return services
 
@@ -58,19 +63,30 @@ def is_service_public(guid):
     :return: true is service is public, false otherwise
     :rtype: boolean
     """
-    service = get_by_guid(guid)
-    return getattr(service, '_public', False) is True
+    if guid not in _guid_index:
+        raise ServiceNotFoundError("service with guid=%s not found" % guid)
+    return guid in _public_guids
+
+
+def public_guids():
+    """
+    return the set of the guids of the public services
+    the set is kept up to date by the collection, it must not be modified
+    """
+    return _public_guids
 
 
 def set_service_public(guid):
     service = get_by_guid(guid)
     service._public = True
+    _public_guids.add(guid)
 
 
 def delete(service):
     if service.guid in _guid_index:
         del _guid_index[service.guid]
-    _sqlite_index.delete_service(service)
+    _index.delete_service(service)
+    _public_guids.discard(service.guid)
 
     logger = j.logger.get('zerorobot')
     logger.debug("delete service %s from collection" % service)
@@ -113,13 +129,15 @@ def upgrade(service, new_template, force=False):
     logger.info("upgrade service %s (%s) to %s", service.name, service.guid, new_template.template_uid)
     service.template_uid = new_template.template_uid
 
-    # if there is a task running for this service, wait for it to finish, before stopping the service
-    current_task = service.task_list.current
-    if current_task is not None:
-        current_task.wait(timeout=300)  # FIXME: fixed timeout, no timeout ?
+    # if there are tasks running for this service, wait for them to finish, before stopping the service
+    for task in service.task_list.running:
+        task.wait(timeout=300)  # FIXME: fixed timeout, no timeout ?
 
     # stop the services
+    recurring.scheduler.cancel(service)
+    executor.pool.stop(service, timeout=executor.STOP_TIMEOUT)
     service.gl_mgr.stop_all(wait=True)
+    service.task_list._done.close()
     service.save()
 
     # remove service from memory
@@ -136,7 +154,7 @@ def upgrade(service, new_template, force=False):
     try:
         new_service.validate()
     except Exception as err:
-        service.gl_mgr.stop('executor')
+        executor.pool.stop(new_service, timeout=executor.STOP_TIMEOUT)
         logger.error("fail to validate service %s: %s" % (new_service.guid, str(err)))
         logger.error(
             "this service is not going to process its task queue. Upgrade the service again to make the 'validate' action to pass")
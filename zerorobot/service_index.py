@@ -0,0 +1,91 @@
+"""
+This module holds the logic of indexing services in memory so they can be searched fast.
+For each column a service can be searched on, a dict maps the value of the column to the guids
+of the services having this value. A search intersects the sets of guids of all the columns filtered on.
+"""
+
+COLUMNS = (
+    'guid',
+    'name',
+    'template_uid',
+    'template_host',
+    'template_account',
+    'template_repo',
+    'template_name',
+    'template_version',
+)
+
+
+def _columns(service):
+    uid = service.template_uid
+    return (service.guid,
+            service.name,
+            str(uid),
+            uid.host,
+            uid.account,
+            uid.repo,
+            uid.name,
+            uid.version)
+
+
+class ServiceIndex:
+
+    def __init__(self):
+        # for each column: value -> guids of the services with this value
+        # guids are kept in dicts used as ordered sets, so results come back in insertion order
+        self._indexes = {col: {} for col in COLUMNS}
+        # values indexed for each guid, so a service is removed from the index
+        # even if its attributes changed since it has been added
+        self._values = {}
+
+    def close(self):
+        for index in self._indexes.values():
+            index.clear()
+        self._values.clear()
+
+    def add_service(self, service):
+        values = _columns(service)
+        if service.guid in self._values:
+            self.delete_service(service)
+        self._values[service.guid] = values
+        for col, val in zip(COLUMNS, values):
+            if val is None:
+                continue
+            self._indexes[col].setdefault(val, {})[service.guid] = None
+
+    def delete_service(self, service):
+        values = self._values.pop(service.guid, None)
+        if values is None:
+            return
+        for col, val in zip(COLUMNS, values):
+            if val is None:
+                continue
+            index = self._indexes[col]
+            guids = index.get(val)
+            if guids is None:
+                continue
+            guids.pop(service.guid, None)
+            if not guids:
+                del index[val]
+
+    def find(self, **kwargs):
+        """
+        return the guids of the services for which all the columns passed in kwargs
+        have the value given, in the order the services have been added
+        """
+        if not kwargs:
+            return list(self._values.keys())
+
+        buckets = []
+        for col, val in kwargs.items():
+            if col not in self._indexes:
+                raise ValueError("can't search services on %s, supported columns are: %s" % (col, ', '.join(COLUMNS)))
+            guids = self._indexes[col].get(val)
+            if not guids:
+                return []
+            buckets.append(guids)
+
+        # walk the smallest set and check the guids against the others
+        buckets.sort(key=len)
+        smallest, others = buckets[0], buckets[1:]
+        return [guid for guid in smallest if all(guid in guids for guids in others)]
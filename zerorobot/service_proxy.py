@@ -6,10 +6,13 @@ When a service or robot ask the creation of a service to another robot, a proxy
 so the robot see the service as if it as local to him while in reality the service is managed by another robot.
 """
 
+import time
 import urllib
 
 from requests.exceptions import HTTPError
 
+import gevent
+
 from jose import jwt
 from jumpscale import j
 from zerorobot.dsl import config_mgr
@@ -20,6 +23,10 @@ from zerorobot.template.state import ServiceState
 
 logger = j.logger.get(__name__)
 
+# number of seconds the remote robot is asked to wait for the state of a task to change
+# before answering, when waiting for a task
+LONG_POLL_TIMEOUT = 30
+
 
 class ServiceProxy():
     """
@@ -80,13 +87,15 @@ class ServiceProxy():
 
         return logs.logs
 
-    def schedule_action(self, action, args=None):
+    def schedule_action(self, action, args=None, coalesce=False):
         """
         Do a call on a remote ZeroRobot to add an action to the task list of
         the corresponding service
 
         @param action: action is the name of the action to add to the task list
         @param args: dictionnary of the argument to pass to the action
+        @param coalesce: if True and the same action with the same arguments is already waiting in the task list,
+                         return the waiting task instead of adding a new one
         """
         req = {
             "action_name": action,
@@ -94,8 +103,10 @@ class ServiceProxy():
         if args:
             req["args"] = args
 
+        query_params = {'coalesce': True} if coalesce else None
         try:
-            task, _ = self._zrobot_client.api.services.AddTaskToList(req, service_guid=self.guid)
+            task, _ = self._zrobot_client.api.services.AddTaskToList(
+                req, service_guid=self.guid, query_params=query_params)
         except HTTPError as err:
             if err.response.status_code == 400:
                 raise RuntimeError(err.response.json()['message'])
@@ -119,9 +130,20 @@ class TaskListProxy:
             service_guid=self._service.guid, query_params={'all': False})
         return len(tasks) <= 0
 
-    def list_tasks(self, all=False):
+    def list_tasks(self, all=False, state=None, action_name=None, since=None, limit=None, cursor=None):
+        """
+        @param all: if True, also return the task that have been executed
+        @param state: only return the tasks in this state
+        @param action_name: only return the tasks of this action
+        @param since: only return the tasks created after this timestamp
+        @param limit: maximum number of tasks returned
+        @param cursor: guid of the last task of the previous page
+        """
+        query_params = {'all': all}
+        filters = {'state': state, 'action_name': action_name, 'since': since, 'limit': limit, 'cursor': cursor}
+        query_params.update({k: v for k, v in filters.items() if v is not None})
         tasks, _ = self._service._zrobot_client.api.services.getTaskList(
-            service_guid=self._service.guid, query_params={'all': all})
+            service_guid=self._service.guid, query_params=query_params)
         return [_task_proxy_from_api(t, self._service) for t in tasks]
 
     def get_task_by_guid(self, guid):
@@ -158,42 +180,111 @@ class TaskProxy(Task):
     def execute(self):
         raise RuntimeError("a TaskProxy should never be executed")
 
+    def _refresh(self):
+        """
+        fetch the detail of the task from the remote ZeroRobot
+        """
+        task, _ = self.service._zrobot_client.api.services.GetTask(
+            task_guid=self.guid, service_guid=self.service.guid)
+        self._update(task)
+
+    def _update(self, task):
+        """
+        update the task with the detail returned by the API
+        """
+        state = task.state.value
+        if state in (TASK_STATE_OK, TASK_STATE_ERROR):
+            # the task has been executed, its detail won't change anymore
+            self._state = state
+        if task.result:
+            self._result = j.data.serializer.json.loads(task.result)
+        if task.duration:
+            self._duration = task.duration
+        if task.eco:
+            self._eco = Eco.from_dict(task.eco.as_dict())
+        return state
+
     @property
     def result(self):
-        if self._result is None:
-            task, _ = self.service._zrobot_client.api.services.GetTask(
-                task_guid=self.guid, service_guid=self.service.guid)
-            if task.result:
-                self._result = j.data.serializer.json.loads(task.result)
+        if self._result is None and not self._executed:
+            self._refresh()
         return self._result
 
     @property
     def duration(self):
-        if self._duration is None:
-            task, _ = self.service._zrobot_client.api.services.GetTask(
-                task_guid=self.guid, service_guid=self.service.guid)
-            self._duration = task.duration
+        if self._duration is None and not self._executed:
+            self._refresh()
         return self._duration
 
     @property
     def state(self):
+        if self._executed:
+            return self._state
         task, _ = self.service._zrobot_client.api.services.GetTask(task_guid=self.guid, service_guid=self.service.guid)
-        return task.state.value
+        return self._update(task)
 
     @state.setter
     def state(self, value):
         logger.warning("you can't change the statet of a TaskProxy")
         return
 
+    @property
+    def _executed(self):
+        return self._state in (TASK_STATE_OK, TASK_STATE_ERROR)
+
     @property
     def eco(self):
-        if self._eco is None:
-            task, _ = self.service._zrobot_client.api.services.GetTask(
-                task_guid=self.guid, service_guid=self.service.guid)
-            if task.eco:
-                self._eco = Eco.from_dict(task.eco.as_dict())
+        if self._eco is None and not self._executed:
+            self._refresh()
         return self._eco
 
+    def wait(self, timeout=None, die=False):
+        """
+        wait blocks until the remote task has been executed
+        if timeout is specified and the task didn't finished within timeout seconds,
+        raises TimeoutError
+
+        if die is True and the state is TASK_STATE_ERROR after the wait, the eco of the exception will be raised
+        """
+        # wait for the task to start before counting the timeout
+        state = self.state
+        while state == TASK_STATE_NEW:
+            state = self._wait_change(state)
+
+        def wait():
+            nonlocal state
+            while state in (TASK_STATE_NEW, TASK_STATE_RUNNING):
+                state = self._wait_change(state)
+
+        if timeout:
+            # ensure the type is correct
+            timeout = float(timeout)
+            try:
+                gevent.with_timeout(timeout, wait)
+            except gevent.Timeout:
+                self._cancel()
+                raise TimeoutError()
+        else:
+            wait()
+
+        return self._check_error(die)
+
+    def _wait_change(self, state):
+        """
+        ask the remote robot to answer once the state of the task changes, or after LONG_POLL_TIMEOUT seconds
+        return the new state of the task
+
+        @param state: last known state of the task
+        """
+        started = time.time()
+        task, _ = self.service._zrobot_client.api.services.GetTask(
+            task_guid=self.guid, service_guid=self.service.guid, query_params={'wait': LONG_POLL_TIMEOUT})
+        new_state = self._update(task)
+        if new_state == state and time.time() - started < LONG_POLL_TIMEOUT / 2:
+            # the robot doesn't support long polling, fall back to polling
+            gevent.sleep(self._sleep_period)
+        return new_state
+
     def _cancel(self):
         self.service._zrobot_client.api.services.CancelTask(task_guid=self.guid, service_guid=self.service.guid)
 
@@ -207,3 +298,77 @@ def _task_proxy_from_api(task, service):
         t._eco = Eco.from_dict(task.eco.as_dict())
 
     return t
+
+
+def wait_all(tasks, timeout=60, die=False, min_period=0.5, max_period=5):
+    """
+    wait for a list of remote tasks to be executed
+
+    The state of all the tasks of a same ZeroRobot is fetched in a single request.
+    The polling period starts at min_period and doubles, up to max_period, every time no task has finished
+    since the previous request.
+
+    :param tasks: iterable that contains TaskProxy objects
+    :type tasks: iterable
+    :param timeout: maximum number of seconds to wait for all the tasks, the tasks not executed
+                    after timeout seconds are cancelled and skipped, defaults to 60
+    :type timeout: int, optional
+    :param die: if True, raise any exception that was raise in the tasks, defaults to False
+    :type die: bool, optional
+    :raises TypeError: raised if the iterable does not contains only TaskProxy
+    :raises TaskNotFoundError: raised once the other tasks are done, if some tasks don't exist on their ZeroRobot
+    :return: a list of all the result from the executed tasks, in the order of tasks
+    :rtype: list
+    """
+    tasks = list(tasks)
+    for task in tasks:
+        if not isinstance(task, TaskProxy):
+            raise TypeError("element of tasks should be an instance of zerorobot.service_proxy.TaskProxy")
+
+    # tasks that don't exist on their robot, they are not polled anymore
+    missing = []
+
+    def poll():
+        period = min_period
+        while True:
+            # group the tasks not executed yet by robot
+            pending = {}
+            for task in tasks:
+                if not task._executed and task not in missing:
+                    client = task.service._zrobot_client
+                    pending.setdefault(id(client), (client, []))[1].append(task)
+            if not pending:
+                return
+
+            finished = False
+            for client, robot_tasks in pending.values():
+                req = [{'service_guid': t.service.guid, 'task_guid': t.guid} for t in robot_tasks]
+                results, _ = client.api.tasks.GetTasksStatus(req)
+                for task, result in zip(robot_tasks, results):
+                    if result.error:
+                        missing.append(task)
+                        continue
+                    task._update(result)
+                    finished = finished or task._executed
+
+            period = min_period if finished else min(period * 2, max_period)
+            gevent.sleep(period)
+
+    try:
+        if timeout:
+            gevent.with_timeout(float(timeout), poll)
+        else:
+            poll()
+    except gevent.Timeout:
+        for task in tasks:
+            if not task._executed and task not in missing:
+                task._cancel()
+
+    if missing:
+        raise TaskNotFoundError("tasks not found: %s" % ', '.join(t.guid for t in missing))
+
+    results = []
+    for task in tasks:
+        if task._executed:
+            results.append(task._check_error(die).result)
+    return results
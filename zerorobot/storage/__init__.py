@@ -1,14 +1,26 @@
 from .filesystem import FileSystemServiceStorage
+from .scheduler import SaveScheduler
 from .zdb import ZDBServiceStorage
 
+# durability of the saves done after the actions of the services
+DURABILITY_SYNC = 'sync'  # the service is written before the next action is executed
+DURABILITY_DELAYED = 'delayed'  # the service is written in the background by the save scheduler
+
 _store = None
+_scheduler = None
 
 
 def init(config):
-    global _store
+    global _store, _scheduler
+    if _scheduler is not None:
+        _scheduler.flush()
+    _scheduler = None
+    if config.save_durability == DURABILITY_DELAYED:
+        _scheduler = SaveScheduler(window=config.save_window)
+
     data_repo = config.data_repo
     if data_repo.type == 'fs':
-        _store = FileSystemServiceStorage(data_repo.path)
+        _store = FileSystemServiceStorage(data_repo.path, format=config.data_format)
     elif data_repo.type == 'zdb':
         _store = ZDBServiceStorage(addr=data_repo.hostname,
                                    port=data_repo.port,
@@ -26,19 +38,58 @@ def save(service):
     return _store.save(service)
 
 
+def mark_dirty(service):
+    """
+    save a service that changed
+    depending on the configured durability, the service is saved right away
+    or scheduled to be saved in the background
+    """
+    if _scheduler is None:
+        return service.save()
+    _scheduler.mark(service)
+
+
+def flush():
+    """
+    write all the services scheduled to be saved
+    """
+    if _scheduler is not None:
+        _scheduler.flush()
+
+
 def list():
     if not _store:
         raise RuntimeError("storage has not be initialized")
     return _store.list()
 
 
+def list_keys():
+    if not _store:
+        raise RuntimeError("storage has not be initialized")
+    return _store.list_keys()
+
+
+def load(key):
+    if not _store:
+        raise RuntimeError("storage has not be initialized")
+    return _store.load(key)
+
+
 def delete(service):
     if not _store:
         raise RuntimeError("storage has not be initialized")
+    # make sure a scheduled save doesn't write the service back after it's deleted
+    if _scheduler is not None:
+        _scheduler.discard(service)
     return _store.delete(service)
 
 
 def health():
+    """
+    the storage is healthy if it is writable and no service is failing to be written in the background
+    """
     if not _store:
         raise RuntimeError("storage has not be initialized")
+    if _scheduler is not None and _scheduler.failing:
+        return False
     return _store.health()
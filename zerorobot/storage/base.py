@@ -1,20 +1,64 @@
+import hashlib
 from abc import ABC, abstractmethod
 
+import msgpack
+
+from zerorobot.prometheus.robot import service_saves
 from zerorobot.task.task import TASK_STATE_RUNNING
 
 
 class ServiceStorageBase(ABC):
 
-    @abstractmethod
+    def __init__(self):
+        # hash of the content of the services the last time they were written, keyed by guid
+        self._saved = {}
+
     def save(self, service):
         """
         save a service object
+        nothing is written if the service didn't change since the last time it was saved
+
+        :param service: service
+        :type service: zerorobot.template.base
+        :return: True if the service has been written
+        :rtype: bool
+        """
+        serialized_service = _serialize_service(service)
+        digest = _digest(serialized_service)
+        if self._saved.get(service.guid) == digest:
+            service_saves.labels(result='skipped').inc()
+            return False
+
+        self._write_service(service, serialized_service)
+        self._saved[service.guid] = digest
+        service_saves.labels(result='saved').inc()
+        return True
+
+    @abstractmethod
+    def _write_service(self, service, serialized_service):
+        """
+        write a service to the storage
 
         :param service: service
         :type service: zerorobot.template.base
+        :param serialized_service: data of the service as returned by _serialize_service
+        :type serialized_service: dict
+        """
+
+    @abstractmethod
+    def list_keys(self):
+        """
+        yield the key of all the services found in the storage
+        the keys are passed to load to get the data of the services
         """
 
     @abstractmethod
+    def load(self, key):
+        """
+        return the data of the service identified by key
+        see list for the format of the returned dict
+        """
+
     def list(self):
         """
         yield all the services data found in the storage
@@ -52,8 +96,9 @@ class ServiceStorageBase(ABC):
             ]
         }
         """
+        for key in self.list_keys():
+            yield self.load(key)
 
-    @abstractmethod
     def delete(self, service):
         """
         delete a service
@@ -61,6 +106,17 @@ class ServiceStorageBase(ABC):
         :param service: service
         :type service: zerorobot.template.base
         """
+        self._saved.pop(service.guid, None)
+        self._delete_service(service)
+
+    @abstractmethod
+    def _delete_service(self, service):
+        """
+        remove a service from the storage
+
+        :param service: service
+        :type service: zerorobot.template.base
+        """
 
     @abstractmethod
     def health(self):
@@ -87,6 +143,14 @@ def _serialize_service(service):
     }
 
 
+def _digest(serialized_service):
+    """
+    hash of the content of a service, used to detect if it changed since it was last saved
+    """
+    blob = msgpack.dumps(serialized_service, use_bin_type=True, default=str)
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
 def _serialize_service_info(service):
     return {
         'template': str(service.template_uid),
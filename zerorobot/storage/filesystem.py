@@ -1,16 +1,44 @@
 import os
 import shutil
 
+import msgpack
+
 from jumpscale import j
 
 from .base import ServiceStorageBase, _serialize_service
 
+logger = j.logger.get(__name__)
+
+# formats of the files used to store a service
+FORMAT_YAML = 'yaml'  # one yaml file for each part of the service
+FORMAT_MSGPACK = 'msgpack'  # a single msgpack file with all the parts of the service
+FORMATS = [FORMAT_YAML, FORMAT_MSGPACK]
+
+# name of the yaml file of each part of the service
+_yaml_files = {
+    'service': 'service.yaml',
+    'states': 'state.yaml',
+    'data': 'data.yaml',
+    'tasks': 'tasks.yaml',
+}
+_snapshot_file = 'service.msgpack'
+
 
 class FileSystemServiceStorage(ServiceStorageBase):
+    """
+    store the services in a directory tree on the local filesystem
+
+    the services are written in the format passed to the constructor.
+    Services stored in the other format are still loaded and converted
+    to the configured format when loaded
+    """
 
-    def __init__(self, path):
+    def __init__(self, path, format=FORMAT_YAML):
         super().__init__()
+        if format not in FORMATS:
+            raise ValueError("unsupported service storage format %s, supported formats are %s" % (format, FORMATS))
         self._root = path
+        self.format = format
         if not os.path.exists(path):
             os.makedirs(path)
 
@@ -25,46 +53,53 @@ class FileSystemServiceStorage(ServiceStorageBase):
             service.guid
         )
 
-    def save(self, service):
+    def _write_service(self, service, serialized_service):
         path = self._service_path(service)
         if not os.path.exists(path):
             os.makedirs(path)
+        self._write(path, serialized_service)
 
-        service_path = os.path.join(path, 'service.yaml.tmp')
-        state_path = os.path.join(path, 'state.yaml.tmp')
-        data_path = os.path.join(path, 'data.yaml.tmp')
-        task_path = os.path.join(path, 'tasks.yaml.tmp')
+    def _write(self, path, serialized_service):
+        if self.format == FORMAT_MSGPACK:
+            _write_snapshot(path, serialized_service)
+            # the service is now only stored in the snapshot
+            _remove_yaml(path)
+        else:
+            _write_yaml(path, serialized_service)
+            _remove_snapshot(path)
 
-        serialized_service = _serialize_service(service)
-        j.data.serializer.yaml.dump(service_path, serialized_service['service'])
-        j.data.serializer.yaml.dump(state_path, serialized_service['states'])
-        j.data.serializer.yaml.dump(data_path, serialized_service['data'])
-        j.data.serializer.yaml.dump(task_path, serialized_service['tasks'])
+    def list_keys(self):
+        """
+        yield the directory of all the services stored
+        """
+        for service_dir in j.sal.fs.listDirsInDir(self._root, recursive=True):
+            if os.path.exists(os.path.join(service_dir, _snapshot_file)) or \
+                    os.path.exists(os.path.join(service_dir, _yaml_files['service'])):
+                yield service_dir
 
-        j.sal.fs.moveFile(service_path, service_path[:-4])
-        j.sal.fs.moveFile(state_path, state_path[:-4])
-        j.sal.fs.moveFile(data_path, data_path[:-4])
-        j.sal.fs.moveFile(task_path, task_path[:-4])
+    def load(self, key):
+        """
+        return the data of the service stored in the directory key
+        if it is stored in another format then the configured one, it is converted
+        """
+        serialized_service, format = self.read(key)
+        if format != self.format:
+            logger.info("convert service stored in %s from %s to %s", key, format, self.format)
+            self._write(key, serialized_service)
+        return serialized_service
 
-    def list(self):
-        for service_dir in j.sal.fs.listDirsInDir(self._root, recursive=True):
-            info_path = os.path.join(service_dir, 'service.yaml')
-            if not os.path.exists(info_path):
-                continue
-
-            info_data = j.data.serializer.yaml.load(info_path)
-            state_data = j.data.serializer.yaml.load(os.path.join(service_dir, 'state.yaml'))
-            data_data = j.data.serializer.yaml.load(os.path.join(service_dir, 'data.yaml'))
-            tasks_data = j.data.serializer.yaml.load(os.path.join(service_dir, 'tasks.yaml'))
-
-            yield {
-                'service': info_data,
-                'states': state_data,
-                'data': data_data,
-                'tasks': tasks_data,
-            }
-
-    def delete(self, service):
+    def read(self, key):
+        """
+        return the data of the service stored in the directory key and the format it is stored in
+        the configured format is used if the service is stored in both formats
+        """
+        has_snapshot = os.path.exists(os.path.join(key, _snapshot_file))
+        has_yaml = os.path.exists(os.path.join(key, _yaml_files['service']))
+        if has_snapshot and (self.format == FORMAT_MSGPACK or not has_yaml):
+            return _read_snapshot(key), FORMAT_MSGPACK
+        return _read_yaml(key), FORMAT_YAML
+
+    def _delete_service(self, service):
         path = self._service_path(service)
         if path and os.path.exists(path):
             shutil.rmtree(os.path.dirname(path))
@@ -78,3 +113,42 @@ class FileSystemServiceStorage(ServiceStorageBase):
             return True
         except:
             return False
+
+
+def _write_yaml(path, serialized_service):
+    # write all the files before renaming them, so a crash doesn't leave the service half written
+    for part, name in _yaml_files.items():
+        j.data.serializer.yaml.dump(os.path.join(path, name + '.tmp'), serialized_service[part])
+    for name in _yaml_files.values():
+        file_path = os.path.join(path, name)
+        j.sal.fs.moveFile(file_path + '.tmp', file_path)
+
+
+def _read_yaml(path):
+    return {part: j.data.serializer.yaml.load(os.path.join(path, name)) for part, name in _yaml_files.items()}
+
+
+def _remove_yaml(path):
+    for name in _yaml_files.values():
+        file_path = os.path.join(path, name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def _write_snapshot(path, serialized_service):
+    file_path = os.path.join(path, _snapshot_file)
+    with open(file_path + '.tmp', 'wb') as f:
+        f.write(msgpack.dumps(serialized_service, use_bin_type=True))
+    # rename is atomic, the snapshot is either the previous or the new one
+    os.replace(file_path + '.tmp', file_path)
+
+
+def _read_snapshot(path):
+    with open(os.path.join(path, _snapshot_file), 'rb') as f:
+        return msgpack.loads(f.read(), raw=False)
+
+
+def _remove_snapshot(path):
+    file_path = os.path.join(path, _snapshot_file)
+    if os.path.exists(file_path):
+        os.remove(file_path)
@@ -0,0 +1,141 @@
+"""
+robot wide scheduler of the service saves
+
+Instead of writing a service to the storage after each of its actions, services are marked dirty.
+A background greenlet writes the services that have been dirty for at least `window` seconds,
+so all the changes made to a service within the window are written at once.
+A service that fails to be written is retried later, waiting longer after each failure.
+"""
+
+import time
+from collections import OrderedDict
+
+import gevent
+from gevent.pool import Pool
+
+from jumpscale import j
+from zerorobot.prometheus.robot import service_saves
+
+logger = j.logger.get(__name__)
+
+# default number of seconds a dirty service waits before being written
+SAVE_WINDOW = 1
+# default number of services written concurrently
+SAVE_CONCURRENCY = 4
+# maximum number of seconds to wait before writing again a service that failed to be written
+MAX_RETRY_DELAY = 300
+
+
+class SaveScheduler:
+
+    def __init__(self, window=SAVE_WINDOW, concurrency=SAVE_CONCURRENCY):
+        self.window = window
+        # services waiting to be written, keyed by guid, with the time they have been marked dirty
+        # ordered by time, so the services due first are at the beginning
+        self._dirty = OrderedDict()
+        # greenlets writing a service, keyed by guid
+        self._writing = {}
+        # number of consecutive failed writes of the services, keyed by guid
+        self._failures = {}
+        # greenlets waiting to retry a failed write, keyed by guid
+        self._retries = {}
+        self._pool = Pool(concurrency)
+        self._gl = None
+
+    def mark(self, service):
+        """
+        schedule a service to be written
+        if the service is already waiting to be written, it is only written once
+        """
+        if service.guid not in self._dirty:
+            self._dirty[service.guid] = (service, time.time())
+        if self._gl is None or self._gl.dead:
+            self._gl = gevent.spawn(self._run)
+
+    def discard(self, service):
+        """
+        cancel the pending write of a service
+        and wait for the write in progress if any, used before deleting a service
+        """
+        self._dirty.pop(service.guid, None)
+        self._failures.pop(service.guid, None)
+        retry = self._retries.pop(service.guid, None)
+        if retry is not None:
+            retry.kill(block=False)
+        writing = self._writing.get(service.guid)
+        if writing is not None:
+            writing.join()
+
+    def flush(self):
+        """
+        write all the dirty services now and wait for all the writes to be done
+        """
+        self._spawn_writes()
+        self._pool.join()
+
+    @property
+    def pending(self):
+        """
+        number of services waiting to be written
+        """
+        return len(self._dirty)
+
+    @property
+    def failing(self):
+        """
+        number of services whose last write failed
+        """
+        return len(self._failures)
+
+    def _run(self):
+        while self._dirty:
+            _, marked = next(iter(self._dirty.values()))
+            delay = marked + self.window - time.time()
+            if delay > 0:
+                gevent.sleep(delay)
+                continue
+
+            now = time.time()
+            due = 0
+            for _, marked in self._dirty.values():
+                if marked + self.window > now:
+                    break
+                due += 1
+            self._spawn_writes(due)
+            self._pool.join()
+
+    def _spawn_writes(self, count=None):
+        """
+        write the count first dirty services, or all of them if count is None
+        spawning a write blocks while the pool is full, so _run and flush can pop from _dirty in turns:
+        stop when it's empty rather than relying on count
+        """
+        spawned = 0
+        while self._dirty and (count is None or spawned < count):
+            guid, (service, _) = self._dirty.popitem(last=False)
+            self._pool.spawn(self._write, guid, service)
+            spawned += 1
+
+    def _write(self, guid, service):
+        self._writing[guid] = gevent.getcurrent()
+        try:
+            service.save()
+        except Exception:
+            failures = self._failures.get(guid, 0) + 1
+            self._failures[guid] = failures
+            service_saves.labels(result='failed').inc()
+            delay = min(self.window * 2 ** failures, MAX_RETRY_DELAY)
+            if failures == 1:
+                logger.exception("fail to save service %s, retry in %.1fs", guid, delay)
+            else:
+                logger.error("fail to save service %s %d times, retry in %.1fs", guid, failures, delay)
+            if guid not in self._retries:
+                self._retries[guid] = gevent.spawn_later(delay, self._retry, service)
+        else:
+            self._failures.pop(guid, None)
+        finally:
+            self._writing.pop(guid, None)
+
+    def _retry(self, service):
+        self._retries.pop(service.guid, None)
+        self.mark(service)
@@ -1,6 +1,7 @@
 import os
 
 import msgpack
+import redis
 
 from jumpscale import j
 
@@ -8,15 +9,36 @@ from .base import ServiceStorageBase, _serialize_service
 
 logger = j.logger.get(__name__)
 
+# a service is stored in a single record
+_record_prefix = "zrobot_service_"
+
+# layout used by previous versions: one key for each part of the service
 _service_prefix = "service_"
 _tasklist_prefix = "tasklist_"
 _data_prefix = "data_"
 _state_prefix = "state_"
+_legacy_prefixes = {
+    'service': _service_prefix,
+    'tasks': _tasklist_prefix,
+    'data': _data_prefix,
+    'states': _state_prefix,
+}
+
+# maximum number of connections opened to 0-db to read and write the services
+POOL_SIZE = 16
 
 
 class ZDBServiceStorage(ServiceStorageBase):
+    """
+    store the services in a 0-db namespace
+
+    each service is written in a single record, commands go through a pool of connections
+    so concurrent loads and saves don't wait on each other.
+    Services stored by previous versions with one key per part are still loaded
+    and converted to a single record the next time they are saved.
+    """
 
-    def __init__(self, addr, port, namespace=None, admin_passwd=''):
+    def __init__(self, addr, port, namespace=None, admin_passwd='', pool_size=POOL_SIZE):
         super().__init__()
         if not namespace:
             namespace = 'zrobot_data'
@@ -28,49 +50,86 @@ class ZDBServiceStorage(ServiceStorageBase):
                                                mode='user')
 
         self._ns = self._client.zdb.namespace_new(namespace)
+        self._redis = connect(addr, port, namespace, pool_size=pool_size)
+        # guid of the services found stored with one key per part
+        self._legacy = set()
 
-    def save(self, service):
+    def _write_service(self, service, serialized_service):
         logger.info("save %s to 0-db backend", service.guid)
-        serialized_service = _serialize_service(service)
         logger.debug(serialized_service)
-        self._ns.set(msgpack.dumps(serialized_service['service']), _service_prefix+service.guid)
-        self._ns.set(msgpack.dumps(serialized_service['tasks']), _tasklist_prefix+service.guid)
-        self._ns.set(msgpack.dumps(serialized_service['data']), _data_prefix+service.guid)
-        self._ns.set(msgpack.dumps(serialized_service['states']), _state_prefix+service.guid)
-
-    def list(self):
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.execute_command('SET', _record_prefix + service.guid, msgpack.dumps(serialized_service, use_bin_type=True))
+        if service.guid in self._legacy:
+            # the service is now stored in its record, remove the keys of the previous layout
+            for prefix in _legacy_prefixes.values():
+                pipe.execute_command('DEL', prefix + service.guid)
+        replies = pipe.execute(raise_on_error=False)
+        # 0-db answers the key, or nil when the data didn't change, to a successful SET
+        # so only the errors tell that the service has not been written
+        if isinstance(replies[0], Exception):
+            raise replies[0]
+        if _check_deleted(replies[1:]):
+            self._legacy.discard(service.guid)
+        else:
+            # try again at the next save
+            logger.warning("fail to delete the keys of the previous layout of service %s", service.guid)
+
+    def list_keys(self):
+        """
+        yield the guid of all the services stored
+        """
         logger.info("list services from 0-db backend")
+        seen = set()
         for key in self._ns.list():
             # since we also save webhooks info into the same namespace
-            if not key.startswith(_service_prefix.encode()):
+            if key.startswith(_record_prefix.encode()):
+                guid = key[len(_record_prefix):].decode()
+            elif key.startswith(_service_prefix.encode()):
+                guid = key[len(_service_prefix):].decode()
+            else:
                 continue
 
-            guid = key[len(_service_prefix):].decode()
-
-            service_bin = self._ns.get(key)
-            tasklist_bin = self._ns.get((_tasklist_prefix+guid).encode())
-            data_bin = self._ns.get((_data_prefix+guid).encode())
-            state_bin = self._ns.get((_state_prefix+guid).encode())
-
-            service = msgpack.loads(service_bin, encoding='utf-8')
-            tasklist = msgpack.loads(tasklist_bin, encoding='utf-8')
-            data = msgpack.loads(data_bin, encoding='utf-8')
-            state = msgpack.loads(state_bin, encoding='utf-8')
-
-            logger.info("service %s loaded" % service['guid'])
-            yield {
-                'service': service,
-                'tasks': tasklist,
-                'data': data,
-                'states': state,
-            }
-
-    def delete(self, service):
+            if guid not in seen:
+                seen.add(guid)
+                yield guid
+
+    def load(self, key):
+        guid = key
+        blob = self._redis.execute_command('GET', _record_prefix + guid)
+        if blob is not None:
+            service = msgpack.loads(blob, raw=False)
+        else:
+            service = self._load_legacy(guid)
+
+        logger.info("service %s loaded" % guid)
+        return service
+
+    def _load_legacy(self, guid):
+        """
+        load a service stored with one key per part, fetching all the parts in a single round trip
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        for prefix in _legacy_prefixes.values():
+            pipe.execute_command('GET', prefix + guid)
+        blobs = pipe.execute()
+
+        self._legacy.add(guid)
+        return {part: msgpack.loads(blob, raw=False) for part, blob in zip(_legacy_prefixes.keys(), blobs)}
+
+    def _delete_service(self, service):
         logger.info("delete %s from 0-db backend", service.guid)
-        self._ns.delete(_service_prefix+service.guid)
-        self._ns.delete(_tasklist_prefix+service.guid)
-        self._ns.delete(_data_prefix+service.guid)
-        self._ns.delete(_state_prefix+service.guid)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.execute_command('DEL', _record_prefix + service.guid)
+        for prefix in _legacy_prefixes.values():
+            pipe.execute_command('DEL', prefix + service.guid)
+        # 0-db returns an error for the keys that don't exist
+        replies = pipe.execute(raise_on_error=False)
+        if not _check_deleted(replies[:1]):
+            raise replies[0]
+        if _check_deleted(replies[1:]):
+            self._legacy.discard(service.guid)
+        else:
+            logger.warning("fail to delete the keys of the previous layout of service %s", service.guid)
 
     def health(self):
         try:
@@ -80,3 +139,49 @@ class ZDBServiceStorage(ServiceStorageBase):
             return True
         except:
             return False
+
+
+def _check_deleted(replies):
+    """
+    return True if all the replies to DEL commands are successful,
+    the error returned by 0-db for a key that doesn't exist counts as a success
+    """
+    for reply in replies:
+        if isinstance(reply, Exception) and 'not found' not in str(reply).lower():
+            return False
+    return True
+
+
+class _NamespaceConnection(redis.Connection):
+    """
+    connection to 0-db that selects a namespace when it is opened
+    """
+
+    def __init__(self, namespace=None, **kwargs):
+        super().__init__(**kwargs)
+        self.namespace = namespace
+
+    def on_connect(self):
+        super().on_connect()
+        if self.namespace:
+            self.send_command('SELECT', self.namespace)
+            if self.read_response() not in (b'OK', 'OK'):
+                raise redis.ConnectionError("fail to select namespace %s" % self.namespace)
+
+
+def connect(addr, port, namespace, pool_size=POOL_SIZE):
+    """
+    return a redis client that uses at most pool_size connections to the namespace of a 0-db
+    when all the connections are in use, commands wait for one to be released
+    """
+    kwargs = {}
+    if redis.VERSION >= (5,):
+        # recent clients negotiate RESP3 with HELLO, 0-db only speaks RESP2
+        kwargs['protocol'] = 2
+    pool = redis.BlockingConnectionPool(connection_class=_NamespaceConnection,
+                                        max_connections=pool_size,
+                                        host=addr,
+                                        port=port,
+                                        namespace=namespace,
+                                        **kwargs)
+    return redis.Redis(connection_pool=pool)
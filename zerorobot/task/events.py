@@ -0,0 +1,77 @@
+"""
+robot wide notifications of the changes of state of the tasks
+
+Every time the state of a task changes, the task is published to the subscribers,
+like the event streams of the REST API.
+Each subscriber receives the tasks in its own bounded queue, so a slow subscriber never blocks the services.
+"""
+
+import gevent
+from gevent.queue import Full, Queue
+
+# maximum number of events kept for a subscriber that doesn't consume them fast enough
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+_subscribers = set()
+
+
+class Subscriber:
+    """
+    receives the changes of state of the tasks of a service, or of all the services if service_guid is None
+    """
+
+    def __init__(self, service_guid=None, size=SUBSCRIBER_QUEUE_SIZE):
+        self.service_guid = service_guid
+        self._queue = Queue(size)
+        # set when events had to be dropped because the subscriber was too slow
+        self.overflow = False
+
+    def get(self, timeout=None):
+        """
+        return the next (task, state) event
+        return None if no event is received within timeout seconds,
+        or right away if the subscriber overflowed and all the events it received have been consumed
+        """
+        if self.overflow and self._queue.empty():
+            return None
+        try:
+            return self._queue.get(timeout=timeout)
+        except gevent.queue.Empty:
+            return None
+
+    def close(self):
+        unsubscribe(self)
+
+    def _put(self, task, state):
+        try:
+            self._queue.put_nowait((task, state))
+        except Full:
+            # the subscriber can't keep up, stop sending it events so it knows it missed some
+            self.overflow = True
+            unsubscribe(self)
+
+
+def subscribe(service_guid=None):
+    """
+    start receiving the changes of state of the tasks of a service, or of all the services if service_guid is None
+    the subscriber must be closed once it's not used anymore
+    """
+    subscriber = Subscriber(service_guid)
+    _subscribers.add(subscriber)
+    return subscriber
+
+
+def unsubscribe(subscriber):
+    _subscribers.discard(subscriber)
+
+
+def publish(task, state):
+    """
+    notify the subscribers that the state of task changed to state
+    """
+    if not _subscribers or task.service is None:
+        return
+    guid = task.service.guid
+    for subscriber in list(_subscribers):
+        if subscriber.service_guid is None or subscriber.service_guid == guid:
+            subscriber._put(task, state)
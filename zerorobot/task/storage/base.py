@@ -25,11 +25,16 @@ class TaskStorageBase:
         """
         raise NotImplementedError()
 
-    def list(self, from_timestap=None, to_timestap=None):
+    def list(self, from_timestap=None, to_timestap=None, state=None, action_name=None, limit=None, cursor=None):
         """
-        list all task. Optionally filter on time of creation
+        list all task, in the order they have been stored. Optionally filter on time of creation
         from_timestamp: filter all task created before from_timetamp
         to_timestamp: filter all task created after to_timestamp
+        state: only return the tasks in this state
+        action_name: only return the tasks of this action
+        limit: maximum number of tasks returned
+        cursor: guid of the last task of the previous page, only the tasks stored after it are returned
+                if no task with this guid exists, should raise TaskNotFoundError
         """
         raise NotImplementedError()
 
@@ -39,6 +44,13 @@ class TaskStorageBase:
         """
         raise NotImplementedError()
 
+    def flush(self):
+        """
+        write the tasks buffered in memory to the storage
+        storages that write synchronously don't need to implement it
+        """
+        pass
+
     def close(self):
         """
         gracefully close storage
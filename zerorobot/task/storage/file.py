@@ -38,21 +38,37 @@ class TaskStorageFile(TaskStorageBase):
             raise TaskConflictError("found 2 tasks with same guid, this should not happen")
         return encoding.deserialize_task(j.sal.fs.readFile(results[0]), self.service)
 
-    def list(self, from_timestap=None, to_timestap=None):
+    def list(self, from_timestap=None, to_timestap=None, state=None, action_name=None, limit=None, cursor=None):
         """
         list all task. Optionally filter on time of creation
         from_timestamp: filter all task created before from_timetamp
         to_timestamp: filter all task created after to_timestamp
+        state: only return the tasks in this state
+        action_name: only return the tasks of this action
+        limit: maximum number of tasks returned
+        cursor: guid of the last task of the previous page, only the tasks stored after it are returned
         """
         tasks = []
+        found = cursor is None
         for path in j.sal.fs.listFilesInDir(self._root):
             blob = j.sal.fs.readFile(path)
             task = encoding.deserialize_task(blob, self.service)
+            if not found:
+                found = task.guid == cursor
+                continue
             if from_timestap and task.created < from_timestap:
                 continue
             if to_timestap and task.created > to_timestap:
                 continue
+            if state and task.state != state:
+                continue
+            if action_name and task.action_name != action_name:
+                continue
+            if limit is not None and len(tasks) >= limit:
+                break
             tasks.append(task)
+        if not found:
+            raise TaskNotFoundError("task %s not found" % cursor)
         return tasks
 
     def count(self):
@@ -0,0 +1,207 @@
+"""
+robot wide task storage
+
+All the services of the robot store their tasks in a single sqlite database
+instead of having one database per service
+"""
+
+import os
+import sqlite3
+
+import gevent
+from jumpscale import j
+
+from .sqlite import (FLUSH_INTERVAL, FLUSH_SIZE, TRIM_BATCH_SIZE, TRIM_PAUSE,
+                     VACUUM_PAGES, TaskStorageSqlite, _flusher,
+                     _converter, enable_incremental_vacuum,
+                     is_incremental_vacuum, reclaim, upgrade_schema)
+
+logger = j.logger.get(__name__)
+
+_create_table_stmt = """
+CREATE TABLE IF NOT EXISTS tasks (
+    guid TEXT PRIMARY KEY UNIQUE,
+    service_guid TEXT,
+    created INTEGER,
+    payload BLOB,
+    state TEXT,
+    action_name TEXT,
+    duration REAL
+)
+"""
+
+_create_index_stmts = [
+    "CREATE INDEX IF NOT EXISTS service_created ON tasks (service_guid, created)",
+]
+
+# opened databases, keyed by path
+_databases = {}
+
+
+def db_path(data_dir):
+    """
+    return the location of the robot wide task database in the data directory of the robot
+    """
+    return os.path.join(data_dir, 'tasks.db')
+
+
+class SharedTaskDB:
+    """
+    SharedTaskDB holds the connection to the robot wide task database
+    """
+
+    def __init__(self, path):
+        self.path = path
+        dir_path = os.path.dirname(path)
+        if not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        self.conn = sqlite3.connect(path)
+        enable_incremental_vacuum(self.conn)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        cursor = self.conn.cursor()
+        cursor.execute(_create_table_stmt)
+        for stmt in _create_index_stmts:
+            cursor.execute(stmt)
+        upgrade_schema(self.conn)
+        if not is_incremental_vacuum(self.conn):
+            _converter.schedule(self)
+
+    def migrate(self, service_guid, db_path):
+        """
+        import the tasks of a per service database into the shared database
+        and remove the per service database
+        """
+        if not os.path.exists(db_path):
+            return
+
+        logger.info("migrate tasks of service %s into the robot task database", service_guid)
+        # make sure the old database has all the columns we copy
+        old = sqlite3.connect(db_path)
+        try:
+            upgrade_schema(old)
+        finally:
+            old.close()
+
+        self.conn.execute("ATTACH DATABASE ? AS old", (db_path,))
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO tasks (guid, service_guid, created, payload, state, action_name, duration) "
+                    "SELECT guid, ?, created, payload, state, action_name, duration FROM old.tasks ORDER BY rowid",
+                    (service_guid,))
+        finally:
+            self.conn.execute("DETACH DATABASE old")
+
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    def trim(self, to_timestap, keep=0, batch_size=TRIM_BATCH_SIZE, pause=TRIM_PAUSE):
+        """
+        delete the tasks of all the services created before to_timestap,
+        except the keep most recent tasks of each service
+
+        services are trimmed one after the other using the (service_guid, created) index,
+        tasks are deleted by batch of batch_size, sleeping pause seconds between two batches
+        the tasks buffered by write-behind storages must be flushed before
+        return the number of tasks deleted
+        """
+        deleted = 0
+        guid = ''
+        while True:
+            # next service, found with a lookup in the index instead of scanning it
+            guid = self.conn.execute("SELECT min(service_guid) FROM tasks WHERE service_guid > ?", (guid,)).fetchone()[0]
+            if guid is None:
+                return deleted
+
+            conditions, args = ['service_guid=?', 'created < ?'], [guid, to_timestap]
+            if keep:
+                # oldest task to keep, the tasks ordered before it are deleted
+                row = self.conn.execute(
+                    "SELECT created, rowid FROM tasks WHERE service_guid=? "
+                    "ORDER BY created DESC, rowid DESC LIMIT 1 OFFSET ?", (guid, keep - 1)).fetchone()
+                if row is None:
+                    # keep or less tasks stored for this service
+                    continue
+                conditions.append('(created < ? OR (created = ? AND rowid < ?))')
+                args.extend([row[0], row[0], row[1]])
+
+            stmt = "DELETE FROM tasks WHERE rowid IN (SELECT rowid FROM tasks WHERE %s LIMIT ?)" % ' AND '.join(conditions)
+            while True:
+                with self.conn:
+                    count = self.conn.execute(stmt, args + [batch_size]).rowcount
+                deleted += count
+                if count < batch_size:
+                    break
+                gevent.sleep(pause)
+            gevent.sleep(0)
+
+    def reclaim(self, max_pages=VACUUM_PAGES):
+        """
+        give at most max_pages pages freed by deleted tasks back to the filesystem
+        return the number of bytes reclaimed
+        """
+        return reclaim(self.conn, max_pages)
+
+    def close(self):
+        self.conn.close()
+        _databases.pop(self.path, None)
+
+
+def get_db(path):
+    """
+    return the shared database located at path, open it if needed
+    """
+    db = _databases.get(path)
+    if db is None:
+        db = SharedTaskDB(path)
+        _databases[path] = db
+    return db
+
+
+class TaskStorageShared(TaskStorageSqlite):
+    """
+    This class implement the TaskStorage interface
+    on top of the robot wide task database
+
+    It only sees the tasks of the service of its task list.
+    The first time it is created for a service, the tasks of the
+    per service database of the service are imported.
+    """
+
+    _columns = ('guid', 'service_guid', 'created', 'payload', 'state', 'action_name', 'duration')
+
+    def __init__(self, task_list, db_path, write_behind=False, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self._db = get_db(db_path)
+        super().__init__(task_list, write_behind=write_behind, flush_size=flush_size, flush_interval=flush_interval)
+        self._scope_conditions = ('service_guid=?',)
+        self._scope_args = (self.service.guid,)
+        self._db.migrate(self.service.guid, os.path.join(self.service._path, 'tasks.db'))
+
+    def _connect(self):
+        return self._db.conn
+
+    def _task_row(self, task):
+        return (task.guid,
+                self.service.guid,
+                task.created,
+                self._serialize_task(task),
+                task.state,
+                task.action_name,
+                task.duration)
+
+    def reclaim(self, max_pages=VACUUM_PAGES):
+        """
+        the free pages of the shared database are reclaimed for all the services at once
+        by SharedTaskDB.reclaim
+        """
+        return 0
+
+    def close(self):
+        """
+        flush the buffered tasks, the connection is shared with the other services so it stays open
+        """
+        if self.is_open:
+            self.flush()
+            _flusher.unregister(self)
+            self._opened = False
@@ -1,17 +1,37 @@
 from .base import TaskStorageBase, TaskNotFoundError, TaskConflictError
-from zerorobot.task.utils import _instantiate_task
+from zerorobot.task.task import TaskRecord
+from collections import OrderedDict, deque
 import os
 import sqlite3
+import time
+import weakref
 import msgpack
+import gevent
 from jumpscale import j
 
 logger = j.logger.get(__name__)
 
+# default thresholds used in write-behind mode
+# buffered tasks are flushed as soon as one of them is reached
+FLUSH_SIZE = 100  # number of tasks
+FLUSH_INTERVAL = 5  # seconds
+
+# trimming of old tasks is done in small steps so it never blocks the other greenlets for long
+TRIM_BATCH_SIZE = 500  # number of tasks deleted per transaction
+TRIM_PAUSE = 0.05  # seconds to sleep between two batches
+VACUUM_PAGES = 1000  # maximum number of free pages given back to the filesystem per call to reclaim
+VACUUM_CONVERT_INTERVAL = 60  # seconds to wait before each conversion of a database to incremental vacuum
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
 _create_table_stmt = """
 CREATE TABLE IF NOT EXISTS tasks (
     guid TEXT PRIMARY KEY UNIQUE,
     created INTEGER,
-    payload BLOB
+    payload BLOB,
+    state TEXT,
+    action_name TEXT,
+    duration REAL
 )
 """
 
@@ -20,132 +40,346 @@ _create_index_stmts = [
     "CREATE INDEX IF NOT EXISTS created ON tasks (created)",
 ]
 
-_add_task_stmt = "INSERT INTO tasks VALUES (?,?,?)"
-_delete_task_stmt = "DELETE FROM tasks WHERE guid IN (SELECT guid FROM tasks WHERE created < ? )"
-_find_task_stmt = "SELECT * FROM tasks"
-_count_tasks_stmt = "SELECT count(*) FROM tasks"
-_drop_stmt = "DELETE FROM tasks"
+# columns added to the schema after its first version
+# they are copied from the payload of the task so they can be filtered on without decoding it
+_added_columns = [
+    ('state', 'TEXT'),
+    ('action_name', 'TEXT'),
+    ('duration', 'REAL'),
+]
+
+
+def enable_incremental_vacuum(conn):
+    """
+    let the database give its free pages back to the filesystem with PRAGMA incremental_vacuum
+    only has effect on a new database, existing ones are converted by convert_vacuum
+    """
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
+
+def is_incremental_vacuum(conn):
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == _AUTO_VACUUM_INCREMENTAL
+
+
+def convert_vacuum(conn):
+    """
+    switch a database created before incremental vacuum was enabled to incremental vacuum
+    this requires a full vacuum of the database, which blocks until the whole database is rewritten
+    return True if the database has been converted
+    """
+    if is_incremental_vacuum(conn):
+        return False
+    logger.info("enable incremental vacuum on task database")
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def reclaim(conn, max_pages=VACUUM_PAGES):
+    """
+    give at most max_pages free pages of the database back to the filesystem
+    return the number of bytes reclaimed
+    """
+    if not is_incremental_vacuum(conn):
+        # database not converted yet by _VacuumConverter, it has no free pages to give back
+        return 0
+
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute("PRAGMA incremental_vacuum(%d)" % max_pages).fetchall()
+    conn.commit()
+    after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return (before - after) * page_size
+
+
+def upgrade_schema(conn):
+    """
+    add the columns missing from a tasks table created by an older version
+    and fill them from the payload of the stored tasks
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    missing = [(name, type_) for name, type_ in _added_columns if name not in existing]
+    if not missing:
+        return
+
+    names = [name for name, _ in _added_columns]
+    with conn:
+        for name, type_ in missing:
+            conn.execute("ALTER TABLE tasks ADD COLUMN %s %s" % (name, type_))
+        updates = []
+        for guid, payload in conn.execute("SELECT guid, payload FROM tasks").fetchall():
+            task = msgpack.loads(payload, raw=False)
+            updates.append([task.get(name) for name in names] + [guid])
+        conn.executemany("UPDATE tasks SET %s WHERE guid=?" % ",".join("%s=?" % name for name in names), updates)
 
 
 class TaskStorageSqlite(TaskStorageBase):
     """
     This class implement the TaskStorage interface
     using sqlite
+
+    Stored tasks are returned as TaskRecord, their payload is only decoded when needed.
+
+    In write-behind mode, added tasks are kept in memory and written
+    in batched transactions once flush_size tasks are buffered or
+    the oldest buffered task is older then flush_interval seconds.
+    Reads always see the buffered tasks.
     """
 
-    def __init__(self, task_list):
+    # columns of the tasks table, in the order of the values returned by _task_row
+    _columns = ('guid', 'created', 'payload', 'state', 'action_name', 'duration')
+
+    def __init__(self, task_list, write_behind=False, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
         self._opened = False
 
         self.service = task_list.service
-        db_path = os.path.join(self.service._path, 'tasks.db')
-        if not os.path.exists(self.service._path):
-            os.makedirs(self.service._path)
-        self.conn = sqlite3.connect(db_path)
+        # conditions and arguments added to every query
+        # to limit them to the tasks of this storage
+        self._scope_conditions = ()
+        self._scope_args = ()
+
+        self.conn = self._connect()
         self._opened = True
-        self._create_table()
+
+        self.write_behind = write_behind
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = OrderedDict()
+        self._buffered_at = None
+        if write_behind:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            _flusher.register(self)
 
     @property
     def is_open(self):
         return self._opened
 
-    def _create_table(self):
-        cursor = self.conn.cursor()
+    def _connect(self):
+        db_path = os.path.join(self.service._path, 'tasks.db')
+        if not os.path.exists(self.service._path):
+            os.makedirs(self.service._path)
+        conn = sqlite3.connect(db_path)
+        enable_incremental_vacuum(conn)
+        cursor = conn.cursor()
         cursor.execute(_create_table_stmt)
         for stmt in _create_index_stmts:
             cursor.execute(stmt)
+        upgrade_schema(conn)
+        if not is_incremental_vacuum(conn):
+            _converter.schedule(self)
+        return conn
+
+    def _where(self, conditions=(), args=()):
+        """
+        build the WHERE clause of a query, limited to the tasks of this storage
+        """
+        conditions = list(self._scope_conditions) + list(conditions)
+        args = list(self._scope_args) + list(args)
+        if not conditions:
+            return '', args
+        return ' WHERE ' + ' AND '.join(conditions), args
+
+    def _insert_stmt(self, or_ignore=False):
+        return "INSERT %sINTO tasks (%s) VALUES (%s)" % (
+            "OR IGNORE " if or_ignore else "",
+            ",".join(self._columns),
+            ",".join("?" * len(self._columns)))
 
     def add(self, task):
         """
         save a task to the storage
         """
-        cursor = self.conn.cursor()
-        t = (task.guid,
-             task.created,
-             self._serialize_task(task))
-        try:
-            cursor.execute(_add_task_stmt, t)
-            cursor.connection.commit()
-        except sqlite3.IntegrityError:
+        if not self.write_behind:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(self._insert_stmt(), self._task_row(task))
+                cursor.connection.commit()
+            except sqlite3.IntegrityError:
+                raise TaskConflictError("task %s already exists", task.guid)
+            return
+
+        if task.guid in self._buffer or self._exists(task.guid):
             raise TaskConflictError("task %s already exists", task.guid)
 
+        if not self._buffer:
+            self._buffered_at = time.time()
+        self._buffer[task.guid] = task
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """
+        write all the buffered tasks in a single transaction
+        """
+        if not self._buffer:
+            return
+        # swap the buffer before writing, so tasks added meanwhile go into the next batch
+        tasks, self._buffer = self._buffer, OrderedDict()
+        buffered_at, self._buffered_at = self._buffered_at, None
+        try:
+            rows = [self._task_row(task) for task in tasks.values()]
+            with self.conn:
+                self.conn.executemany(self._insert_stmt(or_ignore=True), rows)
+        except:
+            # keep the tasks to write them with the next flush, in front of the ones added meanwhile
+            tasks.update(self._buffer)
+            self._buffer = tasks
+            self._buffered_at = buffered_at
+            raise
+
+    def _exists(self, guid):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM tasks WHERE guid=?", (guid,))
+        return cursor.fetchone() is not None
+
+    def _task_row(self, task):
+        return (task.guid,
+                task.created,
+                self._serialize_task(task),
+                task.state,
+                task.action_name,
+                task.duration)
+
+    # columns read to build a TaskRecord, in the order of its arguments
+    _record_columns = "guid, action_name, state, created, duration, payload"
+
+    def _record(self, row):
+        return TaskRecord(self.service, *row, decode=self._deserialize_task)
+
     def get(self, guid):
         """
         find a task by guid
         """
+        task = self._buffer.get(guid)
+        if task is not None:
+            return task
+
         cursor = self.conn.cursor()
-        stmt = _find_task_stmt + ' WHERE guid=?'
-        cursor.execute(stmt, (guid,))
+        where, args = self._where(['guid=?'], [guid])
+        cursor.execute("SELECT %s FROM tasks%s" % (self._record_columns, where), args)
         result = cursor.fetchone()
         if not result:
             raise TaskNotFoundError("task %s not found" % guid)
-        task = self._deserialize_task(result[2])
-        task['guid'] = guid
-        task = _instantiate_task(task, self.service)
-        return task
+        return self._record(result)
 
-    def list(self, from_timestap=None, to_timestap=None):
+    def list(self, from_timestap=None, to_timestap=None, state=None, action_name=None, limit=None, cursor=None):
         """
         list all task. Optionally filter on time of creation
         from_timestamp: filter all task created before from_timetamp
         to_timestamp: filter all task created after to_timestamp
+        state: only return the tasks in this state
+        action_name: only return the tasks of this action
+        limit: maximum number of tasks returned
+        cursor: guid of the last task of the previous page, only the tasks stored after it are returned
         """
-        cursor = self.conn.cursor()
-        stmt = _find_task_stmt
-        args = None
-        if from_timestap and not to_timestap:
-            stmt += ' WHERE created >= ? '
-            args = (from_timestap,)
-        elif to_timestap and not from_timestap:
-            stmt += ' WHERE created <= ? '
-            args = (to_timestap,)
-        elif from_timestap and to_timestap:
-            stmt += ' WHERE created >= ? AND created <= ?'
-            args = (from_timestap, to_timestap)
-
-        if args:
-            cursor.execute(stmt, args)
-        else:
-            cursor.execute(stmt)
+        self.flush()
+        conditions, args = [], []
+        if from_timestap:
+            conditions.append('created >= ?')
+            args.append(from_timestap)
+        if to_timestap:
+            conditions.append('created <= ?')
+            args.append(to_timestap)
+        if state:
+            conditions.append('state = ?')
+            args.append(state)
+        if action_name:
+            conditions.append('action_name = ?')
+            args.append(action_name)
+        if cursor:
+            rowid = self.conn.execute("SELECT rowid FROM tasks WHERE guid=?", (cursor,)).fetchone()
+            if rowid is None:
+                raise TaskNotFoundError("task %s not found" % cursor)
+            conditions.append('rowid > ?')
+            args.append(rowid[0])
 
-        tasks = []
-        for result in cursor.fetchall():
-            task = self._deserialize_task(result[2])
-            task['guid'] = result[0]
-            task = _instantiate_task(task, self.service)
-            tasks.append(task)
-        return tasks
+        where, args = self._where(conditions, args)
+        query = "SELECT %s FROM tasks%s ORDER BY rowid" % (self._record_columns, where)
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+
+        cursor = self.conn.cursor()
+        cursor.execute(query, args)
+        return [self._record(row) for row in cursor.fetchall()]
 
     def count(self):
         """
         return the number of task stored
         """
+        self.flush()
         cursor = self.conn.cursor()
-        return cursor.execute(_count_tasks_stmt).fetchone()[0]
+        where, args = self._where()
+        return cursor.execute("SELECT count(*) FROM tasks" + where, args).fetchone()[0]
 
     def close(self):
         """
         gracefully close storage
         """
-        cursor = self.conn.cursor()
         if self.is_open:
+            self.flush()
+            _flusher.unregister(self)
+            cursor = self.conn.cursor()
             conn = cursor.connection
             cursor.close()
             conn.close()
             self._opened = False
 
     def delete_until(self, to_timestap):
-        cursor = self.conn.cursor()
-        cursor.execute(_delete_task_stmt, (to_timestap,))
-        cursor.connection.commit()
-        # call vacuum to reclaim disk space after deletion of a bunch of tasks
-        cursor.execute("VACUUM")
+        """
+        delete all the tasks created before to_timestap
+        """
+        return self.trim(to_timestap)
+
+    def trim(self, to_timestap, keep=0, batch_size=TRIM_BATCH_SIZE, pause=TRIM_PAUSE):
+        """
+        delete the tasks created before to_timestap, except the keep most recent tasks
+
+        tasks are deleted by batch of batch_size, sleeping pause seconds between two batches
+        so other greenlets can run meanwhile
+        return the number of tasks deleted
+        """
+        self.flush()
+        conditions, args = ['created < ?'], [to_timestap]
+        if keep:
+            # rowid of the oldest task to keep
+            where, scope_args = self._where()
+            row = self.conn.execute("SELECT rowid FROM tasks%s ORDER BY rowid DESC LIMIT 1 OFFSET ?" % where,
+                                    scope_args + [keep - 1]).fetchone()
+            if row is None:
+                # keep or less tasks stored
+                return 0
+            conditions.append('rowid < ?')
+            args.append(row[0])
+
+        where, args = self._where(conditions, args)
+        stmt = "DELETE FROM tasks WHERE rowid IN (SELECT rowid FROM tasks%s LIMIT ?)" % where
+        deleted = 0
+        while True:
+            with self.conn:
+                count = self.conn.execute(stmt, args + [batch_size]).rowcount
+            deleted += count
+            if count < batch_size:
+                return deleted
+            gevent.sleep(pause)
+
+    def reclaim(self, max_pages=VACUUM_PAGES):
+        """
+        give at most max_pages pages freed by deleted tasks back to the filesystem
+        return the number of bytes reclaimed
+        """
+        return reclaim(self.conn, max_pages)
 
     def drop(self):
         """
         delete all the tasks
         """
+        self._buffer.clear()
+        self._buffered_at = None
         cursor = self.conn.cursor()
-        cursor.execute(_drop_stmt)
+        where, args = self._where()
+        cursor.execute("DELETE FROM tasks" + where, args)
         cursor.connection.commit()
 
     def _serialize_task(self, task):
@@ -161,3 +395,78 @@ class TaskStorageSqlite(TaskStorageBase):
 
     def _deserialize_task(self, blob):
         return msgpack.loads(blob, raw=False)
+
+
+class _Flusher:
+    """
+    _Flusher runs a single greenlet that flushes the buffered tasks of all
+    the write-behind storages once their flush interval has elapsed
+    """
+
+    def __init__(self, period=1):
+        self._period = period
+        self._storages = weakref.WeakSet()
+        self._gl = None
+
+    def register(self, storage):
+        self._storages.add(storage)
+        if self._gl is None or self._gl.dead:
+            self._gl = gevent.spawn(self._run)
+
+    def unregister(self, storage):
+        self._storages.discard(storage)
+
+    def _run(self):
+        while True:
+            gevent.sleep(self._period)
+            now = time.time()
+            for storage in list(self._storages):
+                if storage._buffered_at is None or now - storage._buffered_at < storage.flush_interval:
+                    continue
+                try:
+                    storage.flush()
+                except Exception:
+                    logger.exception("fail to flush tasks of service %s", storage.service.guid)
+
+
+_flusher = _Flusher()
+
+
+class _VacuumConverter:
+    """
+    _VacuumConverter converts the databases created before incremental vacuum was enabled,
+    in the background when they are opened.
+
+    The full vacuum required by the conversion blocks while the database is rewritten,
+    so the databases are converted one at a time, waiting interval seconds before each one
+    """
+
+    def __init__(self, interval=VACUUM_CONVERT_INTERVAL):
+        self._interval = interval
+        self._pending = deque()
+        self._gl = None
+
+    def schedule(self, storage):
+        """
+        convert the database of storage, storage must have a conn attribute
+        """
+        self._pending.append(weakref.ref(storage))
+        if self._gl is None or self._gl.dead:
+            self._gl = gevent.spawn(self._run)
+
+    def _run(self):
+        while self._pending:
+            gevent.sleep(self._interval)
+            storage = self._pending.popleft()()
+            if storage is None:
+                continue
+            try:
+                convert_vacuum(storage.conn)
+            except sqlite3.ProgrammingError:
+                # the storage has been closed meanwhile
+                continue
+            except Exception:
+                logger.exception("fail to enable incremental vacuum on task database")
+
+
+_converter = _VacuumConverter()
@@ -15,13 +15,14 @@ import traceback
 import requests
 
 import gevent
+from gevent.event import Event
 from gevent.lock import Semaphore
 from jumpscale import j
 from zerorobot import config
-from zerorobot.errors import ExpectedError, eco_get
+from zerorobot.errors import Eco, ExpectedError, eco_get
 
 from . import (TASK_STATE_ERROR, TASK_STATE_NEW, TASK_STATE_OK,
-               TASK_STATE_RUNNING)
+               TASK_STATE_RUNNING, events)
 
 telegram_logger = logging.getLogger('telegram_logger')
 
@@ -53,6 +54,9 @@ class Task:
 
         self._state = TASK_STATE_NEW
         self._state_lock = Semaphore()
+        # events fired by the state setter, so waiters don't need to poll the state
+        self._started_event = Event()
+        self._done_event = Event()
 
     @property
     def created(self):
@@ -102,8 +106,39 @@ class Task:
         try:
             self._state_lock.acquire()
             self._state = value
+            if value == TASK_STATE_NEW:
+                self._started_event.clear()
+                self._done_event.clear()
+            elif value == TASK_STATE_RUNNING:
+                self._started_event.set()
+                self._done_event.clear()
+            else:
+                self._started_event.set()
+                self._done_event.set()
         finally:
             self._state_lock.release()
+        events.publish(self, value)
+
+    def on_done(self, callback):
+        """
+        call callback(task) once the task has been executed, or right away if it already is
+        callback is called from the gevent hub, so it must not block
+        """
+        self._done_event.rawlink(lambda _: callback(self))
+
+    def wait_change(self, timeout=None):
+        """
+        block until the state of the task changes, from new to running or from running to ok/error,
+        or at most timeout seconds. return right away if the task has already been executed
+
+        @return: the state of the task
+        """
+        state = self.state
+        if state == TASK_STATE_NEW:
+            self._started_event.wait(timeout)
+        elif state == TASK_STATE_RUNNING:
+            self._done_event.wait(timeout)
+        return self.state
 
     def wait(self, timeout=None, die=False):
         """
@@ -114,25 +149,24 @@ class Task:
         if die is True and the state is TASK_STATE_ERROR after the wait, the eco of the exception will be raised
         """
         # wait for the task to start before counting the timeout
-        while self.state == TASK_STATE_NEW:
-            gevent.sleep(self._sleep_period * 2)
-
-        def wait():
-            while self.state in (TASK_STATE_NEW, TASK_STATE_RUNNING):
-                gevent.sleep(self._sleep_period)
+        self._started_event.wait()
 
         if timeout:
             # ensure the type is correct
             timeout = float(timeout)
-            try:
-                gevent.with_timeout(timeout, wait)
-            except gevent.Timeout:
+            if not self._done_event.wait(timeout):
                 self._cancel()
                 self.state = TASK_STATE_ERROR
                 raise TimeoutError()
         else:
-            wait()
+            self._done_event.wait()
 
+        return self._check_error(die)
+
+    def _check_error(self, die):
+        """
+        if die is True and the task is in error state, raise the eco of the task
+        """
         if die is True and self.state == TASK_STATE_ERROR:
             if not self.eco:
                 logger = j.logger.get('zerorobot')
@@ -186,6 +220,84 @@ class Task:
                 logger.exception("Failed to log error to telegram handler")
 
 
+class TaskRecord(Task):
+    """
+    TaskRecord is a read only task loaded from a task storage
+
+    guid, action_name, state, created and duration come from the columns of the storage.
+    The arguments, result and eco are only decoded from the payload when accessed
+    and the action is never looked up on the service, so a record can't be executed.
+    """
+
+    def __init__(self, service, guid, action_name, state, created, duration, payload, decode):
+        """
+        @param payload: serialized task as written in the storage
+        @param decode: function that returns the dict of the task fields from the payload
+        """
+        # Task.__init__ is not called on purpose,
+        # a record doesn't need what is required to execute and wait for a task
+        self._sleep_period = 0.5
+        self.guid = guid
+        self.service = service
+        self._func = None
+        self.action_name = action_name
+        self._priority = None
+        self._created = created
+        self._duration = duration
+        self._execute_greenlet = None
+        if state in [TASK_STATE_RUNNING, TASK_STATE_NEW]:
+            state = TASK_STATE_NEW
+        self._state = state
+
+        self._payload = payload
+        self._decode = decode
+        self._fields = None
+        self._eco = None
+
+    def _field(self, name):
+        if self._fields is None:
+            self._fields = self._decode(self._payload)
+            self._payload = None
+        return self._fields.get(name)
+
+    @property
+    def _args(self):
+        return self._field('args')
+
+    @property
+    def result(self):
+        return self._field('result')
+
+    @property
+    def eco(self):
+        if self._eco is None and self._field('eco'):
+            self._eco = Eco.from_dict(self._field('eco'))
+        return self._eco
+
+    @property
+    def state(self):
+        return self._state
+
+    def on_done(self, callback):
+        """
+        the task of a record is not running anymore, so callback is called right away from the gevent hub
+        """
+        gevent.get_hub().loop.run_callback(callback, self)
+
+    def wait_change(self, timeout=None):
+        """
+        the state of a record never changes, so wait_change doesn't block
+        """
+        return self._state
+
+    def wait(self, timeout=None, die=False):
+        """
+        the task of a record is not running anymore, so wait doesn't block
+        if die is True and the state is TASK_STATE_ERROR, the eco of the exception will be raised
+        """
+        return self._check_error(die)
+
+
 def _send_eco_webhooks(service, task):
     if task.eco is None or service is None:
         return
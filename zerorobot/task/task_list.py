@@ -8,17 +8,25 @@ import gevent
 from gevent.lock import Semaphore
 from gevent.queue import PriorityQueue
 from jumpscale import j
+from zerorobot import config
+from zerorobot.lru import LRUCache
 from zerorobot.prometheus.robot import nr_task_waiting
+from zerorobot.template import executor
 
 from . import (PRIORITY_NORMAL, PRIORITY_SYSTEM, TASK_STATE_ERROR,
                TASK_STATE_NEW, TASK_STATE_OK, TASK_STATE_RUNNING)
 from .storage.base import TaskNotFoundError
+from .storage import shared
 from .storage.sqlite import TaskStorageSqlite
 # from .storage.file import TaskStorageFile
 # from .storage.redis import TaskStorageRedis
 from .task import Task
 from .utils import _instantiate_task
 
+# number of executed tasks kept in memory per service
+# so polling of recent tasks doesn't hit the storage
+_RECENT_TASKS_CACHE_SIZE = 64
+
 
 class TaskList:
     """
@@ -36,7 +44,24 @@ class TaskList:
         # check TaskStorageBase to see the interface your storage needs to have
         # to be used to store tasks
         # self._done = TaskStorageFile(self)
-        self._done = TaskStorageSqlite(self)
+        self._done = _new_storage(self)
+        # index of the tasks waiting in the queue by guid
+        self._waiting = {}
+        # tasks waiting in the queue by action name, each is a dict guid -> task in the order they have been added
+        self._waiting_actions = {}
+        # tasks waiting in the queue by (action name, arguments), used to coalesce identical tasks
+        # each is a dict guid -> task in the order they have been added
+        # an action is only indexed once it has been coalesced, so the other actions don't pay for serializing their arguments
+        self._waiting_calls = {}
+        # key in _waiting_calls of each indexed waiting task, by guid
+        self._call_keys = {}
+        # name of the actions indexed in _waiting_calls
+        self._coalesced_actions = set()
+        # last executed tasks, kept in front of the storage
+        self._recent = LRUCache(_RECENT_TASKS_CACHE_SIZE)
+        # tasks taken out of the queue and not done yet
+        # more then one when the service executes concurrent actions
+        self._running = {}
         # pointer to current task
         self._current = None
         self._current_mu = Semaphore()
@@ -61,6 +86,8 @@ class TaskList:
         this call is blocking when the task list is empty
         """
         _, task = self._queue.get(timeout=timeout)
+        self._unindex(task)
+        self._running[task.guid] = task
         self.current = task
         nr_task_waiting.labels(service_guid=self.service.guid).dec()
         return task
@@ -73,14 +100,96 @@ class TaskList:
             raise ValueError("task should be an instance of the Task class not %s" % type(task))
         task._priority = priority
         nr_task_waiting.labels(service_guid=self.service.guid).inc()
+        self._waiting[task.guid] = task
+        self._waiting_actions.setdefault(task.action_name, {})[task.guid] = task
+        if task.action_name in self._coalesced_actions:
+            self._index_call(task)
         self._queue.put((priority, task))
+        # let the executor know the service has something to do
+        executor.pool.wake(self.service)
+
+    def peek(self):
+        """
+        return the next task that get would return, without removing it from the task list
+        return None if the task list is empty
+        """
+        try:
+            _, task = self._queue.peek(block=False)
+            return task
+        except gevent.queue.Empty:
+            return None
+
+    def _unindex(self, task):
+        self._waiting.pop(task.guid, None)
+        tasks = self._waiting_actions.get(task.action_name)
+        if tasks is not None:
+            tasks.pop(task.guid, None)
+            if not tasks:
+                del self._waiting_actions[task.action_name]
+        key = self._call_keys.pop(task.guid, None)
+        if key is not None:
+            tasks = self._waiting_calls[key]
+            tasks.pop(task.guid, None)
+            if not tasks:
+                del self._waiting_calls[key]
+
+    def _index_call(self, task):
+        key = _call_key(task.action_name, task._args)
+        if key is not None:
+            self._call_keys[task.guid] = key
+            self._waiting_calls.setdefault(key, {})[task.guid] = task
+
+    def waiting_task(self, action_name):
+        """
+        return a task of the action action_name that is running or waiting in the task list
+        return None if there is no such task
+        """
+        for task in self._running.values():
+            if task.state == TASK_STATE_RUNNING and task.action_name == action_name:
+                return task
+        tasks = self._waiting_actions.get(action_name)
+        if tasks:
+            return next(iter(tasks.values()))
+        return None
+
+    def find_duplicate(self, action_name, args, priority=PRIORITY_NORMAL):
+        """
+        return a task waiting in the task list that executes action_name with the same args
+        and that is going to be executed with the same or a higher priority
+        return None if there is no such task
+        """
+        key = _call_key(action_name, args)
+        if key is None:
+            return None
+        if action_name not in self._coalesced_actions:
+            # first time this action is coalesced, index the tasks already waiting
+            # from now on put keeps the index up to date
+            self._coalesced_actions.add(action_name)
+            for task in self._waiting_actions.get(action_name, {}).values():
+                self._index_call(task)
+        for task in self._waiting_calls.get(key, {}).values():
+            if task._priority <= priority:
+                return task
+        return None
 
     def done(self, task):
         """
         notify that a task is done
         """
-        self.current = None
+        self._running.pop(task.guid, None)
+        with self._current_mu:
+            if self._current is task or self._current is None:
+                # another task of the service could still be running
+                self._current = next(iter(self._running.values()), None)
         self._done.add(task)
+        self._recent.set(task.guid, task)
+
+    @property
+    def running(self):
+        """
+        tasks currently executed by the service
+        """
+        return [t for t in self._running.values() if t.state == TASK_STATE_RUNNING]
 
     def empty(self):
         """
@@ -95,24 +204,49 @@ class TaskList:
 
         try:
             while not self.empty():
-                self._queue.get_nowait()
+                _, task = self._queue.get_nowait()
+                self._unindex(task)
         except gevent.queue.Empty:
             return
 
-    def list_tasks(self, all=False):
+    def list_tasks(self, all=False, state=None, action_name=None, since=None, limit=None, cursor=None):
         """
         @param all: if True, also return the task that have been executed
                     if False only return the task waiting in the task list
+        @param state: only return the tasks in this state
+        @param action_name: only return the tasks of this action
+        @param since: only return the tasks created after this timestamp
+        @param limit: maximum number of tasks returned
+        @param cursor: guid of the last task of the previous page,
+                       only the tasks listed after it are returned
         returns all the task that are currently in the task list
         """
         tasks = [x[1] for x in self._queue.queue]
-        if all:
-            tasks.extend(self._done.list())
 
-        if self.current and self.current.state == TASK_STATE_RUNNING:
-            # also return the current running
-            # task as part of the task list
-            tasks.insert(0, self.current)
+        # also return the running tasks as part of the task list
+        tasks[:0] = self.running
+
+        tasks = [t for t in tasks if _match_task(t, state, action_name, since)]
+
+        # the tasks in memory are listed first, then the executed tasks from the storage
+        done_cursor = None
+        if cursor:
+            guids = [t.guid for t in tasks]
+            if cursor in guids:
+                tasks = tasks[guids.index(cursor) + 1:]
+            else:
+                tasks = []
+                done_cursor = cursor
+
+        if limit is not None:
+            tasks = tasks[:limit]
+            limit -= len(tasks)
+
+        if all and limit != 0:
+            tasks.extend(self._done.list(from_timestap=since, state=state, action_name=action_name,
+                                         limit=limit, cursor=done_cursor))
+        elif done_cursor:
+            raise TaskNotFoundError("task %s not found" % cursor)
 
         return tasks
 
@@ -120,27 +254,26 @@ class TaskList:
         """
         return a task from the list by it's guid
         """
-        # FIXME: this is really inefficient
-        def find_task(guid, l):
-            for task in l:
-                if task.guid == guid:
-                    return task
-            raise TaskNotFoundError()
-
-        # check if it's not the current running task
-        if self.current and self.current.guid == guid:
-            return self.current
+        # check if it's not a running task
+        task = self._running.get(guid)
+        if task is not None:
+            return task
 
         # search in waiting tasks
-        try:
-            task = find_task(guid, [x[1] for x in self._queue.queue])
+        task = self._waiting.get(guid)
+        if task is not None:
+            return task
+
+        # search in recently executed tasks
+        task = self._recent.get(guid)
+        if task is not None:
             return task
-        except TaskNotFoundError:
-            pass
 
         # search in done task
         # this will raise TaskNotFoundError if can't find the task
-        return self._done.get(guid)
+        task = self._done.get(guid)
+        self._recent.set(guid, task)
+        return task
 
     def load(self, tasks):
         """
@@ -162,3 +295,38 @@ class TaskList:
             else:
                 # None supported state, just skip it
                 continue
+
+
+def _new_storage(task_list):
+    """
+    create the storage of the executed tasks, as configured in config.task_storage
+    """
+    # in delayed mode, done tasks are written in batches to not pay a commit per executed task
+    write_behind = config.task_durability == 'delayed'
+    if config.task_storage == 'robot':
+        return shared.TaskStorageShared(task_list, shared.db_path(config.data_repo.path), write_behind=write_behind)
+    return TaskStorageSqlite(task_list, write_behind=write_behind)
+
+
+def _call_key(action_name, args):
+    """
+    return a hashable key identifying the call of action_name with args
+    return None if args can't be serialized, such calls are never coalesced
+    """
+    try:
+        return (action_name, json.dumps(args, sort_keys=True))
+    except (TypeError, ValueError):
+        return None
+
+
+def _match_task(task, state=None, action_name=None, since=None):
+    """
+    check if a task matches the filters of TaskList.list_tasks
+    """
+    if state and task.state != state:
+        return False
+    if action_name and task.action_name != action_name:
+        return False
+    if since and task.created < since:
+        return False
+    return True
@@ -0,0 +1,124 @@
+"""
+This module extracts the metadata of the actions of a template.
+
+The signature of all the methods of a template class is inspected once, when the template is loaded,
+so validating the arguments of a scheduled action or listing the actions of a service
+doesn't need to introspect the methods again.
+"""
+
+import inspect
+from collections import namedtuple
+
+from zerorobot.template.exceptions import BadActionArgumentError
+
+# methods of TemplateBase that are not exposed as actions of the services
+_skip = ('load', 'save', 'schedule_action', 'recurring_action', 'validate', 'add_delete_callback')
+
+# name: name of the action
+# mandatory: names of the parameters that must be passed to the action, in the order of the signature
+# params: names of all the parameters of the action
+# kwargs: True if the action accepts **kwargs
+# concurrent: True if the action is decorated with @concurrent
+Action = namedtuple('Action', ['name', 'mandatory', 'params', 'kwargs', 'concurrent'])
+
+# actions that are always executed one by one, even if a template marks them as concurrent
+_serialized = ('update_data', 'delete', 'save')
+
+
+def action_from_signature(name, signature, func=None):
+    mandatory = []
+    kwargs = False
+    for param in signature.parameters.values():
+        if param.kind == param.VAR_KEYWORD:
+            kwargs = True
+        elif param.default == signature.empty:
+            mandatory.append(param.name)
+    return Action(name=name,
+                  mandatory=tuple(mandatory),
+                  params=frozenset(signature.parameters.keys()),
+                  kwargs=kwargs,
+                  concurrent=is_concurrent(name, func))
+
+
+def is_concurrent(name, func):
+    """
+    return True if the action can be executed concurrently with the other concurrent actions of the service
+    """
+    if name in _serialized:
+        return False
+    # functools.wraps copies the marker of @concurrent on the decorators applied after it
+    return getattr(func, '_concurrent_action', False) is True
+
+
+def inspect_template(template):
+    """
+    return the metadata of all the methods of a template class, keyed by name
+    """
+    actions = {}
+    for name in dir(template):
+        if name.startswith('__'):
+            continue
+        attr = inspect.getattr_static(template, name)
+        if isinstance(attr, staticmethod):
+            func = attr.__func__
+            signature = inspect.signature(func, follow_wrapped=True)
+        elif isinstance(attr, classmethod) or inspect.isfunction(attr):
+            # the signature of the bound method, without self or cls
+            func = getattr(template, name)
+            signature = inspect.signature(func, follow_wrapped=True)
+            if inspect.isfunction(attr):
+                params = list(signature.parameters.values())[1:]
+                signature = signature.replace(parameters=params)
+        else:
+            continue
+        actions[name] = action_from_signature(name, signature, func)
+    return actions
+
+
+def get_actions(template):
+    """
+    return the metadata of the methods of a template class, inspect the class the first time
+    """
+    actions = template.__dict__.get('_actions')
+    if actions is None:
+        actions = inspect_template(template)
+        template._actions = actions
+    return actions
+
+
+def list_actions(template):
+    """
+    return the names of the actions a service of this template exposes
+    """
+    names = template.__dict__.get('_actions_names')
+    if names is None:
+        names = []
+        for name in dir(template):
+            if name in _skip or name.startswith('_'):
+                continue
+            # properties are listed as actions, without calling them
+            attr = getattr(template, name, None)
+            if isinstance(attr, property) or callable(attr):
+                names.append(name)
+        template._actions_names = names
+    return names
+
+
+def check_args(action, args):
+    """
+    make sure the arguments passed to an action match its signature
+
+    :raises BadActionArgumentError: if a mandatory parameter is missing or if an argument is not in the signature
+    """
+    if args is None:
+        args = {}
+    for name in action.mandatory:
+        if name not in args:
+            raise BadActionArgumentError("parameter %s is mandatory but not passed to in args" % name)
+
+    if not action.kwargs:
+        diff = set(args.keys()).difference(action.params)
+        if diff:
+            raise BadActionArgumentError(
+                'arguments "%s" are not present in the signature of the action' % ",".join(diff)
+            )
@@ -9,13 +9,10 @@ import logging
 import os
 import shutil
 import sys
-import time
 from logging.handlers import RotatingFileHandler
 from uuid import uuid4
 
 import gevent
-from gevent.event import Event
-from gevent.queue import Empty
 from jumpscale import j
 from zerorobot import config
 from zerorobot import service_collection as scol
@@ -24,6 +21,7 @@ from zerorobot.dsl.ZeroRobotAPI import ZeroRobotAPI
 from zerorobot.prometheus.robot import task_latency
 from zerorobot.task import PRIORITY_NORMAL, PRIORITY_SYSTEM, TASK_STATE_ERROR, Task, TaskList
 from zerorobot.task.utils import wait_all
+from zerorobot.template import actions, executor, recurring
 from zerorobot.template.data import ServiceData
 from zerorobot.template.decorator import timeout
 from zerorobot.template.state import ServiceState
@@ -113,10 +111,11 @@ class TemplateBase:
     template_uid = None
     # path of the template on disk. This is set during template loading
     template_dir = None
+    # maximum number of actions decorated with @concurrent the service executes at the same time
+    max_concurrent_actions = 4
 
     def __init__(self, name=None, guid=None, data=None):
         self.template_dir = os.path.dirname(sys.modules.get(str(self.template_uid)).__file__)
-        self.__stop_event = Event()
         self.guid = guid or str(uuid4())
         self.name = name or self.guid
         self._public = False
@@ -141,12 +140,14 @@ class TemplateBase:
 
         self._delete_callback = []
 
-        # start the greenlets of this service
+        # greenlets started by the service
         self.gl_mgr = GreenletsMgr()
-        self.gl_mgr.add("executor", gevent.Greenlet(self._run))
 
         self.logger = _configure_logger(self)
 
+        # start processing the task list of this service
+        executor.pool.start(self)
+
     @property
     def data(self):
         return self._data
@@ -176,48 +177,33 @@ class TemplateBase:
         """
         storage.save(self)
 
-    def _run(self):
+    def _is_concurrent(self, task):
+        if task.action_name in self.__dict__:
+            # method set on the instance, not an action of the template
+            return False
+        action = actions.get_actions(type(self)).get(task.action_name)
+        return action is not None and action.concurrent
+
+    def _execute(self, task):
         """
-        _run is responsible to walk over the task list to execute actions
-        and handle responses from other service
+        execute a task of the task list, called by the executor pool
         """
-        # wait to start the processsing of task list after the service is fully loaded
-        if config.SERVICE_LOADED:
-            config.SERVICE_LOADED.wait()
-
-        while not self.__stop_event.is_set():
-            try:
-                try:
-                    # wait for 5 second before re-trying the exit condition
-                    task = self.task_list.get(timeout=5)
-                except Empty:
-                    continue
-
-                task.service = self
-                try:
-                    task.execute()
-                    # we save the service state after each actions
-                    # we don't save after a save action, since we just already did it
-                    if task.action_name != "save":
-                        self.save()
-                finally:
-                    task_latency.labels(action_name=task.action_name, template_uid=str(self.template_uid)).observe(
-                        task.duration
-                    )
-                    # notify the task list that this task is done
-                    self.task_list.done(task)
-                    if task.state == TASK_STATE_ERROR and task.eco:
-                        self.logger.error("error executing action %s:\n%s" % (task.action_name, task.eco.trace))
-
-            except gevent.GreenletExit:
-                # TODO: gracefull shutdown
-                # make sure the task storage is close properly
-                self.task_list._done.close()
-                return
-            except:
-                self.logger.exception("Uncaught exception in service task loop!")
-
-    def schedule_action(self, action, args=None):
+        try:
+            task.execute()
+            # we save the service state after each actions
+            # we don't save after a save action, since we just already did it
+            if task.action_name != "save":
+                storage.mark_dirty(self)
+        finally:
+            task_latency.labels(action_name=task.action_name, template_uid=str(self.template_uid)).observe(
+                task.duration
+            )
+            # notify the task list that this task is done
+            self.task_list.done(task)
+            if task.state == TASK_STATE_ERROR and task.eco:
+                self.logger.error("error executing action %s:\n%s" % (task.action_name, task.eco.trace))
+
+    def schedule_action(self, action, args=None, coalesce=False):
         """
         Add an action to the task list of this service.
         This method should never be called directly by the user.
@@ -226,10 +212,23 @@ class TemplateBase:
 
         @param action: action is the name of the action to add to the task list
         @param args: dictionnary of the argument to pass to the action
+        @param coalesce: if True and the same action with the same arguments is already waiting in the task list,
+                         return the waiting task instead of adding a new one
         """
-        return self._schedule_action(action, args)
+        return self._schedule_action(action, args, coalesce=coalesce)
+
+    def _schedule_action(self, action, args=None, priority=PRIORITY_NORMAL, coalesce=False):
+        method, args = self._check_action(action, args)
+        return self._add_task(method, args, priority=priority, coalesce=coalesce)
 
-    def _schedule_action(self, action, args=None, priority=PRIORITY_NORMAL):
+    def _check_action(self, action, args=None):
+        """
+        make sure action exists and that args match its signature
+
+        @return: the method of the action and the arguments to pass to it
+        @raises ActionNotFoundError: if the service doesn't have this action
+        @raises BadActionArgumentError: if args doesn't match the signature of the action
+        """
         if not hasattr(self, action):
             raise ActionNotFoundError("service %s doesn't have action %s" % (self.name, action))
 
@@ -238,24 +237,25 @@ class TemplateBase:
             raise ActionNotFoundError("%s is not a function" % action)
 
         # make sure the argument we pass are correct
-        kwargs_enable = False
-        s = inspect.signature(method, follow_wrapped=True)
-        for param in s.parameters.values():
-            if param.kind == param.VAR_KEYWORD:
-                kwargs_enable = True
-            if args is None:
-                args = {}
-            if param.default == s.empty and param.name not in args and param.kind != param.VAR_KEYWORD:
-                raise BadActionArgumentError("parameter %s is mandatory but not passed to in args" % param.name)
-
-        if args is not None:
-            signature_keys = set(s.parameters.keys())
-            args_keys = set(args.keys())
-            diff = args_keys.difference(signature_keys)
-            if diff and not kwargs_enable:
-                raise BadActionArgumentError(
-                    'arguments "%s" are not present in the signature of the action' % ",".join(diff)
-                )
+        action_meta = None
+        if action not in self.__dict__:
+            action_meta = actions.get_actions(type(self)).get(action)
+        if action_meta is None:
+            # the action is not a method of the template class, inspect it now
+            action_meta = actions.action_from_signature(action, inspect.signature(method, follow_wrapped=True), method)
+        if args is None and action_meta.params:
+            args = {}
+        actions.check_args(action_meta, args)
+        return method, args
+
+    def _add_task(self, method, args, priority=PRIORITY_NORMAL, coalesce=False):
+        """
+        add a task executing method to the task list, method and args must have been validated by _check_action
+        """
+        if coalesce:
+            task = self.task_list.find_duplicate(method.__name__, args, priority=priority)
+            if task is not None:
+                return task
 
         task = Task(method, args)
         self.task_list.put(task, priority=priority)
@@ -278,30 +278,22 @@ class TemplateBase:
         if inspect.ismethod(action) or inspect.isfunction(action):
             action = action.__name__
 
-        gl = gevent.Greenlet(_recurring_action, self, action, period)
-        self.gl_mgr.add("recurring_" + action, gl)
+        recurring.scheduler.add(self, action, period, priority)
 
     def _gracefull_stop(self, timeout=None):
         """
         Gracefully stop the service
 
-        1. kill all the recurring greenlets
-        2. if there is a task in progress wait till timout, then kill
+        1. stop all the recurring actions
+        2. if there are tasks in progress wait till timout, then kill
         """
         self.logger.info("stopping service %s (%s)", self.name, self.guid)
-        self.__stop_event.set()  # make the main loop exit
 
         # stop all recurring action and processing of task list
-        self.gl_mgr.stop_recurring(wait=False)
-        main_gl = self.gl_mgr.get("executor")
-
-        # if the main loop is busy with a task, wait timeout
-        # then kill
-        try:
-            if self.task_list.current:
-                main_gl.join(timeout=timeout)
-        finally:
-            main_gl.kill(block=True, timeout=1)
+        recurring.scheduler.cancel(self)
+        executor.pool.stop(self, timeout=timeout)
+        # make sure the task storage is close properly
+        self.task_list._done.close()
 
     def delete(self, wait=False, timeout=60, die=False):
         """
@@ -316,9 +308,10 @@ class TemplateBase:
         # empty the task list
         self.task_list.clear()
 
-        # wait for the current task to finish if there is any
-        if self.task_list.current and wait:
-            self.task_list.current.wait(timeout=timeout)
+        # wait for the running tasks to finish if there is any
+        if wait:
+            for task in self.task_list.running:
+                task.wait(timeout=timeout)
 
         if not self.task_list.empty():
             self.logger.warning("service %s stop processing its task list, while some task remains in the queue")
@@ -331,8 +324,14 @@ class TemplateBase:
             delete_tasks.append(task)
         wait_all(delete_tasks, timeout=30, die=False)
 
+        # remove the executed tasks of the service
+        self.task_list._done.drop()
+
         # stop all recurring action and processing of task list
+        recurring.scheduler.cancel(self)
+        executor.pool.stop(self, timeout=5)
         self.gl_mgr.stop_all(wait=True, timeout=5)
+        self.task_list._done.close()
 
         # close ressources of logging handlers
         for h in self.logger.handlers:
@@ -392,34 +391,6 @@ class TemplateBase:
             self._delete_callback.append(action_name)
 
 
-def _recurring_action(service, action, period, priority=PRIORITY_NORMAL):
-    """
-    this function is intended to be run in a greenlet.
-    It will ensure that the action from service is schedule at best every period second.
-
-    Since we dont' have controle over how long other task from the task list take.
-    we can only ensure that the action is never going to be schedule faster then every period second
-
-    That means that it can be a longer time then period second during which the action is not executed
-    """
-    elapsed = -1
-    task = None
-    while True:
-        tasks_name = [t.action_name for t in service.task_list.list_tasks()]
-        try:
-            # schedule if period time has elapsed and the same action is not already in the task list
-            if action not in tasks_name and (elapsed == -1 or elapsed >= period):
-                task = service._schedule_action(action, priority=priority)
-                task.wait()
-            else:
-                gevent.sleep(0.5)
-
-            if task:
-                elapsed = int(time.time()) - task.created
-        except gevent.GreenletExit:
-            break
-
-
 _LOGGER_FORMAT = "%(asctime)s - %(pathname)s:%(lineno)d - %(levelname)s - %(message)s"
 
 
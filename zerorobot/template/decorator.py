@@ -70,6 +70,18 @@ def timeout(seconds, error_message='Function call timed out'):
     return deco_timout
 
 
+def concurrent(f):
+    """
+    Mark an action as safe to be executed at the same time as other concurrent actions of the service.
+
+    Use it for actions that don't modify the service, like monitoring or reading some state.
+    The service executes up to `max_concurrent_actions` concurrent actions at the same time,
+    the other actions are still executed one by one, never while a concurrent action is running.
+    """
+    f._concurrent_action = True
+    return f
+
+
 def profile(output=None):
     """
     Enable python cProfile for the decorated function.
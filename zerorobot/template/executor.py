@@ -0,0 +1,190 @@
+"""
+robot wide executor of the tasks of the services
+
+Services don't run their own greenlet to process their task list anymore.
+When a service has a task it can execute, it is put in a run queue.
+A single dispatcher greenlet takes the services from the run queue one after the other and executes
+one task of each in a pool of greenlets, so the number of tasks executed at the same time by the robot is bounded
+and a service with a lot of tasks doesn't delay the others: after one of its tasks has been started,
+a service goes back at the end of the run queue.
+
+Each service still executes its tasks in the order of its task list, one by one,
+except the actions marked as concurrent, see zerorobot.template.decorator.concurrent
+"""
+
+from collections import deque
+
+import gevent
+from gevent.event import Event
+from gevent.pool import Pool
+
+from zerorobot import config
+
+# default maximum number of tasks executed at the same time by the robot, 0 for no limit
+# no limit by default: an action waiting on a task of another service keeps its slot,
+# so with a limit, enough of them running at the same time prevent the tasks they wait on from being executed
+EXECUTOR_CONCURRENCY = 0
+# default number of seconds to wait for the tasks of a service being executed when stopping it during shutdown or upgrade
+STOP_TIMEOUT = 10
+
+
+class ExecutorPool:
+
+    def __init__(self, size=EXECUTOR_CONCURRENCY):
+        self._pool = Pool(size or None)
+        # services processing their task list, keyed by guid
+        self._services = {}
+        # services that have a task ready to be executed, and their guid
+        self._ready = deque()
+        self._queued = set()
+        # greenlets executing a task for each service: guid -> {greenlet: task}
+        self._running = {}
+        # guid of the services executing an action that is not concurrent
+        self._serial = set()
+        self._wakeup = Event()
+        self._gl = None
+
+    @property
+    def size(self):
+        return self._pool.size
+
+    def resize(self, size):
+        """
+        change the maximum number of tasks executed at the same time, 0 or None for no limit
+        the tasks already running are not affected
+        """
+        size = size or None
+        if size != self._pool.size:
+            self._pool = Pool(size)
+
+    def start(self, service):
+        """
+        start processing the task list of a service
+        """
+        self._services[service.guid] = service
+        if self._gl is None or self._gl.dead:
+            self._gl = gevent.spawn(self._run)
+        self.wake(service)
+
+    def stop(self, service, timeout=None):
+        """
+        stop processing the task list of a service
+        wait at most timeout seconds for the tasks of the service being executed then kill them
+        """
+        if self._services.get(service.guid) is service:
+            del self._services[service.guid]
+
+        # the service can be stopped from one of its own actions, e.g. delete
+        # the action runs in the greenlet spawned by Task.execute, not in the greenlet of the pool
+        current = gevent.getcurrent()
+        greenlets = [gl for gl, task in self._running.get(service.guid, {}).items()
+                     if task.service is service and current not in (gl, task._execute_greenlet)]
+        if not greenlets:
+            return
+        gevent.joinall(greenlets, timeout=timeout)
+        for gl in greenlets:
+            if not gl.dead:
+                gl.kill(block=True, timeout=1)
+
+    def is_running(self, service):
+        """
+        return True if the task list of the service is processed
+        """
+        return self._services.get(service.guid) is service
+
+    def wake(self, service):
+        """
+        put the service in the run queue if it can execute its next task
+        called every time a task is added to the task list of a service or a task of a service is done
+        """
+        if service.guid in self._queued or not self._can_run(service):
+            return
+        self._queued.add(service.guid)
+        self._ready.append(service)
+        self._wakeup.set()
+
+    def _can_run(self, service):
+        if self._services.get(service.guid) is not service or service.guid in self._serial:
+            return False
+        task = service.task_list.peek()
+        if task is None:
+            return False
+        running = len(self._running.get(service.guid, ()))
+        if service._is_concurrent(task):
+            return running < service.max_concurrent_actions
+        # other actions are never executed together with concurrent actions
+        return running == 0
+
+    def _run(self):
+        while True:
+            # wait to start the processsing of task lists after the services are fully loaded
+            if config.SERVICE_LOADED:
+                config.SERVICE_LOADED.wait()
+
+            if not self._ready:
+                self._wakeup.clear()
+                self._wakeup.wait()
+                continue
+
+            service = self._ready.popleft()
+            self._queued.discard(service.guid)
+            # an error with one service must not stop the execution of the tasks of the others
+            try:
+                self._dispatch(service)
+            except gevent.GreenletExit:
+                raise
+            except:
+                service.logger.exception("Uncaught exception in service task loop!")
+
+    def _dispatch(self, service):
+        """
+        start the execution of the next task of a service taken from the run queue
+        """
+        # the service could have been replaced by a new instance since it has been queued
+        service = self._services.get(service.guid, service)
+
+        # blocks while the maximum number of tasks are being executed
+        self._pool.wait_available()
+        if not self._can_run(service):
+            return
+
+        task = service.task_list.get(timeout=0)
+        task.service = service
+        serial = not service._is_concurrent(task)
+        if serial:
+            self._serial.add(service.guid)
+        try:
+            gl = self._pool.spawn(self._execute, service, task)
+        except:
+            # zerorobot.task imports this module
+            from zerorobot.task import TASK_STATE_ERROR
+            if serial:
+                self._serial.discard(service.guid)
+            task.state = TASK_STATE_ERROR
+            service.task_list.done(task)
+            raise
+        self._running.setdefault(service.guid, {})[gl] = task
+        # the service goes at the end of the run queue if it can execute another task
+        self.wake(service)
+
+    def _execute(self, service, task):
+        try:
+            service._execute(task)
+        except gevent.GreenletExit:
+            raise
+        except:
+            service.logger.exception("Uncaught exception while executing task %s", task.guid)
+        finally:
+            running = self._running.get(service.guid, {})
+            running.pop(gevent.getcurrent(), None)
+            if not running:
+                self._running.pop(service.guid, None)
+            if not service._is_concurrent(task):
+                self._serial.discard(service.guid)
+            # the service could have been replaced by a new instance, e.g. during an upgrade
+            service = self._services.get(service.guid)
+            if service is not None:
+                self.wake(service)
+
+
+pool = ExecutorPool()
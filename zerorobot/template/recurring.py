@@ -0,0 +1,143 @@
+"""
+robot wide scheduler of the recurring actions of the services
+
+All the recurring actions are kept in a heap ordered by the time they are due next.
+A single greenlet sleeps until the first one is due and schedules it.
+The next run of an action is computed once its task has been executed,
+so an action is never scheduled more often than every period seconds.
+"""
+
+import heapq
+import itertools
+import random
+import time
+
+import gevent
+from gevent.event import Event
+
+from jumpscale import j
+
+logger = j.logger.get(__name__)
+
+# fraction of the period added at random to the time an action is due,
+# so the recurring actions of all the services don't all run at the same time after a restart
+RECURRING_JITTER = 0.1
+
+
+class _Recurring:
+    """
+    a recurring action of a service
+    """
+
+    __slots__ = ('service', 'action', 'period', 'priority', 'jitter', 'task', 'created', 'cancelled')
+
+    def __init__(self, service, action, period, priority, jitter):
+        self.service = service
+        self.action = action
+        self.period = period
+        self.priority = priority
+        self.jitter = jitter
+        # task of the action that is waiting or being executed, and the time it has been created
+        self.task = None
+        self.created = None
+        self.cancelled = False
+
+    def delay(self):
+        return random.uniform(0, self.period * self.jitter) if self.jitter else 0
+
+
+class RecurringScheduler:
+
+    def __init__(self):
+        # recurring actions keyed by (service guid, action name)
+        self._recurring = {}
+        # heap of (due time, sequence, recurring action)
+        self._heap = []
+        self._seq = itertools.count()
+        self._wakeup = Event()
+        self._gl = None
+
+    def add(self, service, action, period, priority, jitter=RECURRING_JITTER):
+        """
+        schedule action of service every period seconds
+        the first run happens within period * jitter seconds
+        if the action is already recurring for this service, it is replaced
+        """
+        key = (service.guid, action)
+        previous = self._recurring.get(key)
+        if previous is not None:
+            previous.cancelled = True
+
+        recurring = _Recurring(service, action, period, priority, jitter)
+        self._recurring[key] = recurring
+        self._push(time.time() + recurring.delay(), recurring)
+
+        if self._gl is None or self._gl.dead:
+            self._gl = gevent.spawn(self._run)
+
+    def cancel(self, service):
+        """
+        stop all the recurring actions of a service
+        """
+        for action in [action for guid, action in self._recurring if guid == service.guid]:
+            recurring = self._recurring[(service.guid, action)]
+            if recurring.service is service:
+                recurring.cancelled = True
+                del self._recurring[(service.guid, action)]
+
+    def is_scheduled(self, service, action):
+        recurring = self._recurring.get((service.guid, action))
+        return recurring is not None and recurring.service is service
+
+    def _push(self, due, recurring):
+        first = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (due, next(self._seq), recurring))
+        if first is None or due < first:
+            # the new action is due before the one the scheduler is sleeping on
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                self._wakeup.wait()
+                continue
+
+            due, _, recurring = self._heap[0]
+            delay = due - time.time()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                continue
+
+            heapq.heappop(self._heap)
+            if not recurring.cancelled:
+                self._schedule(recurring)
+
+    def _schedule(self, recurring):
+        task_list = recurring.service.task_list
+        # the same action could already be in the task list, wait for it to be executed instead
+        task = task_list.waiting_task(recurring.action)
+        if task is not None:
+            created = task.created
+        else:
+            created = time.time()
+            try:
+                task = recurring.service._schedule_action(recurring.action, priority=recurring.priority)
+            except Exception:
+                logger.exception("fail to schedule recurring action %s of service %s, stop scheduling it",
+                                 recurring.action, recurring.service.guid)
+                self._recurring.pop((recurring.service.guid, recurring.action), None)
+                return
+
+        recurring.task = task
+        recurring.created = created
+        task.on_done(lambda task: self._done(recurring, task))
+
+    def _done(self, recurring, task):
+        if recurring.cancelled or recurring.task is not task:
+            return
+        recurring.task = None
+        self._push(recurring.created + recurring.period + recurring.delay(), recurring)
+
+
+scheduler = RecurringScheduler()
@@ -13,11 +13,39 @@ from jumpscale import j
 from zerorobot import service_collection as scol
 from zerorobot import git
 from zerorobot.service_collection import ServiceConflictError
+from zerorobot.template import actions
 from zerorobot.template_uid import TemplateUID
 
 
 _templates = {}
 
+# indexes on the parts of the template uids, each maps a key to a dict uid -> template
+# they are updated with _templates by _add and clear, _templates must not be changed directly
+_by_name = {}
+_by_repo_name = {}
+_by_version = {}
+
+
+def _index(uid, template):
+    _by_name.setdefault(uid.name, {})[uid] = template
+    _by_repo_name.setdefault((uid.host, uid.account, uid.repo, uid.name), {})[uid] = template
+    _by_version.setdefault(uid.version, {})[uid] = template
+
+
+def _add(template):
+    _templates[template.template_uid] = template
+    _index(template.template_uid, template)
+
+
+def clear():
+    """
+    remove all the templates from the collection
+    """
+    _templates.clear()
+    _by_name.clear()
+    _by_repo_name.clear()
+    _by_version.clear()
+
 
 def add_repo(url, branch=None, directory='templates'):
     """
@@ -64,17 +92,23 @@ def get(uid):
         [TemplateBase] -- return the template class
     """
     if isinstance(uid, str):
-        try:
-            uid = TemplateUID.parse(uid)
-        except ValueError:
-            # uid is not a full template uid, try with only its name
-            templates = find(name=uid)
+        name, uid = uid, None
+        # a full template uid always contains a /, don't bother parsing the names
+        if '/' in name:
+            try:
+                uid = TemplateUID.parse(name)
+            except ValueError:
+                pass
+
+        if uid is None:
+            # name is not a full template uid, try with only its name
+            templates = find(name=name)
             size = len(templates)
             if size > 1:
                 raise TemplateConflictError("tried to get template with name %s, but more then one template have this name (%s)" %
-                                            (uid, ', '.join([str(t.template_uid) for t in templates])))
+                                            (name, ', '.join([str(t.template_uid) for t in templates])))
             elif size <= 0:
-                raise TemplateNotFoundError("template with name %s not found" % str(uid))
+                raise TemplateNotFoundError("template with name %s not found" % name)
             else:
                 return templates[0]
 
@@ -87,8 +121,17 @@ def find(host=None, account=None, repo=None, name=None, version=None):
     """
     search for a template based on the part of the template UID
     """
+    if host and account and repo and name:
+        candidates = _by_repo_name.get((host, account, repo, name), {})
+    elif name:
+        candidates = _by_name.get(name, {})
+    elif version:
+        candidates = _by_version.get(version, {})
+    else:
+        candidates = _templates
+
     match = []
-    for uid, template in _templates.items():
+    for uid, template in candidates.items():
         if host and uid.host != host:
             continue
         if account and uid.account != account:
@@ -135,7 +178,9 @@ def _load_template(url, template_dir):
     sys.modules[str(class_.template_uid)] = module
 
     class_.template_dir = template_dir
-    _templates[class_.template_uid] = class_
+    # inspect the actions now so scheduling them doesn't need to
+    actions.get_actions(class_)
+    _add(class_)
     logger = j.logger.get('zerorobot')
     logger.debug("add template %s to collection" % class_.template_uid)
     return _templates[class_.template_uid]
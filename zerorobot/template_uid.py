@@ -1,18 +1,37 @@
 from urllib.parse import urlparse
 import re
 
+from zerorobot.lru import LRUCache
+
 _version_regex = re.compile("(\d+).(\d+).(\d+)")
 _name_regex = re.compile("^\w+$")
 
+# number of parsed uids kept in memory
+PARSE_CACHE_SIZE = 1024
+_parse_cache = LRUCache(PARSE_CACHE_SIZE)
+
 
 class TemplateUID:
+    """
+    unique identifier of a template
+
+    TemplateUID are immutable, the tuple, string and hash used to compare them
+    and to use them as dict keys are computed once when they are created
+    """
+
+    __slots__ = ('host', 'account', 'repo', 'name', 'version', '_tuple', '_str', '_hash')
 
     def __init__(self, host, account, repo, name, version):
-        self.host = host
-        self.account = account
-        self.repo = repo
-        self.name = name
-        self.version = version
+        set_ = super().__setattr__
+        set_('host', host)
+        set_('account', account)
+        set_('repo', repo)
+        set_('name', name)
+        set_('version', version)
+        t = tuple(x for x in (host, account, repo, name, version) if x)
+        set_('_tuple', t)
+        set_('_str', '/'.join(t))
+        set_('_hash', hash(t))
 
     @classmethod
     def parse(cls, uid):
@@ -35,7 +54,18 @@ class TemplateUID:
         parse supports forms:
         complete uid: github.com/account/repository/name/version
         without version: github.com/account/repository/name
+
+        the same uid string always returns the same TemplateUID object
+        as long as it is kept in the parse cache
         """
+        uid_obj = _parse_cache.get(uid)
+        if uid_obj is None:
+            uid_obj = cls(*cls._parse(uid))
+            _parse_cache.set(uid, uid_obj)
+        return uid_obj
+
+    @staticmethod
+    def _parse(uid):
         host, account, repo, name, version = None, None, None, None, None
 
         parsed = urlparse(uid)
@@ -56,20 +86,28 @@ class TemplateUID:
         if version and not _version_regex.match(version):
             raise ValueError("format of the template uid (%s) not valid" % uid)
 
-        return cls(host, account, repo, name, version)
+        return host, account, repo, name, version
 
     def tuple(self):
-        l = [self.host, self.account, self.repo, self.name, self.version]
-        return tuple(x for x in l if x)
+        return self._tuple
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TemplateUID is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("TemplateUID is immutable")
+
+    def __reduce__(self):
+        return (self.__class__, (self.host, self.account, self.repo, self.name, self.version))
 
     def __repr__(self):
-        return '/'.join(self.tuple())
+        return self._str
 
     def __str__(self):
-        return repr(self)
+        return self._str
 
     def __comp(self, other):
-        if self.tuple()[:-1] != other.tuple()[:-1]:
+        if self._tuple[:-1] != other._tuple[:-1]:
             raise ValueError("other is not the same template, can't compare version")
         if self.version < other.version:
             return -1
@@ -79,13 +117,16 @@ class TemplateUID:
             return 0
 
     def __eq__(self, other):
+        if other is self:
+            return True
+
         if isinstance(other, str):
             other = TemplateUID.parse(other)
 
         if not isinstance(other, TemplateUID):
             raise ValueError("other is not an instance of TemplateUID")
 
-        return self.tuple() == other.tuple()
+        return self._hash == other._hash and self._tuple == other._tuple
 
     def __lt__(self, other):
         return self.__comp(other) == -1
@@ -100,4 +141,4 @@ class TemplateUID:
         return self.__comp(other) in [0, 1]
 
     def __hash__(self):
-        return hash(self.tuple())
+        return self._hash